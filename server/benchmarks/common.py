@@ -0,0 +1,107 @@
+import base64
+import statistics
+import sys
+import time
+import uuid
+
+import requests
+from Crypto.Cipher import PKCS1_OAEP
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+
+# URL base de l'API
+base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8002"
+
+# Password per defecte dels usuaris de les proves de rendiment
+PASSWORD = "12341234"
+
+
+# Funció per encriptar la contrasenya amb la clau pública del servidor
+def encrypt_password(password):
+    public_key_pem = requests.get(f"{base_url}/auth/publickey").json()
+    encryptor = PKCS1_OAEP.new(RSA.import_key(public_key_pem), hashAlgo=SHA256)
+    encrypted_bytes = encryptor.encrypt(password.encode("utf-8"))
+    return base64.b64encode(encrypted_bytes).decode("utf-8")
+
+
+# Funció per registrar un usuari nou i obtenir les capçaleres d'autenticació
+def new_user(prefix="bench"):
+    username = f"{prefix}_{uuid.uuid4().hex[:12]}"
+    response = requests.post(
+        f"{base_url}/auth/register",
+        params={"username": username, "password": encrypt_password(PASSWORD)},
+    )
+    response.raise_for_status()
+
+    response = requests.post(
+        f"{base_url}/auth/token",
+        data={
+            "username": username,
+            "password": encrypt_password(PASSWORD),
+            "grant_type": "password",
+        },
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+# Funció per crear un exercici personalitzat
+def create_exercise(headers, name="Press de banca"):
+    exercise = {
+        "uuid": str(uuid.uuid4()),
+        "name": name,
+        "body_part": "chest",
+        "type": "barbell",
+    }
+    response = requests.post(
+        f"{base_url}/user/exercises", headers=headers, json=exercise
+    )
+    response.raise_for_status()
+    return exercise
+
+
+# Funció per generar un entrenament amb `num_entries` exercicis i `num_sets` sèries cadascun
+def make_workout(exercise, timestamp, num_entries=5, num_sets=4):
+    return {
+        "uuid": str(uuid.uuid4()),
+        "name": "Entrenament de prova",
+        "description": "Generat per les proves de rendiment",
+        "instance": {"timestamp_start": timestamp, "duration": 3600},
+        "entries": [
+            {
+                "exercise": exercise,
+                "sets": [
+                    {"reps": 8 + j, "weight": 40.0 + 2.5 * j, "set_type": "normal"}
+                    for j in range(num_sets)
+                ],
+                "rest_countdown_duration": 90,
+                "weight_unit": "metric",
+            }
+            for _ in range(num_entries)
+        ],
+    }
+
+
+# Funció per afegir `count` entrenaments, un per dia cap enrere a partir de `start_day`
+def add_workouts(headers, exercise, count, start_day=0):
+    now_ms = int(time.time() * 1000)
+    for i in range(start_day, start_day + count):
+        workout = make_workout(exercise, now_ms - i * 24 * 3600 * 1000)
+        response = requests.post(
+            f"{base_url}/user/workouts", headers=headers, json=workout
+        )
+        response.raise_for_status()
+
+
+# Funció per mesurar la latència mediana (en ms) d'una petició
+def measure(request, repeat=50, warmup=5):
+    for _ in range(warmup):
+        request()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
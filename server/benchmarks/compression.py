@@ -0,0 +1,129 @@
+import gzip
+import os
+import sys
+import time
+from functools import partial
+
+import brotli
+import requests
+import zstandard
+
+from common import add_workouts, base_url, create_exercise, measure, new_user
+
+# Ajusta la compressió de les respostes (vegeu `compression.py`) amb respostes reals:
+# - Mida comprimida i temps de compressió i descompressió de cada algorisme i nivell,
+#   amb pàgines de /user/workouts de diferents mides i amb els missatges amb l'entrenador.
+# - Mida i latència de /user/workouts a través de l'API amb cada `Accept-Encoding`.
+# Necessita accés a la base de dades del servidor amb les mateixes variables d'entorn
+# (POSTGRES_URL, POSTGRES_USER, ...) i s'executa des del directori `server`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import engine  # noqa: E402
+from models.chat import MessageModel  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+NUM_WORKOUTS = 500  # Entrenaments de l'usuari (5 entrades de 4 sèries cadascun)
+NUM_MESSAGES = 1000  # Missatges amb l'entrenador
+PAGE_SIZES = [25, 100, 500]
+
+LEVELS = {
+    "gzip": [1, 4, 6, 9],
+    "br": [1, 4, 5, 6, 9, 11],
+    "zstd": [1, 3, 6, 9, 19],
+}
+
+
+def compressor(encoding, level):
+    if encoding == "gzip":
+        return partial(gzip.compress, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return partial(brotli.compress, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress
+
+
+DECOMPRESSORS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": zstandard.ZstdDecompressor().decompress,
+}
+
+headers = new_user("compression")
+trainer_headers = new_user("compression_trainer")
+requests.post(f"{base_url}/auth/register/trainer", headers=trainer_headers).raise_for_status()
+user_uuid = requests.get(f"{base_url}/auth/profile", headers=headers).json()["uuid"]
+trainer_uuid = requests.get(f"{base_url}/auth/profile", headers=trainer_headers).json()["uuid"]
+requests.post(
+    f"{base_url}/user/trainer/request", headers=headers, params={"trainer_uuid": trainer_uuid}
+).raise_for_status()
+requests.post(
+    f"{base_url}/trainer/requests/{user_uuid}", headers=trainer_headers, params={"action": "accept"}
+).raise_for_status()
+
+exercises = [create_exercise(headers, f"Exercici {i}") for i in range(5)]
+for i, exercise in enumerate(exercises):
+    add_workouts(headers, exercise, NUM_WORKOUTS // len(exercises), start_day=i * NUM_WORKOUTS)
+
+# Els missatges de l'API tenen una marca de temps en segons, i se n'envia com a molt un per segon
+now_ms = int(time.time() * 1000)
+with Session(engine) as session:
+    for i in range(NUM_MESSAGES):
+        session.add(
+            MessageModel(
+                user_uuid=user_uuid,  # pyright: ignore[]
+                trainer_uuid=trainer_uuid,  # pyright: ignore[]
+                timestamp=now_ms + i,
+                content=f"Missatge de prova {i}",
+                is_sent_by_trainer=i % 2 == 0,
+            )
+        )
+    session.commit()
+
+
+def body(url, params=None, encoding="identity"):
+    response = requests.get(
+        f"{base_url}{url}",
+        headers=headers | {"Accept-Encoding": encoding},
+        params=params,
+        stream=True,
+    )
+    response.raise_for_status()
+    return response.raw.read()  # Cos tal com s'envia, sense descomprimir
+
+
+payloads = [
+    (f"workouts ({limit})", body("/user/workouts", {"limit": limit})) for limit in PAGE_SIZES
+] + [(f"messages ({NUM_MESSAGES})", body("/user/trainer/messages"))]
+
+print(
+    f"{'resposta':<17} | {'algorisme':<9} | {'mida (KB)':>9} | {'ràtio':>6} | "
+    f"{'compressió (ms)':>15} | {'descompressió (ms)':>18}"
+)
+for name, payload in payloads:
+    print(f"{name:<17} | {'cap':<9} | {len(payload) / 1024:>9.1f} | {1:>6.1f} | {0:>15.2f} | {0:>18.2f}")
+    for encoding, levels in LEVELS.items():
+        for level in levels:
+            compress = compressor(encoding, level)
+            compressed = compress(payload)
+            assert DECOMPRESSORS[encoding](compressed) == payload
+
+            def run_compress():
+                compress(payload)
+
+            def run_decompress():
+                DECOMPRESSORS[encoding](compressed)
+
+            print(
+                f"{name:<17} | {f'{encoding}-{level}':<9} | {len(compressed) / 1024:>9.1f} | "
+                f"{len(payload) / len(compressed):>6.1f} | {measure(run_compress, repeat=20):>15.2f} | "
+                f"{measure(run_decompress, repeat=20):>18.2f}"
+            )
+
+print()
+print(f"{'Accept-Encoding':<16} | {'mida (KB)':>9} | {'latència (ms)':>13}")
+for encoding in ["identity", "gzip", "br", "zstd"]:
+
+    def request():
+        body("/user/workouts", {"limit": 100}, encoding)
+
+    size = len(body("/user/workouts", {"limit": 100}, encoding))
+    print(f"{encoding:<16} | {size / 1024:>9.1f} | {measure(request, repeat=20):>13.2f}")
@@ -0,0 +1,87 @@
+import os
+import sys
+import tracemalloc
+
+import requests
+
+from common import add_workouts, base_url, create_exercise, measure, new_user
+
+# Compara la generació de pàgines de /user/workouts dins del mateix procés:
+# - Camí per defecte: models de l'ORM validats amb `WorkoutContentSchema` i serialitzats amb orjson.
+# - Camí de `ULTRA_DATABASE_JSON`: JSON generat per PostgreSQL (vegeu `database_json.py`).
+# Comprova que les dues respostes són idèntiques i mesura el temps i la memòria màxima.
+# Necessita accés a la base de dades del servidor amb les mateixes variables d'entorn
+# (POSTGRES_URL, POSTGRES_USER, ...) i s'executa des del directori `server`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from archive import restore_archived_workouts  # noqa: E402
+from database_json import stream_workouts_json  # noqa: E402
+from db import engine  # noqa: E402
+from models.workout import WorkoutContentModel, WorkoutInstanceModel  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from responses import FastJSONResponse  # noqa: E402
+from schemas.workout_schema import WorkoutContentSchema  # noqa: E402
+from sqlmodel import Session, desc, select  # noqa: E402
+
+NUM_WORKOUTS = 500  # Entrenaments de l'usuari (5 entrades de 4 sèries cadascun)
+PAGE_SIZES = [25, 100, 500]
+
+headers = new_user("dbjson")
+add_workouts(headers, create_exercise(headers), NUM_WORKOUTS)
+user_uuid = requests.get(f"{base_url}/auth/profile", headers=headers).json()["uuid"]
+adapter = TypeAdapter(list[WorkoutContentSchema])
+
+
+def page_query(limit):
+    return (
+        select(WorkoutContentModel)
+        .join(WorkoutInstanceModel)
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .order_by(desc(WorkoutInstanceModel.timestamp_start))
+        .limit(limit)
+    )
+
+
+# Camí per defecte: com la ruta amb el `response_model`
+def orm_page(limit):
+    with Session(engine) as session:
+        workouts = restore_archived_workouts(session, list(session.exec(page_query(limit)).all()))
+        rows = adapter.validate_python(workouts, from_attributes=True)
+        return FastJSONResponse(adapter.dump_python(rows, mode="json")).body
+
+
+# Camí de `ULTRA_DATABASE_JSON`: només es llegeixen els UUID de la pàgina
+def database_page(limit):
+    with Session(engine) as session:
+        workout_uuids = list(session.exec(page_query(limit).with_only_columns(WorkoutContentModel.uuid)))
+    return "".join(stream_workouts_json(workout_uuids)).encode()
+
+
+def timed(page, limit):
+    def run():
+        page(limit)
+
+    return run
+
+
+# Memòria màxima (en KB) reservada durant la generació d'una pàgina
+def peak_kb(page, limit):
+    tracemalloc.start()
+    page(limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+print(
+    f"{'pàgina':>6} | {'mida (KB)':>9} | {'ORM (ms)':>8} | {'PostgreSQL (ms)':>15} | "
+    f"{'ORM (KB)':>8} | {'PostgreSQL (KB)':>15}"
+)
+for limit in PAGE_SIZES:
+    body = orm_page(limit)
+    assert body == database_page(limit)
+    print(
+        f"{limit:>6} | {len(body) / 1024:>9.0f} | {measure(timed(orm_page, limit), repeat=20):>8.2f} | "
+        f"{measure(timed(database_page, limit), repeat=20):>15.2f} | "
+        f"{peak_kb(orm_page, limit):>8.0f} | {peak_kb(database_page, limit):>15.0f}"
+    )
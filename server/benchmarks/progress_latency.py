@@ -0,0 +1,26 @@
+import requests
+
+from common import add_workouts, base_url, create_exercise, measure, new_user
+
+# Mides de l'historial (nombre d'entrenaments) que es mesuren
+HISTORY_SIZES = [100, 500, 1000]
+
+# Mesura la latència de GET /user/exercises/{uuid}/progress a mesura que creix l'historial.
+# Cada entrenament té 5 entrades de 4 sèries de l'exercici mesurat (20 sèries per sessió).
+headers = new_user("progress")
+exercise = create_exercise(headers)
+
+
+def get_progress():
+    response = requests.get(
+        f"{base_url}/user/exercises/{exercise['uuid']}/progress", headers=headers
+    )
+    response.raise_for_status()
+
+
+print(f"{'entrenaments':>12} | {'sèries':>8} | {'mediana (ms)':>12}")
+current_size = 0
+for size in HISTORY_SIZES:
+    add_workouts(headers, exercise, size - current_size, start_day=current_size)
+    current_size = size
+    print(f"{size:>12} | {size * 20:>8} | {measure(get_progress):>12.2f}")
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from common import base_url, create_exercise, make_workout, measure, new_user
+
+# Compara les lectures de les llistes d'exercicis, plantilles i missatges:
+# - Latència de cada endpoint a través de l'API.
+# - Temps i memòria màxima (tracemalloc) de generar cada resposta dins del mateix procés,
+#   amb el camí anterior (models de l'ORM validats amb el `response_model`) i amb el
+#   camí actual (columnes i dataclasses, vegeu `read_models.py`).
+# Necessita accés a la base de dades del servidor amb les mateixes variables d'entorn
+# (POSTGRES_URL, POSTGRES_USER, ...) i s'executa des del directori `server`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import engine  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from models.chat import MessageModel  # noqa: E402
+from models.exercise import ExerciseModel  # noqa: E402
+from models.workout import WorkoutContentModel, WorkoutInstanceModel  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from read_models import read_exercises, read_messages, read_templates  # noqa: E402
+from responses import json_response  # noqa: E402
+from schemas.workout_schema import WorkoutContentSchema  # noqa: E402
+from sqlmodel import Session, asc, select  # noqa: E402
+
+NUM_EXERCISES = 200  # Exercicis personalitzats de l'usuari
+NUM_TEMPLATES = 30  # Plantilles de 5 entrades de 4 sèries
+NUM_MESSAGES = 1000  # Missatges amb l'entrenador
+
+headers = new_user("reads")
+trainer_headers = new_user("reads_trainer")
+requests.post(f"{base_url}/auth/register/trainer", headers=trainer_headers).raise_for_status()
+user_uuid = requests.get(f"{base_url}/auth/profile", headers=headers).json()["uuid"]
+trainer_uuid = requests.get(f"{base_url}/auth/profile", headers=trainer_headers).json()["uuid"]
+requests.post(
+    f"{base_url}/user/trainer/request", headers=headers, params={"trainer_uuid": trainer_uuid}
+).raise_for_status()
+requests.post(
+    f"{base_url}/trainer/requests/{user_uuid}", headers=trainer_headers, params={"action": "accept"}
+).raise_for_status()
+
+exercises = [create_exercise(headers, f"Exercici {i}") for i in range(NUM_EXERCISES)]
+for i in range(NUM_TEMPLATES):
+    template = make_workout(exercises[i], 0)
+    template.pop("instance")
+    requests.post(f"{base_url}/user/templates", headers=headers, json=template).raise_for_status()
+
+# Els missatges de l'API tenen una marca de temps en segons, i se n'envia com a molt un per segon
+now_ms = int(time.time() * 1000)
+with Session(engine) as session:
+    for i in range(NUM_MESSAGES):
+        session.add(
+            MessageModel(
+                user_uuid=user_uuid,  # pyright: ignore[]
+                trainer_uuid=trainer_uuid,  # pyright: ignore[]
+                timestamp=now_ms + i,
+                content=f"Missatge de prova {i}",
+                is_sent_by_trainer=i % 2 == 0,
+            )
+        )
+    session.commit()
+
+
+# Camí anterior: models de l'ORM, validats i convertits amb el `response_model`
+def orm_exercises(session):
+    query = (
+        select(ExerciseModel)
+        .where(ExerciseModel.creator_uuid == user_uuid)
+        .where(ExerciseModel.is_disabled == False)
+    )
+    adapter = TypeAdapter(list[ExerciseModel])
+    rows = adapter.validate_python(session.exec(query).all(), from_attributes=True)
+    return JSONResponse(adapter.dump_python(rows, mode="json"))
+
+
+def orm_templates(session):
+    query = (
+        select(WorkoutContentModel)
+        .outerjoin(WorkoutInstanceModel)
+        .where(WorkoutInstanceModel.workout_uuid == None)
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .order_by(WorkoutContentModel.name)
+    )
+    adapter = TypeAdapter(list[WorkoutContentSchema])
+    rows = adapter.validate_python(session.exec(query).all(), from_attributes=True)
+    return JSONResponse(adapter.dump_python(rows, mode="json"))
+
+
+def orm_messages(session):
+    query = (
+        select(MessageModel)
+        .where(MessageModel.user_uuid == user_uuid)
+        .where(MessageModel.trainer_uuid == trainer_uuid)
+        .order_by(asc(MessageModel.timestamp))
+    )
+    adapter = TypeAdapter(list[MessageModel])
+    rows = adapter.validate_python(session.exec(query).all(), from_attributes=True)
+    return JSONResponse(adapter.dump_python(rows, mode="json"))
+
+
+# Camí actual: columnes i dataclasses serialitzades amb orjson
+def lean_exercises(session):
+    return json_response(read_exercises(session, user_uuid))  # pyright: ignore[]
+
+
+def lean_templates(session):
+    return json_response(read_templates(session, user_uuid))  # pyright: ignore[]
+
+
+def lean_messages(session):
+    return json_response(read_messages(session, user_uuid, trainer_uuid))  # pyright: ignore[]
+
+
+# Executa una lectura amb una sessió nova, com en una petició
+def in_process(read):
+    def run():
+        with Session(engine) as session:
+            read(session)
+
+    return run
+
+
+# Memòria màxima (en KB) reservada durant una lectura
+def peak_kb(read):
+    tracemalloc.start()
+    in_process(read)()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def get(url, request_headers):
+    def request():
+        requests.get(f"{base_url}{url}", headers=request_headers).raise_for_status()
+
+    return request
+
+
+endpoints = [
+    ("/user/exercises", headers, orm_exercises, lean_exercises),
+    ("/user/templates", headers, orm_templates, lean_templates),
+    ("/user/trainer/messages", headers, orm_messages, lean_messages),
+]
+
+print(
+    f"{'endpoint':<24} | {'API (ms)':>8} | {'ORM (ms)':>8} | {'lleuger (ms)':>12} | "
+    f"{'ORM (KB)':>8} | {'lleuger (KB)':>12}"
+)
+for url, request_headers, orm, lean in endpoints:
+    print(
+        f"{url:<24} | {measure(get(url, request_headers)):>8.2f} | "
+        f"{measure(in_process(orm)):>8.2f} | {measure(in_process(lean)):>12.2f} | "
+        f"{peak_kb(orm):>8.0f} | {peak_kb(lean):>12.0f}"
+    )
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+from common import make_workout, measure
+
+# Aquesta prova no fa peticions: serialitza una pàgina d'entrenaments dins del mateix procés,
+# amb els esquemes del servidor, per aïllar el cost de generar el cos de la resposta.
+# S'executa des del directori `server`: `python benchmarks/serialization.py`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from responses import FastJSONResponse  # noqa: E402
+from schemas.workout_schema import WorkoutContentSchema  # noqa: E402
+
+# Nombre d'entrenaments de la pàgina (5 entrades de 4 sèries cadascun)
+NUM_WORKOUTS = 100
+
+exercise = {
+    "uuid": "0b9e3b4c-3f0e-4d43-9a4f-6c1c6a4f2b10",
+    "name": "Press de banca",
+    "body_part": "chest",
+    "type": "barbell",
+}
+now_ms = int(time.time() * 1000)
+adapter = TypeAdapter(list[WorkoutContentSchema])
+workouts = adapter.validate_python(
+    [make_workout(exercise, now_ms - i * 24 * 3600 * 1000) for i in range(NUM_WORKOUTS)]
+)
+
+# Les rutes amb `response_model` validen el resultat i el converteixen a tipus de JSON
+# (UUID i enums com a text) abans de passar-lo a la classe de resposta
+content = adapter.dump_python(workouts, mode="json")
+
+
+def dump_content():
+    adapter.dump_python(workouts, mode="json")
+
+
+def json_response_model():
+    JSONResponse(content)
+
+
+def fast_response_model():
+    FastJSONResponse(content)
+
+
+# Les rutes sense `response_model` passen el resultat per `jsonable_encoder`;
+# FastJSONResponse pot serialitzar els models directament
+def json_models():
+    JSONResponse(jsonable_encoder(workouts))
+
+
+def fast_models():
+    FastJSONResponse(workouts)
+
+
+assert JSONResponse(content).body == FastJSONResponse(content).body
+assert JSONResponse(content).body == FastJSONResponse(workouts).body
+
+print(f"Pàgina de {NUM_WORKOUTS} entrenaments: {len(FastJSONResponse(content).body) / 1024:.0f} KB")
+print(f"Amb response_model, json: {measure(json_response_model):.2f} ms (mediana)")
+print(f"Amb response_model, orjson: {measure(fast_response_model):.2f} ms (mediana)")
+print(f"Conversió a tipus de JSON (dump_python): {measure(dump_content):.2f} ms (mediana)")
+print(f"Models sense response_model, jsonable_encoder + json: {measure(json_models):.2f} ms (mediana)")
+print(f"Models sense response_model, orjson: {measure(fast_models):.2f} ms (mediana)")
@@ -0,0 +1,38 @@
+import time
+
+import requests
+
+from common import base_url, create_exercise, make_workout, measure, new_user
+
+# Nombre d'entrenaments que s'afegeixen (5 entrades de 4 sèries cadascun)
+NUM_WORKOUTS = 500
+
+# Compara els dos modes d'emmagatzematge de les sèries (ULTRA_PACKED_SETS).
+# S'executa un cop contra un servidor amb cada mode, sobre una base de dades buida,
+# i la mida de les taules es consulta amb `python manage.py storage-stats`.
+headers = new_user("storage")
+exercise = create_exercise(headers)
+
+now_ms = int(time.time() * 1000)
+workouts = [
+    make_workout(exercise, now_ms - i * 24 * 3600 * 1000) for i in range(NUM_WORKOUTS)
+]
+
+# Velocitat d'inserció
+start = time.perf_counter()
+for workout in workouts:
+    response = requests.post(f"{base_url}/user/workouts", headers=headers, json=workout)
+    response.raise_for_status()
+insert_ms = (time.perf_counter() - start) * 1000 / NUM_WORKOUTS
+
+
+# Latència de lectura d'entrenaments complets
+def get_workouts():
+    response = requests.get(
+        f"{base_url}/user/workouts", headers=headers, params={"limit": 25}
+    )
+    response.raise_for_status()
+
+
+print(f"Inserció: {insert_ms:.2f} ms per entrenament ({NUM_WORKOUTS} entrenaments)")
+print(f"Lectura de 25 entrenaments: {measure(get_workouts):.2f} ms (mediana)")
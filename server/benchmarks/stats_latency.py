@@ -0,0 +1,24 @@
+import requests
+
+from common import add_workouts, base_url, create_exercise, measure, new_user
+
+# Mides de l'historial (nombre d'entrenaments) que es mesuren
+HISTORY_SIZES = [0, 100, 500, 1000, 2000]
+
+# Mesura la latència de GET /user/stats a mesura que creix l'historial de l'usuari.
+# Amb una única consulta agregada la latència s'ha de mantenir pràcticament constant.
+headers = new_user("stats")
+exercise = create_exercise(headers)
+
+
+def get_stats():
+    response = requests.get(f"{base_url}/user/stats", headers=headers)
+    response.raise_for_status()
+
+
+print(f"{'entrenaments':>12} | {'mediana (ms)':>12}")
+current_size = 0
+for size in HISTORY_SIZES:
+    add_workouts(headers, exercise, size - current_size, start_day=current_size)
+    current_size = size
+    print(f"{size:>12} | {measure(get_stats):>12.2f}")
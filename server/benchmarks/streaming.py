@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from common import add_workouts, base_url, create_exercise, new_user
+
+# Compara les respostes completes i les respostes en streaming de les llistes grans:
+# - Temps fins al primer byte i temps total de cada endpoint a través de l'API.
+# - Memòria màxima (tracemalloc) de generar cada resposta dins del mateix procés, amb la
+#   llista completa en memòria i amb la lectura per grups d'un cursor del servidor
+#   (vegeu `json_stream_response` i `read_models.py`), per a diferents mides de llista.
+# Necessita accés a la base de dades del servidor amb les mateixes variables d'entorn
+# (POSTGRES_URL, POSTGRES_USER, ...) i s'executa des del directori `server`.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from archive import restore_archived_workouts  # noqa: E402
+from db import engine  # noqa: E402
+from models.chat import MessageModel  # noqa: E402
+from models.workout import WorkoutContentModel, WorkoutInstanceModel  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from read_models import read_messages, stream_messages, stream_workouts  # noqa: E402
+from responses import json_response, stream_json_list  # noqa: E402
+from schemas.workout_schema import WorkoutContentSchema  # noqa: E402
+from sqlmodel import Session, desc, select  # noqa: E402
+
+NUM_WORKOUTS = 1000  # Entrenaments de l'usuari (5 entrades de 4 sèries cadascun)
+NUM_MESSAGES = 20000  # Missatges amb l'entrenador
+WORKOUT_LIMITS = [250, 500, 1000]
+MESSAGE_LIMITS = [5000, 10000, 20000]
+
+headers = new_user("streaming")
+trainer_headers = new_user("streaming_trainer")
+requests.post(f"{base_url}/auth/register/trainer", headers=trainer_headers).raise_for_status()
+user_uuid = requests.get(f"{base_url}/auth/profile", headers=headers).json()["uuid"]
+trainer_uuid = requests.get(f"{base_url}/auth/profile", headers=trainer_headers).json()["uuid"]
+requests.post(
+    f"{base_url}/user/trainer/request", headers=headers, params={"trainer_uuid": trainer_uuid}
+).raise_for_status()
+requests.post(
+    f"{base_url}/trainer/requests/{user_uuid}", headers=trainer_headers, params={"action": "accept"}
+).raise_for_status()
+
+add_workouts(headers, create_exercise(headers), NUM_WORKOUTS)
+
+# Els missatges de l'API tenen una marca de temps en segons, i se n'envia com a molt un per segon
+now_ms = int(time.time() * 1000)
+with Session(engine) as session:
+    for i in range(NUM_MESSAGES):
+        session.add(
+            MessageModel(
+                user_uuid=user_uuid,  # pyright: ignore[]
+                trainer_uuid=trainer_uuid,  # pyright: ignore[]
+                timestamp=now_ms + i,
+                content=f"Missatge de prova {i}",
+                is_sent_by_trainer=i % 2 == 0,
+            )
+        )
+    session.commit()
+
+
+def workouts_query(limit):
+    return (
+        select(WorkoutContentModel, WorkoutInstanceModel)
+        .join(WorkoutInstanceModel)
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .order_by(desc(WorkoutInstanceModel.timestamp_start))
+        .limit(limit)
+    )
+
+
+# Llista completa: com la ruta amb el `response_model`
+def full_workouts(limit):
+    adapter = TypeAdapter(list[WorkoutContentSchema])
+    with Session(engine) as session:
+        rows = session.exec(workouts_query(limit)).all()
+        workouts = restore_archived_workouts(session, [content for content, _ in rows])
+        return json_response(
+            adapter.dump_python(adapter.validate_python(workouts, from_attributes=True), mode="json")
+        ).body
+
+
+def streamed_workouts(limit):
+    return stream_json_list(stream_workouts(workouts_query(limit)))
+
+
+# Els missatges es limiten amb la mida de la llista per comparar diferents mides
+def full_messages(limit):
+    with Session(engine) as session:
+        return json_response(read_messages(session, user_uuid, trainer_uuid)[:limit]).body  # pyright: ignore[]
+
+
+def streamed_messages(limit):
+    def batches():
+        remaining = limit
+        for batch in stream_messages(user_uuid, trainer_uuid):  # pyright: ignore[]
+            yield batch[:remaining]
+            remaining -= len(batch)
+            if remaining <= 0:
+                return
+
+    return stream_json_list(batches())
+
+
+# Memòria màxima (en KB) reservada durant la generació d'una resposta.
+# Els fragments de les respostes en streaming es descarten a mesura que es generen, com
+# quan s'envien al client.
+def peak_kb(generate, limit):
+    tracemalloc.start()
+    body = generate(limit)
+    if not isinstance(body, bytes):
+        for _ in body:
+            pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+# Temps fins al primer byte i temps total (en ms) d'una petició a l'API
+def api_timings(url, request_headers, params=None):
+    start = time.perf_counter()
+    with requests.get(f"{base_url}{url}", headers=request_headers, params=params, stream=True) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=None)
+        next(chunks)
+        first_byte = time.perf_counter()
+        for _ in chunks:
+            pass
+    end = time.perf_counter()
+    return (first_byte - start) * 1000, (end - start) * 1000
+
+
+print(f"{'endpoint':<34} | {'primer byte (ms)':>16} | {'total (ms)':>10}")
+for url, request_headers, params in [
+    ("/user/workouts", headers, {"limit": NUM_WORKOUTS}),
+    ("/user/trainer/messages", headers, None),
+    (f"/trainer/users/{user_uuid}/messages", trainer_headers, None),
+]:
+    first_byte, total = api_timings(url, request_headers, params)
+    label = url if params is None else f"{url}?limit={params['limit']}"
+    print(f"{label[:34]:<34} | {first_byte:>16.1f} | {total:>10.1f}")
+
+print()
+print(f"{'llista':<10} | {'elements':>8} | {'completa (KB)':>13} | {'streaming (KB)':>14}")
+for name, limits, full, streamed in [
+    ("workouts", WORKOUT_LIMITS, full_workouts, streamed_workouts),
+    ("messages", MESSAGE_LIMITS, full_messages, streamed_messages),
+]:
+    for limit in limits:
+        assert full(limit) == b"".join(streamed(limit))
+        print(
+            f"{name:<10} | {limit:>8} | {peak_kb(full, limit):>13.0f} | {peak_kb(streamed, limit):>14.0f}"
+        )
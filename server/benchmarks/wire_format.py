@@ -0,0 +1,74 @@
+import msgpack
+import orjson
+import requests
+
+from common import add_workouts, base_url, create_exercise, make_workout, measure, new_user
+
+# Compara JSON i MessagePack a les rutes d'entrenaments, plantilles i sincronització
+# (vegeu `msgpack_middleware.py`):
+# - Mida de cada resposta en tots dos formats.
+# - Temps de codificar i descodificar cada resposta (orjson i msgpack), com ho faria el client.
+# - Latència de cada endpoint a través de l'API amb cada format.
+
+NUM_WORKOUTS = 100  # Entrenaments de l'usuari (5 entrades de 4 sèries cadascun)
+NUM_TEMPLATES = 20
+
+MSGPACK = "application/msgpack"
+
+headers = new_user("wire")
+exercise = create_exercise(headers)
+add_workouts(headers, exercise, NUM_WORKOUTS)
+for i in range(NUM_TEMPLATES):
+    template = make_workout(exercise, 0)
+    template.pop("instance")
+    requests.post(f"{base_url}/user/templates", headers=headers, json=template).raise_for_status()
+
+endpoints = [
+    ("/user/workouts", {"limit": NUM_WORKOUTS}),
+    ("/user/templates", None),
+    ("/user/sync", None),
+]
+
+
+def get(url, params, accept):
+    def request():
+        response = requests.get(
+            f"{base_url}{url}", headers=headers | {"Accept": accept}, params=params
+        )
+        response.raise_for_status()
+        return response
+
+    return request
+
+
+print(
+    f"{'endpoint':<16} | {'JSON (KB)':>9} | {'msgpack (KB)':>12} | {'codif. JSON':>11} | "
+    f"{'codif. msgpack':>14} | {'descodif. JSON':>14} | {'descodif. msgpack':>17} | "
+    f"{'API JSON':>8} | {'API msgpack':>11}"
+)
+for url, params in endpoints:
+    json_body = get(url, params, "application/json")().content
+    msgpack_body = get(url, params, MSGPACK)().content
+    content = orjson.loads(json_body)
+    assert msgpack.unpackb(msgpack_body) == content
+
+    def encode_json():
+        orjson.dumps(content)
+
+    def encode_msgpack():
+        msgpack.packb(content)
+
+    def decode_json():
+        orjson.loads(json_body)
+
+    def decode_msgpack():
+        msgpack.unpackb(msgpack_body)
+
+    print(
+        f"{url:<16} | {len(json_body) / 1024:>9.1f} | {len(msgpack_body) / 1024:>12.1f} | "
+        f"{measure(encode_json):>11.3f} | {measure(encode_msgpack):>14.3f} | "
+        f"{measure(decode_json):>14.3f} | {measure(decode_msgpack):>17.3f} | "
+        f"{measure(get(url, params, 'application/json')):>8.2f} | "
+        f"{measure(get(url, params, MSGPACK)):>11.2f}"
+    )
+print("Temps en ms (mediana).")
@@ -0,0 +1,250 @@
+from uuid import UUID
+
+from db import engine
+from models.chat import MessageModel
+from models.exercise import ExerciseModel
+from models.record import PersonalRecordModel
+from models.stats import WorkoutDailyStatsModel
+from models.sync import DeletedEntityModel, UserChangeVersionModel
+from models.trainer import (
+    TrainerRecommendationModel,
+    TrainerRequestModel,
+    UserInterestLinkModel,
+)
+from models.users import (
+    AccountDeletionModel,
+    AdminModel,
+    TrainerModel,
+    UserConfig,
+    UserModel,
+)
+from models.workout import LatestWorkoutEntryModel, WorkoutContentModel
+from schemas.types.enums import AccountDeletionStatus
+from sqlalchemy import delete, update
+from sqlmodel import Session, func, select
+
+# Nombre d'entrenaments que s'eliminen en cada transacció.
+# Els comptes amb més entrenaments s'eliminen en segon pla.
+DELETION_CHUNK_SIZE = 500
+
+
+def start_account_deletion(
+    session: Session, user: UserModel, user_settings: UserConfig
+) -> AccountDeletionModel:
+    """
+    Desactiva un compte i registra la seva eliminació. A partir d'aquest moment l'usuari
+    ja no pot iniciar sessió ni utilitzar l'API, encara que les dades s'eliminin més tard
+    amb `run_account_deletion`. Els canvis es confirmen dins la funció.
+
+    Args:
+        session: La sessió de base de dades.
+        user: L'usuari a eliminar.
+        user_settings: La configuració de l'usuari.
+
+    Returns:
+        El registre de l'eliminació, pendent d'executar.
+    """
+    # Desvincula els usuaris associats (si l'usuari és un entrenador)
+    session.exec(
+        update(UserModel)  # pyright: ignore[]
+        .where(UserModel.trainer_uuid == user.uuid)  # pyright: ignore[]
+        .values(trainer_uuid=None)
+    )
+
+    user_settings.is_disabled = True  # Desactiva el compte immediatament
+    session.add(user_settings)
+
+    deletion = AccountDeletionModel(
+        user_uuid=user.uuid,
+        total_workouts=session.exec(
+            select(func.count())
+            .select_from(WorkoutContentModel)
+            .where(WorkoutContentModel.creator_uuid == user.uuid)
+        ).one(),
+    )
+    session.add(deletion)
+    session.commit()
+    session.refresh(deletion)
+    return deletion
+
+
+def delete_workout_references(session: Session, user_uuid: UUID):
+    """
+    Elimina les files que fan referència als entrenaments de l'usuari, perquè després
+    es puguin eliminar els entrenaments: rècords personals, punters a l'última entrada
+    de cada exercici i recomanacions on l'usuari és l'usuari o l'entrenador.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+    """
+    session.exec(delete(PersonalRecordModel).where(PersonalRecordModel.user_uuid == user_uuid))  # pyright: ignore[]
+    session.exec(delete(LatestWorkoutEntryModel).where(LatestWorkoutEntryModel.user_uuid == user_uuid))  # pyright: ignore[]
+    session.exec(
+        delete(TrainerRecommendationModel).where(  # pyright: ignore[]
+            (TrainerRecommendationModel.user_uuid == user_uuid)
+            | (TrainerRecommendationModel.trainer_uuid == user_uuid)
+        )
+    )
+
+
+def delete_workouts_chunk(session: Session, user_uuid: UUID, limit: int) -> int:
+    """
+    Elimina un grup d'entrenaments i plantilles de l'usuari amb una única sentència.
+    La base de dades elimina en cascada les instàncies, entrades i sèries (ON DELETE CASCADE).
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        limit: El nombre màxim d'entrenaments a eliminar.
+
+    Returns:
+        El nombre d'entrenaments eliminats. Si és menor que `limit`, ja no en queden.
+    """
+    chunk = (
+        select(WorkoutContentModel.uuid)
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .limit(limit)
+    )
+    result = session.exec(
+        delete(WorkoutContentModel).where(WorkoutContentModel.uuid.in_(chunk))  # pyright: ignore[]
+    )
+    return result.rowcount
+
+
+def delete_account_rows(session: Session, user_uuid: UUID):
+    """
+    Elimina la resta de dades de l'usuari i el mateix usuari, un cop eliminats els
+    seus entrenaments. Cada taula s'elimina amb una única sentència, en l'ordre que
+    imposen les claus foranes.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+    """
+    statements = [
+        delete(ExerciseModel).where(ExerciseModel.creator_uuid == user_uuid),  # pyright: ignore[]
+        delete(MessageModel).where(  # pyright: ignore[]
+            (MessageModel.user_uuid == user_uuid) | (MessageModel.trainer_uuid == user_uuid)
+        ),
+        delete(TrainerRequestModel).where(  # pyright: ignore[]
+            (TrainerRequestModel.user_uuid == user_uuid)
+            | (TrainerRequestModel.trainer_uuid == user_uuid)
+        ),
+        delete(UserInterestLinkModel).where(UserInterestLinkModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(DeletedEntityModel).where(DeletedEntityModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(UserChangeVersionModel).where(UserChangeVersionModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(WorkoutDailyStatsModel).where(WorkoutDailyStatsModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(TrainerModel).where(TrainerModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(AdminModel).where(AdminModel.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(UserConfig).where(UserConfig.user_uuid == user_uuid),  # pyright: ignore[]
+        delete(UserModel).where(UserModel.uuid == user_uuid),  # pyright: ignore[]
+    ]
+    for statement in statements:
+        session.exec(statement)  # pyright: ignore[]
+
+
+def _resumable_statuses(include_running: bool) -> list[AccountDeletionStatus]:
+    """
+    Obté els estats de les eliminacions que es poden començar o reprendre.
+    """
+    statuses = [AccountDeletionStatus.PENDING, AccountDeletionStatus.FAILED]
+    if include_running:
+        statuses.append(AccountDeletionStatus.RUNNING)
+    return statuses
+
+
+def run_account_deletion(deletion_uuid: UUID, include_running: bool = False) -> bool:
+    """
+    Executa (o reprèn) l'eliminació d'un compte. Els entrenaments s'eliminen per grups de
+    `DELETION_CHUNK_SIZE`, cadascun en la seva pròpia transacció, i el progrés es desa
+    després de cada grup. S'executa en segon pla amb una sessió pròpia.
+    Abans de començar, l'eliminació es reclama canviant-ne l'estat a RUNNING amb una
+    actualització condicional, de manera que dos processos no poden eliminar el mateix compte alhora.
+
+    Args:
+        deletion_uuid: L'UUID del registre de l'eliminació.
+        include_running: Si també es reclamen les eliminacions en estat RUNNING, per exemple
+            les que s'han quedat a mitges perquè el servidor es va aturar.
+
+    Returns:
+        True si s'ha executat l'eliminació, False si ja estava completada o l'executa un altre procés.
+
+    Raises:
+        Exception: Qualsevol error durant l'eliminació, després de marcar-la com a FAILED.
+    """
+    with Session(engine) as session:
+        claimed = session.exec(
+            update(AccountDeletionModel)  # pyright: ignore[]
+            .where(
+                AccountDeletionModel.uuid == deletion_uuid,  # pyright: ignore[]
+                AccountDeletionModel.status.in_(_resumable_statuses(include_running)),  # pyright: ignore[]
+            )
+            .values(status=AccountDeletionStatus.RUNNING)
+        ).rowcount
+        session.commit()
+        if not claimed:  # Ja s'ha completat o l'està executant un altre procés
+            return False
+        deletion = session.exec(
+            select(AccountDeletionModel).where(AccountDeletionModel.uuid == deletion_uuid)
+        ).one()
+
+        try:
+            delete_workout_references(session, deletion.user_uuid)
+            session.commit()
+
+            while True:
+                deleted = delete_workouts_chunk(
+                    session, deletion.user_uuid, DELETION_CHUNK_SIZE
+                )
+                deletion.deleted_workouts += deleted
+                session.add(deletion)
+                session.commit()  # Confirma el grup i el progrés
+                if deleted < DELETION_CHUNK_SIZE:
+                    break
+
+            delete_account_rows(session, deletion.user_uuid)
+            deletion.status = AccountDeletionStatus.COMPLETED
+            session.add(deletion)
+            session.commit()
+        except Exception:
+            # Desa l'error perquè el client el vegi; l'eliminació es pot reprendre
+            session.rollback()
+            deletion.status = AccountDeletionStatus.FAILED
+            session.add(deletion)
+            session.commit()
+            raise
+    return True
+
+
+def resume_account_deletions(
+    include_running: bool = False,
+) -> tuple[int, list[tuple[UUID, Exception]]]:
+    """
+    Reprèn les eliminacions de comptes que no s'han completat, per exemple perquè
+    van fallar. Un error en una eliminació no atura les altres.
+    Les eliminacions en estat RUNNING només es reprenen amb `include_running`, perquè
+    les pot estar executant el servidor en segon pla.
+
+    Args:
+        include_running: Si també es reprenen les eliminacions en estat RUNNING.
+
+    Returns:
+        El nombre d'eliminacions completades i, per a cada eliminació que ha fallat,
+        el seu UUID i l'error.
+    """
+    with Session(engine) as session:
+        pending = session.exec(
+            select(AccountDeletionModel.uuid).where(
+                AccountDeletionModel.status.in_(_resumable_statuses(include_running))  # pyright: ignore[]
+            )
+        ).all()
+
+    completed, failures = 0, []
+    for deletion_uuid in pending:
+        try:
+            if run_account_deletion(deletion_uuid, include_running):
+                completed += 1
+        except Exception as e:
+            failures.append((deletion_uuid, e))
+    return completed, failures
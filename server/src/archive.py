@@ -0,0 +1,342 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+from db import engine
+from models.exercise import ExerciseModel
+from models.workout import (
+    ArchivedWorkoutExerciseModel,
+    ArchivedWorkoutModel,
+    LatestWorkoutEntryModel,
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+)
+from schemas.types.enums import SetType, WeightUnit
+from schemas.workout_schema import WorkoutSetSchema
+from sqlalchemy import delete, exists, insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from units import to_kg
+
+# Els entrenaments més antics que `ULTRA_ARCHIVE_AFTER_DAYS` es poden arxivar: les seves
+# entrades i sèries es desen en una sola fila comprimida de 'archived_workout' i s'eliminen
+# de 'workout_entry' i 'workout_set'. Així les taules i els índexs que s'utilitzen cada dia
+# només contenen l'historial recent.
+# - El contingut i la instància de l'entrenament no es mouen: les llistes, la sincronització,
+#   els rècords i les recomanacions hi continuen fent referència.
+# - No s'arxiven els entrenaments que són l'última entrada d'algun exercici, perquè
+#   `latest_workout_entry` apunta a les seves entrades.
+# - Els exercicis de les entrades arxivades es desen a 'archived_workout_exercise', amb claus
+#   foranes, perquè no es puguin eliminar mentre un entrenament arxivat els utilitzi.
+# - Les lectures són transparents: `restore_archived_workouts` per als entrenaments complets,
+#   `get_exercise_history` per a l'historial i `all_sets` per a les agregacions.
+
+# Nombre d'entrenaments que s'arxiven en cada transacció.
+ARCHIVE_CHUNK_SIZE = 500
+
+
+def archived_entry(entry: WorkoutEntryModel) -> dict:
+    """
+    Converteix una entrada (amb les sèries en files o empaquetades) al format de l'arxiu.
+
+    Args:
+        entry: L'entrada a arxivar, amb les seves sèries carregades.
+
+    Returns:
+        Un diccionari serialitzable a JSON amb l'entrada i les seves sèries.
+    """
+    if entry.packed_reps is not None:
+        sets = zip(entry.packed_reps, entry.packed_weights, entry.packed_set_types)  # pyright: ignore[]
+    else:
+        sets = (
+            (workout_set.reps, workout_set.weight, workout_set.set_type.value)
+            for workout_set in entry.sets
+        )
+
+    return {
+        "exercise_uuid": str(entry.exercise_uuid),
+        "weight_unit": entry.weight_unit.value if entry.weight_unit else None,
+        "rest_countdown_duration": entry.rest_countdown_duration,
+        "sets": [
+            {
+                "reps": reps,
+                "weight": weight,
+                "weight_kg": to_kg(weight, entry.weight_unit),
+                "set_type": set_type,
+            }
+            for reps, weight, set_type in sets
+        ],
+    }
+
+
+def archive_workouts_chunk(session: Session, before: int, limit: int) -> int:
+    """
+    Arxiva un grup d'entrenaments que van començar abans de `before`.
+
+    Args:
+        session: La sessió de base de dades.
+        before: La marca de temps Unix (en mil·lisegons) límit.
+        limit: El nombre màxim d'entrenaments a arxivar.
+
+    Returns:
+        El nombre d'entrenaments arxivats. Si és menor que `limit`, ja no en queden.
+    """
+    workout_uuids = session.exec(
+        select(WorkoutInstanceModel.workout_uuid)
+        .where(WorkoutInstanceModel.timestamp_start < before)
+        # Encara té entrades (no s'ha arxivat ni és buit)
+        .where(exists().where(WorkoutEntryModel.workout_uuid == WorkoutInstanceModel.workout_uuid))
+        # No és l'última entrada de cap exercici
+        .where(
+            ~exists().where(
+                LatestWorkoutEntryModel.workout_uuid == WorkoutInstanceModel.workout_uuid
+            )
+        )
+        .limit(limit)
+    ).all()
+    if not workout_uuids:
+        return 0
+
+    entries = session.exec(
+        select(WorkoutEntryModel)
+        .where(WorkoutEntryModel.workout_uuid.in_(workout_uuids))  # pyright: ignore[]
+        .options(selectinload(WorkoutEntryModel.sets))  # pyright: ignore[]
+        .order_by(WorkoutEntryModel.workout_uuid, WorkoutEntryModel.index)
+    ).all()
+    archived: dict[UUID, list[dict]] = {}
+    for entry in entries:
+        archived.setdefault(entry.workout_uuid, []).append(archived_entry(entry))
+
+    session.exec(
+        insert(ArchivedWorkoutModel).values(  # pyright: ignore[]
+            [
+                {"workout_uuid": workout_uuid, "entries": workout_entries}
+                for workout_uuid, workout_entries in archived.items()
+            ]
+        )
+    )
+    # Referències als exercicis de les entrades arxivades, perquè no es puguin eliminar
+    session.exec(
+        insert(ArchivedWorkoutExerciseModel).values(  # pyright: ignore[]
+            [
+                {"workout_uuid": workout_uuid, "exercise_uuid": exercise_uuid}
+                for workout_uuid, exercise_uuid in {
+                    (entry.workout_uuid, entry.exercise_uuid) for entry in entries
+                }
+            ]
+        )
+    )
+    # La base de dades elimina en cascada les sèries en files (ON DELETE CASCADE)
+    session.exec(
+        delete(WorkoutEntryModel)  # pyright: ignore[]
+        .where(WorkoutEntryModel.workout_uuid.in_(workout_uuids))  # pyright: ignore[]
+        .execution_options(synchronize_session=False)
+    )
+    return len(workout_uuids)
+
+
+def archive_old_workouts(max_age_days: int) -> int:
+    """
+    Arxiva tots els entrenaments que van començar fa més de `max_age_days` dies.
+    Els entrenaments s'arxiven per grups de `ARCHIVE_CHUNK_SIZE`, cadascun en la seva
+    pròpia transacció, de manera que es pot executar periòdicament en segon pla sense
+    bloquejar les taules. Utilitza una sessió pròpia.
+
+    Args:
+        max_age_days: L'antiguitat mínima (en dies) dels entrenaments a arxivar.
+
+    Returns:
+        El nombre d'entrenaments arxivats.
+    """
+    before = int(
+        (datetime.now(timezone.utc) - timedelta(days=max_age_days)).timestamp() * 1000
+    )
+    total = 0
+    with Session(engine) as session:
+        while True:
+            archived = archive_workouts_chunk(session, before, ARCHIVE_CHUNK_SIZE)
+            session.commit()  # Confirma el grup
+            session.expunge_all()  # Allibera les entrades carregades del grup
+            total += archived
+            if archived < ARCHIVE_CHUNK_SIZE:
+                return total
+
+
+def restored_sets(entry: dict) -> list[WorkoutSetSchema]:
+    """
+    Reconstrueix les sèries d'una entrada arxivada.
+
+    Args:
+        entry: L'entrada desada a l'arxiu.
+
+    Returns:
+        Les sèries de l'entrada, en ordre.
+    """
+    return [
+        WorkoutSetSchema(
+            reps=workout_set["reps"],
+            weight=workout_set["weight"],
+            set_type=SetType(workout_set["set_type"]),
+        )
+        for workout_set in entry["sets"]
+    ]
+
+
+def restored_entries(entries: list[dict], exercises: dict[UUID, ExerciseModel]) -> list:
+    """
+    Reconstrueix les entrades d'un entrenament arxivat perquè es puguin validar
+    amb `WorkoutEntrySchema` igual que les desades a les taules.
+
+    Les entrades d'exercicis que ja no existeixen s'ometen.
+
+    Args:
+        entries: Les entrades desades a l'arxiu.
+        exercises: Els exercicis de les entrades, per UUID.
+
+    Returns:
+        Una llista d'objectes amb els mateixos atributs que una WorkoutEntryModel.
+    """
+    return [
+        SimpleNamespace(
+            exercise=exercises[UUID(entry["exercise_uuid"])],
+            weight_unit=WeightUnit(entry["weight_unit"]) if entry["weight_unit"] else None,
+            rest_countdown_duration=entry["rest_countdown_duration"],
+            sets=restored_sets(entry),
+        )
+        for entry in entries
+        # Els entrenaments arxivats abans de 'archived_workout_exercise' poden fer referència
+        # a exercicis ja eliminats. Aquestes entrades s'ometen, com a `database_json.py`.
+        if UUID(entry["exercise_uuid"]) in exercises
+    ]
+
+
+def restore_archived_workouts(session: Session, workouts: list) -> list:
+    """
+    Substitueix els entrenaments arxivats d'una llista per objectes amb les entrades
+    i sèries de l'arxiu, perquè es validin amb `WorkoutContentSchema` com els altres.
+    Utilitza una consulta per als arxius i una per als exercicis, sigui quina sigui
+    la mida de la llista.
+
+    Args:
+        session: La sessió de base de dades.
+        workouts: Els entrenaments (WorkoutContentModel) a retornar.
+
+    Returns:
+        La mateixa llista, amb els entrenaments arxivats substituïts.
+    """
+    if not workouts:
+        return workouts
+
+    archives = {
+        archive.workout_uuid: archive.entries
+        for archive in session.exec(
+            select(ArchivedWorkoutModel).where(
+                ArchivedWorkoutModel.workout_uuid.in_([workout.uuid for workout in workouts])  # pyright: ignore[]
+            )
+        )
+    }
+    if not archives:
+        return workouts
+
+    exercise_uuids = {
+        UUID(entry["exercise_uuid"]) for entries in archives.values() for entry in entries
+    }
+    exercises = {
+        exercise.uuid: exercise
+        for exercise in session.exec(
+            select(ExerciseModel).where(ExerciseModel.uuid.in_(exercise_uuids))  # pyright: ignore[]
+        )
+    }
+
+    return [
+        SimpleNamespace(
+            uuid=workout.uuid,
+            name=workout.name,
+            description=workout.description,
+            instance=workout.instance,
+            entries=restored_entries(archives[workout.uuid], exercises),
+        )
+        if workout.uuid in archives
+        else workout
+        for workout in workouts
+    ]
+
+
+def get_archived_history(
+    session: Session,
+    user_uuid: UUID,
+    exercise_uuid: UUID,
+    before: tuple[int, UUID, int] | None,
+    limit: int,
+) -> list[SimpleNamespace]:
+    """
+    Obté les entrades arxivades d'un exercici d'un usuari, de la més recent a la més antiga,
+    amb la mateixa clau que `get_exercise_history` (inici, UUID de l'entrenament i índex).
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        exercise_uuid: L'UUID de l'exercici.
+        before: La clau a partir de la qual comença la pàgina, o None per a la primera.
+        limit: El nombre màxim d'entrades a retornar.
+
+    Returns:
+        Una llista d'objectes amb els atributs que valida `ExerciseHistoryEntrySchema`.
+    """
+    query = (
+        select(
+            ArchivedWorkoutModel.workout_uuid,
+            ArchivedWorkoutModel.entries,
+            WorkoutInstanceModel.timestamp_start,
+        )
+        .join(
+            WorkoutContentModel,
+            ArchivedWorkoutModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+        .join(
+            WorkoutInstanceModel,
+            ArchivedWorkoutModel.workout_uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
+        )
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .where(
+            ArchivedWorkoutModel.entries.contains(  # pyright: ignore[]
+                [{"exercise_uuid": str(exercise_uuid)}]
+            )
+        )
+        .order_by(
+            WorkoutInstanceModel.timestamp_start.desc(),  # pyright: ignore[]
+            ArchivedWorkoutModel.workout_uuid.desc(),  # pyright: ignore[]
+        )
+        # Cada entrenament té com a mínim una entrada de l'exercici, llevat del del cursor,
+        # que pot no aportar-ne cap
+        .limit(limit + 1)
+    )
+    if before is not None:
+        # L'entrenament del cursor pot tenir més entrades de l'exercici, amb índex menor
+        query = query.where(
+            (WorkoutInstanceModel.timestamp_start < before[0])
+            | (
+                (WorkoutInstanceModel.timestamp_start == before[0])
+                & (ArchivedWorkoutModel.workout_uuid <= before[1])
+            )
+        )
+
+    history = []
+    for workout_uuid, entries, timestamp_start in session.exec(query):
+        for index in reversed(range(len(entries))):
+            entry = entries[index]
+            if entry["exercise_uuid"] != str(exercise_uuid):
+                continue
+            if before is not None and (timestamp_start, workout_uuid, index) >= before:
+                continue
+            history.append(
+                SimpleNamespace(
+                    workout_uuid=workout_uuid,
+                    index=index,
+                    timestamp_start=timestamp_start,
+                    weight_unit=WeightUnit(entry["weight_unit"]) if entry["weight_unit"] else None,
+                    sets=restored_sets(entry),
+                )
+            )
+    return history[:limit]
@@ -0,0 +1,160 @@
+from models.workout import WorkoutEntryModel, WorkoutInstanceModel, WorkoutSetModel
+from sqlalchemy import text, update
+from sqlmodel import Session
+from units import kg_expression
+
+
+def backfill_entry_timestamps(session: Session) -> int:
+    """
+    Copia l'inici de l'entrenament a les entrades registrades abans que existís
+    la columna `workout_entry.timestamp_start`.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        El nombre d'entrades actualitzades.
+    """
+    result = session.exec(
+        update(WorkoutEntryModel)  # pyright: ignore[]
+        .where(WorkoutEntryModel.workout_uuid == WorkoutInstanceModel.workout_uuid)
+        .where(WorkoutEntryModel.timestamp_start == None)
+        .values(timestamp_start=WorkoutInstanceModel.timestamp_start)
+    )
+    return result.rowcount
+
+
+def backfill_set_weights(session: Session) -> int:
+    """
+    Omple el pes en quilograms (`workout_set.weight_kg`) de les sèries registrades abans
+    que existís la columna, a partir del pes i la unitat de la seva entrada.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        El nombre de sèries actualitzades.
+    """
+    result = session.exec(
+        update(WorkoutSetModel)  # pyright: ignore[]
+        .where(WorkoutSetModel.workout_uuid == WorkoutEntryModel.workout_uuid)
+        .where(WorkoutSetModel.entry_index == WorkoutEntryModel.index)
+        .where(WorkoutSetModel.weight != None)
+        .where(WorkoutSetModel.weight_kg == None)
+        .values(
+            weight_kg=kg_expression(WorkoutSetModel.weight, WorkoutEntryModel.weight_unit)
+        )
+    )
+    return result.rowcount
+
+
+def backfill_set_timestamps(session: Session) -> int:
+    """
+    Copia l'inici de l'entrenament (`workout_set.timestamp_start`) a les sèries registrades
+    abans que existís la columna, a partir de la seva entrada.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        El nombre de sèries actualitzades.
+    """
+    result = session.exec(
+        update(WorkoutSetModel)  # pyright: ignore[]
+        .where(WorkoutSetModel.workout_uuid == WorkoutEntryModel.workout_uuid)
+        .where(WorkoutSetModel.entry_index == WorkoutEntryModel.index)
+        .where(WorkoutSetModel.timestamp_start == None)
+        .where(WorkoutEntryModel.timestamp_start != None)
+        .values(timestamp_start=WorkoutEntryModel.timestamp_start)
+    )
+    return result.rowcount
+
+
+def backfill_workout_counts(session: Session) -> int:
+    """
+    Omple el nombre d'entrades i de sèries (`workout_content.entry_count` i `set_count`)
+    dels entrenaments i plantilles creats abans que existissin les columnes. Compta les
+    sèries en files, les empaquetades i les dels entrenaments arxivats.
+    Els entrenaments actualitzats reben una versió de canvi nova, perquè els clients que tenen
+    el resum a la memòria cau (`view=summary`) el tornin a llegir. Com a qualsevol altra
+    escriptura, primer es bloqueja la versió de cada usuari afectat (vegeu versioning.py).
+    Només modifica els entrenaments sense recompte, de manera que es pot executar a cada inici.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        El nombre d'entrenaments i plantilles actualitzats.
+    """
+    session.connection().execute(
+        text(
+            """
+            INSERT INTO user_change_version (user_uuid, version)
+            SELECT creator_uuid, nextval('change_version_seq') FROM (
+                SELECT DISTINCT creator_uuid FROM workout_content
+                WHERE entry_count IS NULL OR set_count IS NULL
+            ) AS users
+            ON CONFLICT (user_uuid) DO UPDATE SET version = EXCLUDED.version
+            """
+        )
+    )
+    result = session.connection().execute(
+        text(
+            """
+            UPDATE workout_content c SET
+                entry_count = (SELECT count(*) FROM workout_entry e WHERE e.workout_uuid = c.uuid)
+                    + coalesce((
+                        SELECT jsonb_array_length(a.entries) FROM archived_workout a
+                        WHERE a.workout_uuid = c.uuid
+                    ), 0),
+                set_count = (
+                    SELECT coalesce(sum(cardinality(e.packed_reps)), 0) FROM workout_entry e
+                    WHERE e.workout_uuid = c.uuid
+                )
+                    + (SELECT count(*) FROM workout_set s WHERE s.workout_uuid = c.uuid)
+                    + coalesce((
+                        SELECT sum(jsonb_array_length(entry->'sets'))
+                        FROM archived_workout a, jsonb_array_elements(a.entries) AS entry
+                        WHERE a.workout_uuid = c.uuid
+                    ), 0),
+                version = (SELECT v.version FROM user_change_version v WHERE v.user_uuid = c.creator_uuid)
+            WHERE c.entry_count IS NULL OR c.set_count IS NULL
+            """
+        )
+    )
+    return result.rowcount
+
+
+def backfill_archived_exercises(session: Session) -> int:
+    """
+    Omple `archived_workout_exercise` amb els exercicis dels entrenaments arxivats abans
+    que existís la taula. Només es tenen en compte els arxius que encara no hi tenen cap
+    fila i s'ometen els exercicis que ja s'han eliminat.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        El nombre de referències afegides.
+    """
+    result = session.connection().execute(
+        text(
+            """
+            INSERT INTO archived_workout_exercise (workout_uuid, exercise_uuid)
+            SELECT DISTINCT a.workout_uuid, x.uuid
+            FROM archived_workout a
+            CROSS JOIN jsonb_array_elements(a.entries) AS ae(value)
+            JOIN exercise x ON x.uuid = (ae.value->>'exercise_uuid')::uuid
+            WHERE NOT EXISTS (
+                SELECT 1 FROM archived_workout_exercise w WHERE w.workout_uuid = a.workout_uuid
+            )
+            ON CONFLICT DO NOTHING
+            """
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,186 @@
+import zlib
+
+import anyio
+import brotli
+import zstandard
+from responses import quality_values
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Compressió de les respostes segons la capçalera `Accept-Encoding` (zstd, brotli o gzip).
+# Els nivells s'han triat amb `benchmarks/compression.py` sobre pàgines reals de /user/workouts
+# i llistes de missatges: són els que donen la millor relació entre mida i temps de compressió.
+# Els nivells més alts gairebé no redueixen la mida i multipliquen el temps.
+# Les respostes en streaming es comprimeixen fragment a fragment, i cada fragment s'envia
+# en acabar-lo de comprimir, de manera que el client continua rebent les dades a mesura que es llegeixen.
+
+# Algorismes suportats, en ordre de preferència del servidor quan el client n'accepta més d'un.
+ENCODINGS = ("zstd", "br", "gzip")
+ZSTD_LEVEL = 1
+BROTLI_QUALITY = 4
+GZIP_LEVEL = 6
+
+# Mida mínima (en bytes) de les respostes que es comprimeixen. Les respostes més petites
+# caben en un sol paquet i la compressió no redueix el temps de transferència.
+MIN_SIZE = 1024
+
+# Mida a partir de la qual (en bytes) es comprimeix en un fil separat, per no bloquejar el bucle
+# d'esdeveniments. Per sota, comprimir costa menys que canviar de fil.
+THREAD_MIN_SIZE = 64 * 1024
+
+# Tipus de contingut que es comprimeixen (a més de `text/*`).
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/x-ndjson",
+}
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    """
+    Tria l'algorisme de compressió segons la capçalera `Accept-Encoding` de la petició.
+
+    Args:
+        accept_encoding: El valor de la capçalera `Accept-Encoding`.
+
+    Returns:
+        L'algorisme amb més preferència (`q`) del client, o None si no n'accepta cap.
+    """
+    qualities = quality_values(accept_encoding)
+    best_encoding, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def _is_compressible(headers: MutableHeaders) -> bool:
+    """
+    Comprova si una resposta es pot comprimir pel seu tipus de contingut.
+    """
+    if "content-encoding" in headers:  # Ja està comprimida
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type in COMPRESSIBLE_TYPES or media_type.startswith("text/")
+
+
+class _Compressor:
+    """
+    Compressor d'un cos de resposta, complet o fragment a fragment.
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        elif encoding == "br":
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:  # gzip
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """
+        Comprimeix un fragment i retorna tot el que ja es pot enviar.
+
+        Args:
+            data: El fragment del cos.
+            finish: Si és l'últim fragment del cos.
+
+        Returns:
+            Les dades comprimides del fragment.
+        """
+        if self.encoding == "zstd":
+            flush_mode = (
+                zstandard.COMPRESSOBJ_FLUSH_FINISH if finish else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+            return self.compressor.compress(data) + self.compressor.flush(flush_mode)
+        if self.encoding == "br":
+            compressed = self.compressor.process(data)
+            return compressed + (self.compressor.finish() if finish else self.compressor.flush())
+        return self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH
+        )
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprimeix les respostes amb l'algorisme que accepta el client.
+    Només comprimeix els tipus de contingut de `COMPRESSIBLE_TYPES` i les respostes
+    completes d'almenys `MIN_SIZE` bytes, o en streaming. Afegeix `Vary: Accept-Encoding`
+    i converteix l'ETag en feble, perquè el cos comprimit no és idèntic byte a byte
+    (les comparacions d'`If-None-Match` ja són febles, vegeu `etag.py`).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _CompressionResponder(send, encoding))
+
+
+class _CompressionResponder:
+    """
+    Funció `send` d'una resposta que decideix si es comprimeix en rebre el primer fragment del cos.
+    """
+
+    def __init__(self, send: Send, encoding: str | None) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.start: Message | None = None  # Inici de la resposta, fins que arriba el primer fragment
+        self.compressor: _Compressor | None = None  # Compressor de les respostes en streaming
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:  # Primer fragment del cos
+            start, self.start = self.start, None
+            headers = MutableHeaders(scope=start)
+            compressible = _is_compressible(headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or self.encoding is None or (not more_body and len(body) < MIN_SIZE):
+                await self.send(start)
+                await self.send(message)
+                return
+
+            headers["content-encoding"] = self.encoding
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                headers["etag"] = "W/" + headers["etag"]
+            if "content-length" in headers:
+                del headers["content-length"]
+            self.compressor = _Compressor(self.encoding)
+            if not more_body:  # Resposta completa
+                body = await self._compress(body, finish=True)
+                headers["content-length"] = str(len(body))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await self.send(start)
+
+        if self.compressor is None:  # Resposta que no es comprimeix
+            await self.send(message)
+            return
+        body = await self._compress(body, finish=not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _compress(self, data: bytes, finish: bool) -> bytes:
+        """
+        Comprimeix un fragment, en un fil separat si és gran.
+        """
+        if len(data) >= THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, data, finish)  # pyright: ignore[]
+        return self.compressor.compress(data, finish)  # pyright: ignore[]
@@ -20,3 +20,12 @@ SERVER_NAME = config(
 OAUTH2_SECRET_KEY = config(
     "OAUTH2_SECRET_KEY", default="jordiplanellesperez1234", cast=str
 )  # Clau per encriptar els tokens JWT
+PACKED_SETS = config(
+    "ULTRA_PACKED_SETS", default=False, cast=bool
+)  # Desa les sèries de cada entrada en arrays en lloc d'una fila per sèrie (vegeu set_storage.py)
+ARCHIVE_AFTER_DAYS = config(
+    "ULTRA_ARCHIVE_AFTER_DAYS", default=365, cast=int
+)  # Antiguitat (en dies) a partir de la qual es poden arxivar els entrenaments (vegeu archive.py)
+DATABASE_JSON = config(
+    "ULTRA_DATABASE_JSON", default=False, cast=bool
+)  # PostgreSQL genera el JSON de /user/workouts i /user/templates (vegeu database_json.py)
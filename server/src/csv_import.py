@@ -0,0 +1,340 @@
+import csv
+import re
+from datetime import datetime
+from typing import Iterable
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo
+
+from config import PACKED_SETS
+from daily_stats import rebuild_daily_stats
+from latest_entries import rebuild_latest_entries
+from models.exercise import DefaultExerciseModel, ExerciseModel
+from models.workout import WorkoutContentModel, WorkoutInstanceModel
+from records import rebuild_personal_records
+from schemas.types.enums import BodyPart, ExerciseType, SetType, WeightUnit
+from sqlmodel import Session, select
+from units import to_kg
+from versioning import next_change_version
+
+# Nombre aproximat de sèries que s'acumulen en memòria abans d'escriure-les amb COPY.
+# Els entrenaments no es parteixen: cada grup acaba amb un entrenament sencer.
+IMPORT_BATCH_SIZE = 10000
+
+# Noms de columna acceptats per a cada camp (en minúscules). A més dels propis, inclou
+# els de les exportacions habituals d'altres aplicacions (Strong, Hevy).
+COLUMN_ALIASES = {
+    "date": ("date", "start_time", "timestamp_start"),
+    "end_time": ("end_time",),
+    "workout_name": ("workout_name", "workout name", "title"),
+    "duration": ("duration", "workout_duration"),
+    "exercise_name": ("exercise_name", "exercise name", "exercise_title", "exercise"),
+    "reps": ("reps",),
+    "weight": ("weight", "weight_kg", "weight_lbs"),
+    "set_type": ("set_type", "set type"),
+}
+
+# Unitat implícita de les columnes de pes que la indiquen al nom.
+WEIGHT_COLUMN_UNITS = {
+    "weight_kg": WeightUnit.METRIC,
+    "weight_lbs": WeightUnit.IMPERIAL,
+}
+
+# Tipus de sèrie segons el valor de la columna (els desconeguts es consideren normals).
+SET_TYPES = {
+    "dropset": SetType.DROPSET,
+    "failure": SetType.FAILTURE,
+    "failture": SetType.FAILTURE,
+}
+
+# Formats de data sense zona horària, a més de l'ISO 8601.
+DATE_FORMATS = ("%d %b %Y, %H:%M",)
+
+# Durades del tipus "1h 5m" o "45m 30s".
+DURATION_PART = re.compile(r"(\d+)\s*([hms])")
+
+
+def _exercise_key(name: str) -> str:
+    """
+    Normalitza el nom d'un exercici per comparar-lo sense tenir en compte majúscules ni espais.
+    """
+    return " ".join(name.split()).casefold()
+
+
+def _parse_timestamp(value: str, timezone: ZoneInfo) -> int:
+    """
+    Converteix una data del CSV a una marca de temps Unix en mil·lisegons.
+    Accepta marques de temps numèriques (en segons o mil·lisegons) i dates; les dates
+    sense zona horària s'interpreten en la zona horària de l'usuari.
+    """
+    if value.isdigit():
+        timestamp = int(value)
+        return timestamp if timestamp > 10**11 else timestamp * 1000
+
+    for date_format in DATE_FORMATS:
+        try:
+            moment = datetime.strptime(value, date_format)
+            break
+        except ValueError:
+            continue
+    else:
+        moment = datetime.fromisoformat(value)
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone)
+    return int(moment.timestamp() * 1000)
+
+
+def _parse_duration(value: str) -> int:
+    """
+    Converteix una durada del CSV a segons. Accepta segons o el format "1h 5m".
+    """
+    if value.isdigit():
+        return int(value)
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        raise ValueError(f"invalid duration '{value}'")
+    seconds = {"h": 3600, "m": 60, "s": 1}
+    return sum(int(amount) * seconds[unit] for amount, unit in parts)
+
+
+def _copy_rows(session: Session, table: str, columns: list[str], rows: list[tuple]):
+    """
+    Escriu files a una taula amb COPY, dins la transacció de la sessió.
+    """
+    cursor = session.connection().connection.cursor()
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:  # pyright: ignore[]
+        for row in rows:
+            copy.write_row(row)
+
+
+def import_workouts_csv(
+    session: Session,
+    user_uuid: UUID,
+    timezone: str,
+    lines: Iterable[str],
+    weight_unit: WeightUnit = WeightUnit.METRIC,
+) -> dict[str, int]:
+    """
+    Importa l'historial d'entrenaments d'un CSV exportat d'una altra aplicació.
+    Cada fila és una sèrie; les files consecutives amb la mateixa data i nom formen un
+    entrenament, i les consecutives amb el mateix exercici, una entrada.
+    El CSV es llegeix fila a fila i les dades s'escriuen amb COPY per grups de
+    `IMPORT_BATCH_SIZE` sèries, de manera que la memòria no depèn de la mida del fitxer.
+    Els exercicis es busquen pel nom entre els de l'usuari i els exercicis per defecte,
+    i els que no existeixen es creen com a exercicis personalitzats. Els entrenaments
+    que comencen en el mateix moment que un de l'historial s'ometen, així el mateix
+    fitxer es pot tornar a importar. Al final es recalculen el resum diari, els rècords
+    personals i l'última entrada de cada exercici de l'usuari.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        timezone: La zona horària de l'usuari, per a les dates sense zona horària.
+        lines: Les línies del fitxer CSV, amb capçalera.
+        weight_unit: La unitat dels pesos, si la columna de pes no la indica.
+
+    Raises:
+        ValueError: Si falta alguna columna obligatòria o alguna fila no és vàlida.
+
+    Returns:
+        Un diccionari amb el nombre d'entrenaments, entrades i sèries importats,
+        d'exercicis creats i d'entrenaments omesos.
+    """
+    reader = csv.DictReader(lines)
+    headers = {name.strip().lower(): name for name in reader.fieldnames or []}
+    columns = {
+        field: next((headers[alias] for alias in aliases if alias in headers), None)
+        for field, aliases in COLUMN_ALIASES.items()
+    }
+    missing = [field for field in ("date", "exercise_name") if columns[field] is None]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    if columns["weight"] is not None:
+        weight_unit = WEIGHT_COLUMN_UNITS.get(
+            columns["weight"].strip().lower(), weight_unit
+        )
+    user_timezone = ZoneInfo(timezone)
+
+    # Versió de canvi de tot el que s'importa. Bloqueja els canvis de l'usuari fins al commit,
+    # de manera que els entrenaments que s'afegeixen durant la importació tenen versions més altes
+    # (vegeu versioning.py)
+    version = next_change_version(session, user_uuid)
+
+    # Cerca en memòria dels exercicis pel nom. Els de l'usuari tenen prioritat sobre els
+    # exercicis per defecte, i els actius sobre els arxivats.
+    exercises: dict[str, UUID] = {}
+    for uuid, name in session.exec(
+        select(ExerciseModel.uuid, ExerciseModel.name)
+        .where(ExerciseModel.creator_uuid == user_uuid)
+        .order_by(ExerciseModel.is_disabled.desc())  # pyright: ignore[]
+    ):
+        exercises[_exercise_key(name)] = uuid
+    default_exercises = {
+        _exercise_key(default.name): default
+        for default in session.exec(select(DefaultExerciseModel))
+    }
+
+    # Inicis dels entrenaments que l'usuari ja té, per no importar-los dues vegades
+    existing_starts = set(
+        session.exec(
+            select(WorkoutInstanceModel.timestamp_start)
+            .join(WorkoutContentModel)
+            .where(WorkoutContentModel.creator_uuid == user_uuid)
+        )
+    )
+
+    def exercise_uuid(name: str) -> UUID:
+        """
+        Obté l'exercici de l'usuari amb aquest nom, i el crea si no existeix.
+        """
+        key = _exercise_key(name)
+        if key not in exercises:
+            default = default_exercises.get(key)
+            exercise = ExerciseModel(
+                uuid=uuid4(),
+                name=default.name if default else name.strip(),
+                description=default.description if default else None,
+                body_part=default.body_part if default else BodyPart.OTHER,
+                type=default.type if default else ExerciseType.OTHER,
+                default_exercise_uuid=default.uuid if default else None,
+                creator_uuid=user_uuid,
+                version=version,
+            )
+            session.add(exercise)
+            exercises[key] = exercise.uuid
+            summary["created_exercises"] += 1
+        return exercises[key]
+
+    summary = {
+        "workouts": 0,
+        "entries": 0,
+        "sets": 0,
+        "created_exercises": 0,
+        "skipped_workouts": 0,
+    }
+    batch = {"workout_content": [], "workout_instance": [], "workout_entry": [], "workout_set": []}
+    batch_sets = 0
+
+    def flush():
+        """
+        Escriu el grup d'entrenaments pendent amb COPY, en l'ordre que imposen les claus foranes.
+        """
+        session.flush()  # Els exercicis nous s'han d'escriure abans que les entrades
+        content_columns = ["uuid", "name", "creator_uuid", "entry_count", "set_count", "version"]
+        _copy_rows(session, "workout_content", content_columns, batch["workout_content"])
+        _copy_rows(session, "workout_instance", ["workout_uuid", "timestamp_start", "duration"], batch["workout_instance"])
+        if PACKED_SETS:
+            entry_columns = ["workout_uuid", "index", "weight_unit", "exercise_uuid", "timestamp_start",
+                             "packed_reps", "packed_weights", "packed_weights_kg", "packed_set_types"]
+        else:
+            entry_columns = ["workout_uuid", "index", "weight_unit", "exercise_uuid", "timestamp_start"]
+        _copy_rows(session, "workout_entry", entry_columns, batch["workout_entry"])
+        set_columns = ["workout_uuid", "entry_index", "index", "reps", "weight", "weight_kg", "set_type",
+                       "timestamp_start"]
+        _copy_rows(session, "workout_set", set_columns, batch["workout_set"])
+        for rows in batch.values():
+            rows.clear()
+
+    def add_workout(workout: dict):
+        """
+        Afegeix un entrenament llegit al grup pendent i l'escriu si el grup és prou gran.
+        """
+        nonlocal batch_sets
+        if workout["timestamp_start"] in existing_starts:
+            summary["skipped_workouts"] += 1
+            return
+        existing_starts.add(workout["timestamp_start"])
+
+        workout_uuid = uuid4()
+        set_count = sum(len(sets) for _, sets in workout["entries"])
+        batch["workout_content"].append(
+            (workout_uuid, workout["name"], user_uuid, len(workout["entries"]), set_count, version)
+        )
+        batch["workout_instance"].append((workout_uuid, workout["timestamp_start"], workout["duration"]))
+        for index, (entry_exercise, sets) in enumerate(workout["entries"]):
+            entry = (workout_uuid, index, weight_unit.name, entry_exercise, workout["timestamp_start"])
+            if PACKED_SETS:
+                entry += (
+                    [reps for reps, _, _ in sets],
+                    [weight for _, weight, _ in sets],
+                    [to_kg(weight, weight_unit) for _, weight, _ in sets],
+                    [set_type.value for _, _, set_type in sets],
+                )
+            else:
+                batch["workout_set"].extend(
+                    (workout_uuid, index, set_index, reps, weight, to_kg(weight, weight_unit), set_type.name,
+                     workout["timestamp_start"])
+                    for set_index, (reps, weight, set_type) in enumerate(sets)
+                )
+            batch["workout_entry"].append(entry)
+            summary["entries"] += 1
+            summary["sets"] += len(sets)
+            batch_sets += len(sets)
+        summary["workouts"] += 1
+
+        if batch_sets >= IMPORT_BATCH_SIZE:
+            flush()
+            batch_sets = 0
+
+    def value(row: dict, field: str) -> str:
+        """
+        Llegeix el valor d'un camp d'una fila, o una cadena buida si la columna no hi és.
+        """
+        column = columns[field]
+        return (row[column] or "").strip() if column is not None else ""
+
+    workout = None
+    for row_number, row in enumerate(reader, start=2):  # La fila 1 és la capçalera
+        name = value(row, "exercise_name")
+        if not name:
+            continue
+        try:
+            key = (value(row, "date"), value(row, "workout_name"))
+            if workout is None or workout["key"] != key:
+                if workout is not None:
+                    add_workout(workout)
+                timestamp_start = _parse_timestamp(key[0], user_timezone)
+                if value(row, "duration"):
+                    duration = _parse_duration(value(row, "duration"))
+                elif value(row, "end_time"):
+                    duration = (_parse_timestamp(value(row, "end_time"), user_timezone) - timestamp_start) // 1000
+                else:
+                    duration = 0
+                workout = {
+                    "key": key,
+                    "name": key[1] or "Workout",
+                    "timestamp_start": timestamp_start,
+                    "duration": duration,
+                    "entries": [],
+                }
+
+            entry_exercise = exercise_uuid(name)
+            if not workout["entries"] or workout["entries"][-1][0] != entry_exercise:
+                workout["entries"].append((entry_exercise, []))
+
+            reps, weight = value(row, "reps"), value(row, "weight")
+            workout["entries"][-1][1].append(
+                (
+                    int(float(reps)) if reps else None,
+                    # Les sèries de pes corporal o de cardio no tenen pes (Hevy deixa la cel·la buida),
+                    # i l'aplicació les desa amb pes 0
+                    float(weight) if weight else 0.0,
+                    SET_TYPES.get(value(row, "set_type").lower(), SetType.NORMAL),
+                )
+            )
+        except ValueError as error:
+            raise ValueError(f"Invalid row {row_number}: {error}")
+
+    if workout is not None:
+        add_workout(workout)
+    flush()
+
+    if summary["workouts"] == 0:
+        return summary
+
+    # Recalcula les dades derivades de l'historial de l'usuari
+    rebuild_daily_stats(session, user_uuid)
+    rebuild_personal_records(session, user_uuid)
+    rebuild_latest_entries(session, user_uuid)
+    return summary
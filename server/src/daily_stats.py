@@ -0,0 +1,224 @@
+from datetime import date, datetime, timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from models.stats import WorkoutDailyStatsModel
+from models.users import UserConfig
+from models.workout import WorkoutContentModel, WorkoutInstanceModel
+from schemas.types.enums import StatsGranularity
+from schemas.workout_schema import WorkoutContentSchema, WorkoutStatsPeriodSchema
+from set_storage import all_sets
+from sqlalchemy import Date, DateTime, cast, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, func, select
+from units import to_kg
+
+
+def workout_day(timestamp_start: int, timezone: str) -> date:
+    """
+    Calcula el dia local al qual pertany un entrenament.
+
+    Args:
+        timestamp_start: La marca de temps Unix (en milisegons) de l'inici de l'entrenament.
+        timezone: La zona horària de l'usuari.
+
+    Returns:
+        El dia en què va començar l'entrenament, segons la zona horària de l'usuari.
+    """
+    return datetime.fromtimestamp(timestamp_start / 1000, ZoneInfo(timezone)).date()
+
+
+def add_workout_to_daily_stats(
+    session: Session, user_settings: UserConfig, workout: WorkoutContentSchema
+):
+    """
+    Suma un entrenament realitzat al resum diari de l'usuari.
+    La sentència s'executa dins la transacció de la sessió, de manera que es confirma
+    amb el mateix commit que l'entrenament.
+
+    Args:
+        session: La sessió de base de dades.
+        user_settings: La configuració de l'usuari propietari de l'entrenament.
+        workout: L'entrenament afegit. Ha de tenir una instància.
+    """
+    if workout.instance is None:  # Les plantilles no compten a les estadístiques
+        return
+
+    sets = sum(len(entry.sets) for entry in workout.entries)
+    volume = sum(
+        (workout_set.reps or 0) * (to_kg(workout_set.weight, entry.weight_unit) or 0)
+        for entry in workout.entries
+        for workout_set in entry.sets
+    )
+
+    # INSERT ... ON CONFLICT DO UPDATE: crea el registre del dia o hi suma l'entrenament
+    statement = insert(WorkoutDailyStatsModel).values(
+        user_uuid=user_settings.user_uuid,
+        day=workout_day(workout.instance.timestamp_start, user_settings.timezone),
+        workouts=1,
+        duration=workout.instance.duration,
+        sets=sets,
+        volume=volume,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_uuid", "day"],
+        set_={
+            "workouts": WorkoutDailyStatsModel.workouts + statement.excluded.workouts,
+            "duration": WorkoutDailyStatsModel.duration + statement.excluded.duration,
+            "sets": WorkoutDailyStatsModel.sets + statement.excluded.sets,
+            "volume": WorkoutDailyStatsModel.volume + statement.excluded.volume,
+        },
+    )
+    session.exec(statement)  # pyright: ignore[]
+
+
+def rebuild_daily_stats(session: Session, user_uuid: UUID | None = None):
+    """
+    Torna a calcular el resum diari a partir de l'historial d'entrenaments.
+    S'utilitza per omplir la taula amb l'historial existent, per corregir-la i quan
+    l'usuari canvia de zona horària.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari a recalcular. Si és None, es recalculen tots els usuaris.
+    """
+    # Sèries i volum de cada entrenament
+    sets = all_sets()
+    workout_sets = (
+        select(
+            sets.c.workout_uuid,
+            func.count().label("sets"),
+            func.sum(sets.c.reps * sets.c.weight_kg).label("volume"),
+        )
+        .group_by(sets.c.workout_uuid)
+        .subquery()
+    )
+
+    # Dia local de cada entrenament, a partir de la marca de temps en milisegons
+    # i de la zona horària del seu creador
+    day = cast(
+        func.timezone(
+            UserConfig.timezone,
+            func.to_timestamp(WorkoutInstanceModel.timestamp_start / 1000.0),
+        ),
+        Date,
+    )
+
+    # Resum diari de tots els entrenaments realitzats
+    daily_stats = (
+        select(
+            WorkoutContentModel.creator_uuid,
+            day,
+            func.count(),
+            func.sum(WorkoutInstanceModel.duration),
+            func.coalesce(func.sum(workout_sets.c.sets), 0),
+            func.coalesce(func.sum(workout_sets.c.volume), 0),
+        )
+        .join(
+            WorkoutInstanceModel,
+            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
+        )
+        .join(UserConfig, WorkoutContentModel.creator_uuid == UserConfig.user_uuid)  # pyright: ignore[]
+        .outerjoin(
+            workout_sets,
+            WorkoutContentModel.uuid == workout_sets.c.workout_uuid,  # pyright: ignore[]
+        )
+        .group_by(WorkoutContentModel.creator_uuid, day)
+    )
+
+    clear_stats = delete(WorkoutDailyStatsModel)
+    if user_uuid is not None:
+        daily_stats = daily_stats.where(WorkoutContentModel.creator_uuid == user_uuid)
+        clear_stats = clear_stats.where(WorkoutDailyStatsModel.user_uuid == user_uuid)  # pyright: ignore[]
+
+    session.exec(clear_stats)  # pyright: ignore[]
+    session.exec(
+        insert(WorkoutDailyStatsModel).from_select(  # pyright: ignore[]
+            ["user_uuid", "day", "workouts", "duration", "sets", "volume"],
+            daily_stats,
+        )
+    )
+
+
+def period_start(day: date, granularity: StatsGranularity) -> date:
+    """
+    Calcula el primer dia del període (dia, setmana o mes) que conté un dia.
+    Les setmanes comencen en dilluns.
+
+    Args:
+        day: El dia.
+        granularity: El tipus de període.
+
+    Returns:
+        El primer dia del període.
+    """
+    if granularity == StatsGranularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == StatsGranularity.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_starts(since: date, until: date, granularity: StatsGranularity) -> list[date]:
+    """
+    Llista l'inici de tots els períodes entre dos dies, el més recent primer.
+
+    Args:
+        since: El primer dia de la finestra.
+        until: L'últim dia de la finestra.
+        granularity: El tipus de període.
+
+    Returns:
+        El primer dia de cada període que conté algun dia de la finestra.
+    """
+    starts = []
+    start = period_start(until, granularity)
+    while start > since:
+        starts.append(start)
+        # El període anterior comença al primer dia del període del dia anterior
+        start = period_start(start - timedelta(days=1), granularity)
+    starts.append(period_start(since, granularity))
+    return starts
+
+
+def get_period_totals(
+    session: Session, user_uuid: UUID, granularity: StatsGranularity, since: date
+) -> dict[date, WorkoutStatsPeriodSchema]:
+    """
+    Obté els totals d'entrenaments d'un usuari agrupats per períodes a partir del resum diari.
+    Només es retornen els períodes amb algun entrenament.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        granularity: El tipus de període en què s'agrupen els totals.
+        since: El primer dia a tenir en compte.
+
+    Returns:
+        Un diccionari amb els totals de cada període, indexat pel primer dia del període.
+    """
+    # date_trunc coincideix amb `period_start`: les setmanes ISO comencen en dilluns
+    start = cast(
+        func.date_trunc(granularity.value, cast(WorkoutDailyStatsModel.day, DateTime)),
+        Date,
+    )
+    rows = session.exec(
+        select(  # pyright: ignore[]
+            start,
+            func.sum(WorkoutDailyStatsModel.workouts),
+            func.sum(WorkoutDailyStatsModel.duration),
+            func.sum(WorkoutDailyStatsModel.sets),
+            func.sum(WorkoutDailyStatsModel.volume),
+        )
+        .where(WorkoutDailyStatsModel.user_uuid == user_uuid)
+        .where(WorkoutDailyStatsModel.day >= since)  # pyright: ignore[]
+        .group_by(start)
+    ).all()
+
+    return {
+        row[0]: WorkoutStatsPeriodSchema(
+            start=row[0], workouts=row[1], duration=row[2], sets=row[3], volume=row[4]
+        )
+        for row in rows
+    }
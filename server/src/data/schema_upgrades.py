@@ -0,0 +1,137 @@
+from backfills import (
+    backfill_archived_exercises,
+    backfill_entry_timestamps,
+    backfill_set_timestamps,
+    backfill_workout_counts,
+)
+from db import engine
+from sqlalchemy import text
+from sqlmodel import Session
+
+def cascade_foreign_key(table: str, constraint: str, columns: str, references: str) -> str:
+    """
+    Genera una sentència idempotent que converteix una clau forana existent en una amb
+    ON DELETE CASCADE. Només es torna a crear si encara no és en cascada, per no
+    revalidar tota la taula a cada inici.
+
+    Args:
+        table: La taula que conté la clau forana.
+        constraint: El nom de la restricció.
+        columns: Les columnes de la clau forana, separades per comes.
+        references: La taula i columnes referenciades, per exemple "workout_content (uuid)".
+
+    Returns:
+        Un bloc DO de PostgreSQL.
+    """
+    return f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conname = '{constraint}' AND confdeltype = 'c'
+            ) THEN
+                ALTER TABLE {table}
+                    DROP CONSTRAINT IF EXISTS {constraint},
+                    ADD CONSTRAINT {constraint} FOREIGN KEY ({columns})
+                        REFERENCES {references} ON DELETE CASCADE;
+            END IF;
+        END $$
+    """
+
+
+# Llista de sentències DDL idempotents per actualitzar bases de dades existents.
+# `SQLModel.metadata.create_all` només crea les taules que no existeixen, però no afegeix
+# columnes ni índexs nous a les taules que ja existeixen. Aquestes sentències s'executen
+# després de `create_all` i no tenen cap efecte sobre una base de dades nova.
+SCHEMA_UPGRADES = [
+    # Versions de canvi per a la sincronització incremental (/user/sync).
+    "ALTER TABLE workout_content ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('change_version_seq')",
+    "ALTER TABLE exercise ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('change_version_seq')",
+    "CREATE INDEX IF NOT EXISTS ix_workout_content_creator_version ON workout_content (creator_uuid, version)",
+    "CREATE INDEX IF NOT EXISTS ix_exercise_creator_version ON exercise (creator_uuid, version)",
+    # Versions de canvi de les recomanacions, per a les ETags de /user/trainer/recommendation.
+    "ALTER TABLE recommendation ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('change_version_seq')",
+    # Zona horària de l'usuari per a les estadístiques.
+    "ALTER TABLE user_config ADD COLUMN IF NOT EXISTS timezone VARCHAR NOT NULL DEFAULT 'UTC'",
+    # Inici de l'entrenament a cada entrada, per paginar l'historial d'un exercici.
+    "ALTER TABLE workout_entry ADD COLUMN IF NOT EXISTS timestamp_start BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_workout_entry_exercise_timestamp ON workout_entry (exercise_uuid, timestamp_start, workout_uuid, index)",
+    # Pes de cada sèrie normalitzat a quilograms, per a les agregacions.
+    "ALTER TABLE workout_set ADD COLUMN IF NOT EXISTS weight_kg DOUBLE PRECISION",
+    # Inici de l'entrenament a cada sèrie, clau de partició de 'workout_set'.
+    "ALTER TABLE workout_set ADD COLUMN IF NOT EXISTS timestamp_start BIGINT",
+    # Entrenaments arxivats: es comprimeixen encara que siguin petits (per defecte, a partir de ~2 kB).
+    "ALTER TABLE archived_workout SET (toast_tuple_target = 128)",
+    # Format JSON d'un nombre de coma flotant, idèntic al d'orjson (per exemple, 50.0 i no 50).
+    # L'utilitzen les lectures amb el JSON generat a la base de dades (vegeu database_json.py).
+    r"""
+    CREATE OR REPLACE FUNCTION json_float(value DOUBLE PRECISION) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT CASE
+            WHEN value IS NULL OR value IN ('NaN', 'Infinity', '-Infinity') THEN 'null'
+            WHEN value = 0 THEN value::text || '.0'
+            WHEN value = trunc(value) AND abs(value) < 1e16 THEN value::bigint::text || '.0'
+            WHEN abs(value) >= 1e-4 AND abs(value) < 1e15 THEN value::text
+            WHEN abs(value) >= 1e-5 AND abs(value) < 1e16 THEN value::text::numeric::text
+            ELSE regexp_replace(value::text, 'e\+?(-?)0*', 'e\1')
+        END
+    $$
+    """,
+    # Sèries empaquetades en arrays a cada entrada (mode ULTRA_PACKED_SETS).
+    "ALTER TABLE workout_entry ADD COLUMN IF NOT EXISTS packed_reps INTEGER[]",
+    "ALTER TABLE workout_entry ADD COLUMN IF NOT EXISTS packed_weights DOUBLE PRECISION[]",
+    "ALTER TABLE workout_entry ADD COLUMN IF NOT EXISTS packed_weights_kg DOUBLE PRECISION[]",
+    "ALTER TABLE workout_entry ADD COLUMN IF NOT EXISTS packed_set_types VARCHAR[]",
+    # Nombre d'entrades i de sèries de cada entrenament, per a les llistes resumides.
+    "ALTER TABLE workout_content ADD COLUMN IF NOT EXISTS entry_count INTEGER",
+    "ALTER TABLE workout_content ADD COLUMN IF NOT EXISTS set_count INTEGER",
+    # Eliminació en cascada a la base de dades: entrenament → entrades → sèries i entrenament → instància.
+    cascade_foreign_key(
+        "workout_entry", "workout_entry_workout_uuid_fkey", "workout_uuid", "workout_content (uuid)"
+    ),
+    cascade_foreign_key(
+        "workout_instance", "workout_instance_workout_uuid_fkey", "workout_uuid", "workout_content (uuid)"
+    ),
+    cascade_foreign_key(
+        "workout_set",
+        "workout_set_workout_uuid_entry_index_fkey",
+        "workout_uuid, entry_index",
+        "workout_entry (workout_uuid, index)",
+    ),
+]
+
+
+# Omplen les columnes noves a les dades existents. S'executen després de `SCHEMA_UPGRADES`,
+# cadascuna només modifica les files que encara no tenen el valor i no fan res si ja estan omplertes.
+DATA_UPGRADES = [
+    # Inici de l'entrenament a les entrades i després a les sèries. Les lectures de les sèries
+    # d'un entrenament filtren per aquest inici (vegeu history.py i database_json.py).
+    backfill_entry_timestamps,
+    backfill_set_timestamps,
+    backfill_workout_counts,  # Nombre d'entrades i de sèries de cada entrenament
+    backfill_archived_exercises,  # Exercicis dels entrenaments arxivats
+]
+
+
+def upgrade_schema():
+    """
+    Aplica les sentències de `SCHEMA_UPGRADES` a la base de dades i després omple les
+    columnes noves amb `DATA_UPGRADES`.
+    Aquesta funció s'executa durant l'inicialització de la base de dades.
+
+    Gestiona possibles errors durant l'actualització de l'esquema
+    i imprimeix un missatge d'èxit o de fallada.
+    """
+    try:
+        # `engine.begin()` obre una transacció que es confirma automàticament en sortir del bloc.
+        with engine.begin() as connection:
+            for statement in SCHEMA_UPGRADES:
+                connection.execute(text(statement))
+        with Session(engine) as session:
+            for data_upgrade in DATA_UPGRADES:
+                data_upgrade(session)
+            session.commit()
+        # Imprimeix un missatge si l'esquema s'ha actualitzat correctament.
+        print("Database schema upgraded successfully.")
+    except Exception as e: # Captura qualsevol excepció que pugui ocórrer durant el procés.
+        # Imprimeix un missatge d'error si falla l'actualització de l'esquema.
+        print(f"Failed to upgrade database schema: {e}")
@@ -0,0 +1,187 @@
+from enum import Enum
+from typing import Iterator
+from uuid import UUID
+
+from db import engine
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from schemas.types.enums import BodyPart, ExerciseType, SetType, WeightUnit
+from sqlalchemy import text
+from sqlmodel import Session
+
+# Amb `ULTRA_DATABASE_JSON=true`, PostgreSQL genera el JSON complet dels entrenaments i
+# plantilles (entrades, exercicis i sèries) de /user/workouts i /user/templates, i el servidor
+# l'envia tal com el rep, sense crear cap objecte de Python per entrenament, entrada o sèrie.
+# El JSON es construeix concatenant text en lloc d'utilitzar `json_build_object`/`json_agg`,
+# perquè aquestes funcions afegeixen espais i salts de línia. Així la resposta és idèntica,
+# byte a byte, a la que genera `WorkoutContentSchema` amb orjson:
+# - Els camps tenen el mateix ordre i els textos s'escapen igual (`to_json`).
+# - Els enums es desen pel nom i es tradueixen al seu valor.
+# - Els pesos es formaten amb `json_float` (vegeu `data/schema_upgrades.py`).
+# Inclou les sèries en files, les empaquetades i les dels entrenaments arxivats (vegeu `archive.py`).
+
+# Nombre d'entrenaments que es llegeixen de la base de dades i s'envien cada vegada.
+JSON_BATCH_SIZE = 100
+
+
+def _enum_json(column: str, enum: type[Enum]) -> str:
+    """
+    Genera l'expressió SQL que converteix una columna d'un enum (desat pel nom) al JSON del seu valor.
+    """
+    cases = " ".join(f"""WHEN '{member.name}' THEN '"{member.value}"'""" for member in enum)
+    return f"CASE {column}::text {cases} ELSE 'null' END"
+
+
+def _nullable_json(expression: str) -> str:
+    """
+    Genera l'expressió SQL que converteix un valor a JSON, amb `null` si és NULL.
+    """
+    return f"coalesce(to_json({expression})::text, 'null')"
+
+
+def _set_json(reps: str, weight: str, set_type: str) -> str:
+    """
+    Genera l'expressió SQL del JSON d'una sèrie (`WorkoutSetSchema`).
+    """
+    return (
+        f"""'{{"reps":' || {_nullable_json(reps)}"""
+        f"""|| ',"weight":' || json_float({weight})"""
+        f"""|| ',"set_type":' || {set_type} || '}}'"""
+    )
+
+
+def _entry_json(rest_countdown_duration: str, weight_unit: str, sets: str) -> str:
+    """
+    Genera l'expressió SQL del JSON d'una entrada (`WorkoutEntrySchema`) amb l'exercici `x`.
+    """
+    return (
+        f"""'{{"rest_countdown_duration":' || {_nullable_json(rest_countdown_duration)}"""
+        f"""|| ',"weight_unit":' || {weight_unit}"""
+        f"""|| ',"exercise":{{"uuid":' || to_json(x.uuid)::text"""
+        f"""|| ',"name":' || to_json(x.name)::text"""
+        f"""|| ',"description":' || {_nullable_json("x.description")}"""
+        f"""|| ',"body_part":' || {_enum_json("x.body_part", BodyPart)}"""
+        f"""|| ',"type":' || {_enum_json("x.type", ExerciseType)}"""
+        f"""|| ',"default_exercise_uuid":' || {_nullable_json("x.default_exercise_uuid")}"""
+        f"""|| '}},"sets":[' || coalesce({sets}, '') || ']}}'"""
+    )
+
+
+def _row_sets(timestamp_condition: str) -> str:
+    """
+    Genera la subconsulta SQL de les sèries en files de 'workout_set' d'una entrada `e`
+    que compleixen la condició sobre `s.timestamp_start`.
+    """
+    return f"""(
+        SELECT string_agg({_set_json("s.reps", "s.weight", _enum_json("s.set_type", SetType))}, ',' ORDER BY s.index)
+        FROM workout_set s
+        WHERE s.workout_uuid = e.workout_uuid AND s.entry_index = e.index AND {timestamp_condition}
+    )"""
+
+
+# Sèries d'una entrada `e`: empaquetades en arrays o en files de 'workout_set'.
+# Les entrades d'entrenaments i les de plantilles (sense inici) tenen subconsultes separades,
+# perquè la igualtat sobre l'inici permeti llegir només la partició del mes quan 'workout_set'
+# està partida, sense recórrer la partició per defecte amb les sèries de totes les plantilles.
+_ENTRY_SETS = f"""
+    CASE WHEN e.packed_reps IS NOT NULL THEN (
+        SELECT string_agg({_set_json("p.reps", "p.weight", _nullable_json("p.set_type"))}, ',' ORDER BY p.position)
+        FROM unnest(e.packed_reps, e.packed_weights, e.packed_set_types)
+            WITH ORDINALITY AS p(reps, weight, set_type, position)
+    ) WHEN e.timestamp_start IS NOT NULL THEN {_row_sets("s.timestamp_start = e.timestamp_start")}
+    ELSE {_row_sets("s.timestamp_start IS NULL")} END
+"""
+
+# Entrades d'un entrenament `c` desades a les taules
+_ENTRIES = f"""
+    SELECT string_agg(
+        {_entry_json("e.rest_countdown_duration", _enum_json("e.weight_unit", WeightUnit), _ENTRY_SETS)},
+        ',' ORDER BY e.index
+    )
+    FROM workout_entry e
+    JOIN exercise x ON x.uuid = e.exercise_uuid
+    WHERE e.workout_uuid = c.uuid
+"""
+
+# Entrades d'un entrenament arxivat `a`, amb les unitats i els tipus de sèrie ja desats pel valor
+_ARCHIVED_SETS = f"""
+    SELECT string_agg(
+        {_set_json("(s.value->>'reps')::integer", "(s.value->>'weight')::double precision", "(s.value->'set_type')::text")},
+        ',' ORDER BY s.position
+    )
+    FROM jsonb_array_elements(ae.value->'sets') WITH ORDINALITY AS s(value, position)
+"""
+_ARCHIVED_ENTRIES = f"""
+    SELECT string_agg(
+        {_entry_json("(ae.value->>'rest_countdown_duration')::integer", "(ae.value->'weight_unit')::text", f"({_ARCHIVED_SETS})")},
+        ',' ORDER BY ae.position
+    )
+    FROM jsonb_array_elements(a.entries) WITH ORDINALITY AS ae(value, position)
+    -- Els arxius anteriors a 'archived_workout_exercise' poden fer referència a exercicis
+    -- eliminats; la unió n'omet les entrades, igual que `archive.restored_entries`
+    JOIN exercise x ON x.uuid = (ae.value->>'exercise_uuid')::uuid
+"""
+
+# JSON de cada entrenament o plantilla (`WorkoutContentSchema`), en l'ordre de la llista d'UUID
+WORKOUTS_JSON = text(
+    f"""
+    SELECT '{{"uuid":' || to_json(c.uuid)::text
+        || ',"name":' || to_json(c.name)::text
+        || ',"description":' || {_nullable_json("c.description")}
+        || ',"instance":' || CASE WHEN i.workout_uuid IS NULL THEN 'null' ELSE
+            '{{"timestamp_start":' || {_nullable_json("i.timestamp_start")}
+            || ',"duration":' || {_nullable_json("i.duration")} || '}}' END
+        || ',"entries":[' || coalesce(
+            CASE WHEN a.workout_uuid IS NULL THEN ({_ENTRIES}) ELSE ({_ARCHIVED_ENTRIES}) END, ''
+        ) || ']}}'
+    FROM unnest(CAST(:uuids AS uuid[])) WITH ORDINALITY AS page(uuid, position)
+    JOIN workout_content c ON c.uuid = page.uuid
+    LEFT JOIN workout_instance i ON i.workout_uuid = c.uuid
+    LEFT JOIN archived_workout a ON a.workout_uuid = c.uuid
+    ORDER BY page.position
+    """
+)
+
+
+def stream_workouts_json(workout_uuids: list[UUID]) -> Iterator[str]:
+    """
+    Genera la llista JSON dels entrenaments o plantilles indicats a partir del JSON de la
+    base de dades, en fragments de `JSON_BATCH_SIZE` entrenaments.
+    Utilitza una sessió pròpia, perquè s'executa mentre s'envia la resposta.
+
+    Args:
+        workout_uuids: Els UUID dels entrenaments o plantilles, en l'ordre de la resposta.
+
+    Returns:
+        Un iterador de fragments de text de la llista JSON.
+    """
+    yield "["
+    with Session(engine) as session:
+        result = (
+            session.connection()
+            .execution_options(stream_results=True, yield_per=JSON_BATCH_SIZE)
+            .execute(WORKOUTS_JSON, {"uuids": workout_uuids})
+        )
+        separator = ""
+        for workouts in result.scalars().partitions():
+            yield separator + ",".join(workouts)
+            separator = ","
+    yield "]"
+
+
+def workouts_json_response(workout_uuids: list[UUID], response: Response) -> StreamingResponse:
+    """
+    Crea la resposta de /user/workouts o /user/templates amb el JSON generat a la base de dades.
+
+    Args:
+        workout_uuids: Els UUID dels entrenaments o plantilles, en l'ordre de la resposta.
+        response: La resposta injectada a la ruta, per conservar-ne les capçaleres (com l'ETag).
+
+    Returns:
+        Una resposta JSON en streaming.
+    """
+    return StreamingResponse(
+        stream_workouts_json(workout_uuids),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
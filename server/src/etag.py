@@ -0,0 +1,65 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Construeix una ETag forta a partir de les parts que identifiquen una representació.
+    Les parts haurien d'incloure les versions de canvi de les dades retornades,
+    de manera que l'ETag canviï sempre que canviï la resposta.
+
+    Args:
+        *parts: Valors que identifiquen la representació (UUIDs, versions, paràmetres...).
+
+    Returns:
+        L'ETag entre cometes, tal com s'ha d'enviar a la capçalera `ETag`.
+    """
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """
+    Comprova si la capçalera `If-None-Match` de la petició coincideix amb l'ETag.
+    Segons l'RFC 9110, `If-None-Match` utilitza la comparació feble, per tant s'ignora el prefix `W/`.
+
+    Args:
+        request: La petició HTTP.
+        etag: L'ETag actual de la representació.
+
+    Returns:
+        True si el client ja té la representació actual, False altrament.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return etag in candidates
+
+
+def conditional_response(
+    request: Request, response: Response, etag: str
+) -> Response | None:
+    """
+    Gestiona una petició GET condicional.
+    Si el client ja té la representació actual retorna una resposta 304 buida, perquè la ruta
+    la pugui retornar sense executar la consulta completa ni serialitzar el resultat.
+    Altrament, afegeix l'ETag a la resposta i retorna None.
+
+    Args:
+        request: La petició HTTP.
+        response: La resposta que FastAPI injecta a la ruta.
+        etag: L'ETag actual de la representació.
+
+    Returns:
+        Una resposta 304 si l'ETag coincideix, None altrament.
+    """
+    # Els clients han de revalidar sempre la resposta, però la poden reutilitzar si no ha canviat.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Iterator
+from uuid import UUID
+
+from db import engine
+from models.chat import MessageModel
+from models.exercise import ExerciseModel
+from models.workout import (
+    ArchivedWorkoutModel,
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+    WorkoutSetModel,
+)
+from schemas.types.enums import ExportFormat
+from sqlmodel import Session, select
+
+# Nombre de files que es llegeixen de la base de dades cada vegada.
+# Les consultes utilitzen un cursor del servidor, de manera que la memòria
+# no depèn de la mida de l'historial.
+EXPORT_BATCH_SIZE = 1000
+
+# Mida aproximada (en caràcters) dels fragments que s'envien al client.
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Columnes del CSV: el tipus de registre i la unió dels camps de tots els tipus.
+# Cada fila només omple els camps del seu tipus.
+CSV_FIELDS = [
+    "type",
+    "uuid",
+    "name",
+    "description",
+    "body_part",
+    "exercise_type",
+    "default_exercise_uuid",
+    "is_disabled",
+    "timestamp_start",
+    "duration",
+    "workout_uuid",
+    "entry_index",
+    "index",
+    "exercise_uuid",
+    "exercise_name",
+    "weight_unit",
+    "rest_countdown_duration",
+    "reps",
+    "weight",
+    "set_type",
+    "user_uuid",
+    "trainer_uuid",
+    "timestamp",
+    "content",
+    "is_sent_by_trainer",
+]
+
+# Tipus de contingut de cada format d'exportació.
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _plain(value):
+    """
+    Converteix un valor de la base de dades a un tipus que es pot escriure en JSON o CSV.
+    """
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _record(record_type: str, row) -> dict:
+    """
+    Construeix un registre de l'exportació a partir d'una fila de resultat.
+    """
+    return {"type": record_type} | {
+        key: _plain(value) for key, value in row._mapping.items()
+    }
+
+
+def _streamed(session: Session, query) -> Iterator:
+    """
+    Executa una consulta amb un cursor del servidor i en retorna les files a mesura
+    que arriben, en grups de `EXPORT_BATCH_SIZE`.
+    """
+    return session.exec(
+        query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def export_records(user_uuid: UUID) -> Iterator[dict]:
+    """
+    Genera tots els registres de les dades d'un usuari: exercicis personalitzats,
+    entrenaments i plantilles (seguits de les seves entrades i sèries) i missatges.
+    Utilitza una sessió pròpia, perquè s'executa mentre s'envia la resposta.
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+
+    Returns:
+        Un iterador de diccionaris amb el camp `type` (exercise, workout, template,
+        entry, set o message) i els camps del registre.
+    """
+    with Session(engine) as session:
+        exercises = (
+            select(
+                ExerciseModel.uuid,
+                ExerciseModel.name,
+                ExerciseModel.description,
+                ExerciseModel.body_part,
+                ExerciseModel.type.label("exercise_type"),  # pyright: ignore[]
+                ExerciseModel.default_exercise_uuid,
+                ExerciseModel.is_disabled,
+            )
+            .where(ExerciseModel.creator_uuid == user_uuid)
+            .order_by(ExerciseModel.uuid)  # pyright: ignore[]
+        )
+        # Noms dels exercicis, per a les entrades dels entrenaments arxivats
+        exercise_names = {}
+        for row in _streamed(session, exercises):
+            exercise_names[str(row.uuid)] = row.name
+            yield _record("exercise", row)
+
+        # Una sola consulta ordenada: cada entrenament va seguit de les seves entrades
+        # i cada entrada de les seves sèries, així no cal guardar res en memòria.
+        trees = (
+            select(
+                WorkoutContentModel.uuid,
+                WorkoutContentModel.name,
+                WorkoutContentModel.description,
+                WorkoutInstanceModel.timestamp_start,
+                WorkoutInstanceModel.duration,
+                WorkoutEntryModel.index.label("entry_index"),  # pyright: ignore[]
+                WorkoutEntryModel.exercise_uuid,
+                ExerciseModel.name.label("exercise_name"),  # pyright: ignore[]
+                WorkoutEntryModel.weight_unit,
+                WorkoutEntryModel.rest_countdown_duration,
+                WorkoutEntryModel.packed_reps,
+                WorkoutEntryModel.packed_weights,
+                WorkoutEntryModel.packed_set_types,
+                WorkoutSetModel.index.label("set_index"),  # pyright: ignore[]
+                WorkoutSetModel.reps,
+                WorkoutSetModel.weight,
+                WorkoutSetModel.set_type,
+                ArchivedWorkoutModel.entries.label("archived_entries"),  # pyright: ignore[]
+            )
+            .select_from(WorkoutContentModel)
+            .outerjoin(WorkoutInstanceModel)
+            .outerjoin(ArchivedWorkoutModel)
+            .outerjoin(WorkoutEntryModel)
+            .outerjoin(
+                ExerciseModel,
+                WorkoutEntryModel.exercise_uuid == ExerciseModel.uuid,  # pyright: ignore[]
+            )
+            .outerjoin(
+                WorkoutSetModel,
+                (WorkoutSetModel.workout_uuid == WorkoutEntryModel.workout_uuid)  # pyright: ignore[]
+                & (WorkoutSetModel.entry_index == WorkoutEntryModel.index),
+            )
+            .where(WorkoutContentModel.creator_uuid == user_uuid)
+            # Els entrenaments en ordre cronològic; les plantilles (sense inici) al final
+            .order_by(
+                WorkoutInstanceModel.timestamp_start,
+                WorkoutContentModel.uuid,
+                WorkoutEntryModel.index,
+                WorkoutSetModel.index,
+            )
+        )
+        workout = entry = None
+        for row in _streamed(session, trees):
+            if row.uuid != workout:
+                workout, entry = row.uuid, None
+                yield {
+                    "type": "template" if row.timestamp_start is None else "workout",
+                    "uuid": str(row.uuid),
+                    "name": row.name,
+                    "description": row.description,
+                    "timestamp_start": row.timestamp_start,
+                    "duration": row.duration,
+                }
+                # Les entrades dels entrenaments arxivats es llegeixen de l'arxiu
+                for index, archived in enumerate(row.archived_entries or []):
+                    yield {
+                        "type": "entry",
+                        "workout_uuid": str(row.uuid),
+                        "index": index,
+                        "exercise_uuid": archived["exercise_uuid"],
+                        "exercise_name": exercise_names.get(archived["exercise_uuid"]),
+                        "weight_unit": archived["weight_unit"],
+                        "rest_countdown_duration": archived["rest_countdown_duration"],
+                    }
+                    for set_index, workout_set in enumerate(archived["sets"]):
+                        yield {
+                            "type": "set",
+                            "workout_uuid": str(row.uuid),
+                            "entry_index": index,
+                            "index": set_index,
+                            "reps": workout_set["reps"],
+                            "weight": workout_set["weight"],
+                            "set_type": workout_set["set_type"],
+                        }
+            if row.entry_index is None:  # Entrenament sense entrades o arxivat
+                continue
+
+            if row.entry_index != entry:
+                entry = row.entry_index
+                yield {
+                    "type": "entry",
+                    "workout_uuid": str(row.uuid),
+                    "index": row.entry_index,
+                    "exercise_uuid": str(row.exercise_uuid),
+                    "exercise_name": row.exercise_name,
+                    "weight_unit": _plain(row.weight_unit),
+                    "rest_countdown_duration": row.rest_countdown_duration,
+                }
+                # Les sèries empaquetades es despleguen amb la mateixa entrada
+                if row.packed_reps is not None:
+                    for index, (reps, weight, set_type) in enumerate(
+                        zip(row.packed_reps, row.packed_weights, row.packed_set_types)
+                    ):
+                        yield {
+                            "type": "set",
+                            "workout_uuid": str(row.uuid),
+                            "entry_index": row.entry_index,
+                            "index": index,
+                            "reps": reps,
+                            "weight": weight,
+                            "set_type": set_type,
+                        }
+
+            if row.set_index is not None:
+                yield {
+                    "type": "set",
+                    "workout_uuid": str(row.uuid),
+                    "entry_index": row.entry_index,
+                    "index": row.set_index,
+                    "reps": row.reps,
+                    "weight": row.weight,
+                    "set_type": _plain(row.set_type),
+                }
+
+        messages = (
+            select(
+                MessageModel.user_uuid,
+                MessageModel.trainer_uuid,
+                MessageModel.timestamp,
+                MessageModel.content,
+                MessageModel.is_sent_by_trainer,
+            )
+            .where(
+                (MessageModel.user_uuid == user_uuid)
+                | (MessageModel.trainer_uuid == user_uuid)
+            )
+            .order_by(MessageModel.timestamp)  # pyright: ignore[]
+        )
+        for row in _streamed(session, messages):
+            yield _record("message", row)
+
+
+def export_user_data(user_uuid: UUID, export_format: ExportFormat) -> Iterator[str]:
+    """
+    Genera l'exportació de les dades d'un usuari en el format demanat, en fragments
+    de text d'uns `EXPORT_CHUNK_SIZE` caràcters, per enviar-la com a resposta en streaming.
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+        export_format: El format de l'exportació (NDJSON o CSV).
+
+    Returns:
+        Un iterador de fragments de text de l'exportació.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == ExportFormat.CSV:
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    for record in export_records(user_uuid):
+        if writer is None:
+            buffer.write(json.dumps(record, ensure_ascii=False))
+            buffer.write("\n")
+        else:
+            writer.writerow(record)
+
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,130 @@
+from operator import attrgetter
+from uuid import UUID
+
+from archive import get_archived_history
+from fastapi import HTTPException
+from models.workout import WorkoutContentModel, WorkoutEntryModel, WorkoutSetModel
+from sqlalchemy import tuple_
+from sqlalchemy.orm import contains_eager
+from sqlmodel import Session, desc, select
+
+
+def encode_cursor(entry: WorkoutEntryModel) -> str:
+    """
+    Genera el cursor que apunta just després d'una entrada de l'historial.
+
+    Args:
+        entry: L'última entrada de la pàgina.
+
+    Returns:
+        Un cursor opac per demanar la pàgina següent.
+    """
+    return f"{entry.timestamp_start}_{entry.workout_uuid}_{entry.index}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, UUID, int]:
+    """
+    Llegeix un cursor generat per `encode_cursor`.
+
+    Args:
+        cursor: El cursor rebut del client.
+
+    Raises:
+        HTTPException: Si el cursor no és vàlid (codi 400).
+
+    Returns:
+        La clau (inici de l'entrenament, UUID de l'entrenament, índex de l'entrada).
+    """
+    try:
+        timestamp_start, workout_uuid, index = cursor.split("_")
+        return int(timestamp_start), UUID(workout_uuid), int(index)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_exercise_history(
+    session: Session,
+    user_uuid: UUID,
+    exercise_uuid: UUID,
+    before: str | None,
+    limit: int,
+) -> dict:
+    """
+    Obté una pàgina de l'historial d'un exercici d'un usuari, de la més recent a la més antiga.
+    Utilitza paginació per clau (keyset): la pàgina comença just després del cursor i es
+    resol amb un recorregut de l'índex (exercise_uuid, timestamp_start, workout_uuid, index),
+    sense que el cost depengui de la posició de la pàgina dins de l'historial.
+    Inclou les entrades dels entrenaments arxivats.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari propietari de l'historial.
+        exercise_uuid: L'UUID de l'exercici.
+        before: El cursor de la pàgina anterior, o None per a la primera pàgina.
+        limit: El nombre màxim d'entrades de la pàgina.
+
+    Returns:
+        Un diccionari amb les entrades de la pàgina i el cursor de la pàgina següent,
+        que es valida amb `ExerciseHistorySchema`.
+    """
+    # Ordre de l'historial, de la clau més gran (més recent) a la més petita
+    key = (
+        WorkoutEntryModel.timestamp_start,
+        WorkoutEntryModel.workout_uuid,
+        WorkoutEntryModel.index,
+    )
+
+    # Claus de les entrades de la pàgina. Se'n demana una de més per saber si n'hi ha més.
+    page = (
+        select(WorkoutEntryModel.workout_uuid, WorkoutEntryModel.index)
+        .join(
+            WorkoutContentModel,
+            WorkoutEntryModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+        .where(WorkoutEntryModel.exercise_uuid == exercise_uuid)
+        .where(WorkoutEntryModel.timestamp_start != None)  # Exclou les plantilles
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .order_by(*(desc(column) for column in key))
+        .limit(limit + 1)
+    )
+    cursor = decode_cursor(before) if before is not None else None
+    if cursor is not None:
+        page = page.where(tuple_(*key) < tuple_(*cursor))
+    page = page.subquery()
+
+    # Carrega les entrades de la pàgina amb les seves sèries en la mateixa consulta
+    query = (
+        select(WorkoutEntryModel)
+        .join(
+            page,
+            (WorkoutEntryModel.workout_uuid == page.c.workout_uuid)  # pyright: ignore[]
+            & (WorkoutEntryModel.index == page.c.index),
+        )
+        # La condició sobre l'inici permet llegir només la partició del mes de cada entrada
+        # quan 'workout_set' està partida (vegeu `partitioning.py`). El servidor omple l'inici
+        # de les sèries anteriors a la columna en iniciar-se (vegeu `schema_upgrades.py`).
+        .outerjoin(
+            WorkoutEntryModel.sets.and_(  # pyright: ignore[]
+                WorkoutSetModel.timestamp_start == WorkoutEntryModel.timestamp_start
+            )
+        )
+        .options(contains_eager(WorkoutEntryModel.sets))  # pyright: ignore[]
+        .order_by(*(desc(column) for column in key), WorkoutSetModel.index)
+    )
+    entries = list(session.exec(query).unique().all())
+
+    # Les entrades dels entrenaments arxivats (vegeu `archive.py`) s'intercalen per la mateixa clau
+    archived = get_archived_history(session, user_uuid, exercise_uuid, cursor, limit + 1)
+    if archived:
+        entries = sorted(
+            entries + archived,
+            key=attrgetter("timestamp_start", "workout_uuid", "index"),
+            reverse=True,
+        )[: limit + 1]
+
+    next_cursor = None
+    if len(entries) > limit:  # Hi ha més entrades després d'aquesta pàgina
+        entries = entries[:limit]
+        next_cursor = encode_cursor(entries[-1])
+
+    return {"entries": entries, "next_cursor": next_cursor}
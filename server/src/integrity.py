@@ -0,0 +1,84 @@
+from models.record import PersonalRecordModel
+from models.trainer import TrainerRecommendationModel
+from models.workout import (
+    ArchivedWorkoutExerciseModel,
+    ArchivedWorkoutModel,
+    LatestWorkoutEntryModel,
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+    WorkoutSetModel,
+)
+from sqlalchemy import exists
+from sqlmodel import Session, func, select
+
+
+def find_orphans(session: Session) -> dict[str, int]:
+    """
+    Compta les files que fan referència a un entrenament, entrada o sèrie que ja no existeix.
+    Amb les claus foranes en cascada no n'hi hauria d'haver cap; s'utilitza per comprovar
+    la integritat de les dades, per exemple després d'actualitzar un servidor existent.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        Un diccionari amb el nombre de files òrfenes de cada taula.
+    """
+
+    def content_exists(workout_uuid):
+        # L'entrenament referenciat existeix
+        return exists().where(WorkoutContentModel.uuid == workout_uuid)
+
+    def entry_exists(workout_uuid, entry_index):
+        # L'entrada referenciada existeix
+        return exists().where(
+            (WorkoutEntryModel.workout_uuid == workout_uuid)
+            & (WorkoutEntryModel.index == entry_index)
+        )
+
+    checks = {
+        "workout_instance": (
+            WorkoutInstanceModel,
+            content_exists(WorkoutInstanceModel.workout_uuid),
+        ),
+        "workout_entry": (
+            WorkoutEntryModel,
+            content_exists(WorkoutEntryModel.workout_uuid),
+        ),
+        "workout_set": (
+            WorkoutSetModel,
+            entry_exists(WorkoutSetModel.workout_uuid, WorkoutSetModel.entry_index),
+        ),
+        "archived_workout": (
+            ArchivedWorkoutModel,
+            content_exists(ArchivedWorkoutModel.workout_uuid),
+        ),
+        "archived_workout_exercise": (
+            ArchivedWorkoutExerciseModel,
+            exists().where(
+                ArchivedWorkoutModel.workout_uuid == ArchivedWorkoutExerciseModel.workout_uuid
+            ),
+        ),
+        "latest_workout_entry": (
+            LatestWorkoutEntryModel,
+            entry_exists(
+                LatestWorkoutEntryModel.workout_uuid, LatestWorkoutEntryModel.entry_index
+            ),
+        ),
+        "personal_record": (
+            PersonalRecordModel,
+            content_exists(PersonalRecordModel.workout_uuid),
+        ),
+        "recommendation": (
+            TrainerRecommendationModel,
+            content_exists(TrainerRecommendationModel.workout_uuid),
+        ),
+    }
+
+    return {
+        table: session.exec(
+            select(func.count()).select_from(model).where(~parent_exists)
+        ).one()
+        for table, (model, parent_exists) in checks.items()
+    }
@@ -0,0 +1,127 @@
+from uuid import UUID
+
+from models.workout import (
+    LatestWorkoutEntryModel,
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+)
+from schemas.workout_schema import WorkoutContentSchema
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, desc, select
+
+
+def update_latest_entries(
+    session: Session, user_uuid: UUID, workout_uuid: UUID, workout: WorkoutContentSchema
+):
+    """
+    Fa que els punters a l'última entrada de cada exercici apuntin a un entrenament nou,
+    si és més recent que l'entrada a la qual apunten ara. Si un exercici apareix diverses
+    vegades a l'entrenament, s'apunta a l'última entrada.
+    La sentència s'executa dins la transacció de la sessió.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        workout_uuid: L'UUID de l'entrenament afegit.
+        workout: L'entrenament afegit.
+    """
+    if workout.instance is None:  # Les plantilles no són entrades registrades
+        return
+
+    # Última entrada de cada exercici dins de l'entrenament
+    entry_indexes = {
+        entry.exercise.uuid: i
+        for i, entry in enumerate(workout.entries)
+        if entry.exercise.uuid is not None
+    }
+    if not entry_indexes:
+        return
+
+    statement = insert(LatestWorkoutEntryModel).values(
+        [
+            {
+                "user_uuid": user_uuid,
+                "exercise_uuid": exercise_uuid,
+                "workout_uuid": workout_uuid,
+                "entry_index": entry_index,
+                "timestamp_start": workout.instance.timestamp_start,
+            }
+            for exercise_uuid, entry_index in entry_indexes.items()
+        ]
+    )
+    # Només substitueix el punter si l'entrenament nou és més recent
+    # (els entrenaments es poden afegir desordenats, per exemple en sincronitzar)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_uuid", "exercise_uuid"],
+        set_={
+            "workout_uuid": statement.excluded.workout_uuid,
+            "entry_index": statement.excluded.entry_index,
+            "timestamp_start": statement.excluded.timestamp_start,
+        },
+        where=LatestWorkoutEntryModel.timestamp_start  # pyright: ignore[]
+        <= statement.excluded.timestamp_start,
+    )
+    session.exec(statement)  # pyright: ignore[]
+
+
+def rebuild_latest_entries(
+    session: Session,
+    user_uuid: UUID | None = None,
+    exercise_uuids: list[UUID] | None = None,
+):
+    """
+    Torna a calcular els punters a l'última entrada de cada exercici a partir de l'historial.
+    S'utilitza per omplir la taula amb l'historial existent i després d'eliminar entrenaments.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari a recalcular. Si és None, es recalculen tots els usuaris.
+        exercise_uuids: Els exercicis a recalcular. Si és None, es recalculen tots.
+    """
+    # DISTINCT ON es queda amb l'entrada més recent de cada (usuari, exercici)
+    latest_entries = (
+        select(
+            WorkoutContentModel.creator_uuid,
+            WorkoutEntryModel.exercise_uuid,
+            WorkoutEntryModel.workout_uuid,
+            WorkoutEntryModel.index,
+            WorkoutInstanceModel.timestamp_start,
+        )
+        .join(
+            WorkoutContentModel,
+            WorkoutEntryModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+        .join(
+            WorkoutInstanceModel,
+            WorkoutInstanceModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+        .distinct(WorkoutContentModel.creator_uuid, WorkoutEntryModel.exercise_uuid)
+        .order_by(
+            WorkoutContentModel.creator_uuid,
+            WorkoutEntryModel.exercise_uuid,
+            desc(WorkoutInstanceModel.timestamp_start),
+            desc(WorkoutEntryModel.index),
+        )
+    )
+    clear_entries = delete(LatestWorkoutEntryModel)
+    if user_uuid is not None:
+        latest_entries = latest_entries.where(WorkoutContentModel.creator_uuid == user_uuid)
+        clear_entries = clear_entries.where(LatestWorkoutEntryModel.user_uuid == user_uuid)  # pyright: ignore[]
+    if exercise_uuids is not None:
+        latest_entries = latest_entries.where(
+            WorkoutEntryModel.exercise_uuid.in_(exercise_uuids)  # pyright: ignore[]
+        )
+        clear_entries = clear_entries.where(
+            LatestWorkoutEntryModel.exercise_uuid.in_(exercise_uuids)  # pyright: ignore[]
+        )
+
+    session.exec(clear_entries)  # pyright: ignore[]
+    session.exec(
+        insert(LatestWorkoutEntryModel).from_select(  # pyright: ignore[]
+            ["user_uuid", "exercise_uuid", "workout_uuid", "entry_index", "timestamp_start"],
+            latest_entries,
+        )
+    )
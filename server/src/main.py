@@ -1,17 +1,24 @@
 from contextlib import asynccontextmanager
 from time import sleep
 
+from compression import CompressionMiddleware
 from config import SERVER_NAME
 from data.default_exercises import add_default_exercises
 from data.default_interests import add_default_interests
+from data.schema_upgrades import upgrade_schema
 from db import engine
 from fastapi import FastAPI
 from models.core import HealthCheck
+from msgpack_middleware import MsgpackMiddleware
+from responses import FastJSONResponse
 from routes.exercise_router import router as exercise_router
+from routes.export_router import router as export_router
+from routes.import_router import router as import_router
 from routes.template_router import router as template_router
 from routes.workout_router import router as workout_router
 from routes.trainer_router import router as trainer_router
 from routes.message_router import router as message_router
+from routes.sync_router import router as sync_router
 from security import router as security_router
 from sqlmodel import SQLModel
 from fastapi.middleware.cors import CORSMiddleware
@@ -28,13 +35,16 @@ async def lifespan(_: FastAPI):
     SQLModel.metadata.create_all(
         engine
     )  # Crear totes les taues dels models definits amb SQLModel.
+    upgrade_schema()  # Afegir les columnes noves a les taules ja existents
     add_default_exercises()  # Afegir exercicis predeterminats
     add_default_interests()  # Afegir interessos predeterminats
 
     yield
 
 
-app = FastAPI(lifespan=lifespan)  # Objecte general de FastAPI
+app = FastAPI(
+    lifespan=lifespan, default_response_class=FastJSONResponse
+)  # Objecte general de FastAPI. Les respostes JSON es serialitzen amb orjson (vegeu responses.py)
 
 # Configurar el Cross-Origin Resource Sharing per l'aplicatiu Web.
 app.add_middleware(
@@ -43,8 +53,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Permetre als clients web llegir l'ETag de les respostes
 )
 
+# Permetre enviar i rebre MessagePack a les rutes d'entrenaments, plantilles i sincronització
+# (vegeu msgpack_middleware.py).
+app.add_middleware(MsgpackMiddleware)
+
+# Comprimir les respostes segons `Accept-Encoding` (vegeu compression.py). S'afegeix l'últim
+# perquè s'executi el primer i comprimeixi les respostes ja convertides a MessagePack.
+app.add_middleware(CompressionMiddleware)
+
 # Importar routers
 app.include_router(security_router)
 app.include_router(exercise_router)
@@ -52,6 +71,9 @@ app.include_router(workout_router)
 app.include_router(template_router)
 app.include_router(trainer_router)
 app.include_router(message_router)
+app.include_router(sync_router)
+app.include_router(export_router)
+app.include_router(import_router)
 
 
 @app.get("/", response_model=HealthCheck, tags=["status"], description="Health check")
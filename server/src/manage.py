@@ -0,0 +1,266 @@
+import argparse
+import sys
+
+from account_deletion import resume_account_deletions
+from archive import archive_old_workouts
+from backfills import backfill_entry_timestamps, backfill_set_weights, backfill_workout_counts
+from config import ARCHIVE_AFTER_DAYS
+from csv_import import import_workouts_csv
+from daily_stats import rebuild_daily_stats
+from db import engine
+from integrity import find_orphans
+from latest_entries import rebuild_latest_entries
+from models.users import UserConfig, UserModel
+from partitioning import SET_PARTITION_MONTHS_AHEAD, create_set_partitions, partition_workout_sets
+from records import rebuild_personal_records
+from schemas.types.enums import WeightUnit
+from set_storage import get_storage_stats
+from sqlmodel import Session, select
+
+
+def backfill_stats(_: argparse.Namespace):
+    """
+    Omple el resum diari d'entrenaments (`workout_daily_stats`) amb tot l'historial existent.
+    """
+    with Session(engine) as session:
+        rebuild_daily_stats(session)
+        session.commit()
+    print("Workout daily stats rebuilt successfully.")
+
+
+def rebuild_records(_: argparse.Namespace):
+    """
+    Torna a calcular els rècords personals (`personal_record`) a partir de l'historial de sèries.
+    """
+    with Session(engine) as session:
+        rebuild_personal_records(session)
+        session.commit()
+    print("Personal records rebuilt successfully.")
+
+
+def rebuild_latest(_: argparse.Namespace):
+    """
+    Torna a calcular els punters a l'última entrada de cada exercici (`latest_workout_entry`).
+    """
+    with Session(engine) as session:
+        rebuild_latest_entries(session)
+        session.commit()
+    print("Latest workout entries rebuilt successfully.")
+
+
+def backfill_timestamps(_: argparse.Namespace):
+    """
+    Omple l'inici de l'entrenament (`workout_entry.timestamp_start`) de les entrades existents.
+    """
+    with Session(engine) as session:
+        updated = backfill_entry_timestamps(session)
+        session.commit()
+    print(f"Workout entry timestamps backfilled successfully ({updated} entries).")
+
+
+def backfill_weights(_: argparse.Namespace):
+    """
+    Omple el pes en quilograms (`workout_set.weight_kg`) de les sèries existents.
+    """
+    with Session(engine) as session:
+        updated = backfill_set_weights(session)
+        session.commit()
+    print(f"Workout set weights backfilled successfully ({updated} sets).")
+
+
+def backfill_counts(_: argparse.Namespace):
+    """
+    Omple el nombre d'entrades i de sèries (`workout_content.entry_count` i `set_count`) dels entrenaments existents.
+    """
+    with Session(engine) as session:
+        updated = backfill_workout_counts(session)
+        session.commit()
+    print(f"Workout entry and set counts backfilled successfully ({updated} workouts).")
+
+
+
+def storage_stats(_: argparse.Namespace):
+    """
+    Mostra la mida de les taules d'entrenaments i com estan desades les sèries.
+    """
+    with Session(engine) as session:
+        stats = get_storage_stats(session)
+    print(f"workout_entry: {stats['workout_entry_bytes'] / 1024 / 1024:.2f} MB")
+    print(f"workout_set: {stats['workout_set_bytes'] / 1024 / 1024:.2f} MB")
+    print(f"archived_workout: {stats['archived_workout_bytes'] / 1024 / 1024:.2f} MB")
+    print(f"Sets stored as rows: {stats['row_sets']}")
+    print(f"Sets stored packed: {stats['packed_sets']}")
+
+
+
+def check_orphans(_: argparse.Namespace):
+    """
+    Comprova que no hi hagi files que facin referència a entrenaments, entrades
+    o sèries eliminats. Acaba amb codi d'error si en troba alguna.
+    """
+    with Session(engine) as session:
+        orphans = find_orphans(session)
+    for table, count in orphans.items():
+        print(f"{table}: {count} orphan rows")
+    if any(orphans.values()):
+        sys.exit(1)
+    print("No orphan rows found.")
+
+
+
+def resume_deletions(args: argparse.Namespace):
+    """
+    Reprèn les eliminacions de comptes que no s'han completat.
+    Acaba amb un codi d'error si alguna eliminació falla.
+    """
+    completed, failures = resume_account_deletions(args.include_running)
+    for deletion_uuid, error in failures:
+        print(f"Failed to delete account (deletion {deletion_uuid}): {error}")
+    if failures:
+        print(f"Resumed {completed} account deletions, {len(failures)} failed (they can be resumed again).")
+        sys.exit(1)
+    print(f"Account deletions resumed successfully ({completed} accounts).")
+
+
+def partition_sets(args: argparse.Namespace):
+    """
+    Converteix la taula de sèries (`workout_set`) en una taula partida per mesos.
+    """
+    with Session(engine) as session:
+        created = partition_workout_sets(session, args.months_ahead)
+        session.commit()
+    print(f"Workout sets partitioned successfully ({created} monthly partitions).")
+
+
+def create_partitions(args: argparse.Namespace):
+    """
+    Crea les particions mensuals de `workout_set` dels propers mesos.
+    """
+    with Session(engine) as session:
+        created = create_set_partitions(session, args.months_ahead)
+        session.commit()
+    print(f"Workout set partitions created successfully ({created} new partitions).")
+
+
+def archive_workouts(args: argparse.Namespace):
+    """
+    Arxiva els entrenaments antics (vegeu `archive.py`).
+    """
+    archived = archive_old_workouts(args.older_than_days)
+    print(f"Workouts archived successfully ({archived} workouts).")
+
+
+def import_csv(args: argparse.Namespace):
+    """
+    Importa a l'historial d'un usuari els entrenaments d'un CSV exportat d'una altra aplicació.
+    """
+    with Session(engine) as session:
+        user_settings = session.exec(
+            select(UserConfig).join(UserModel).where(UserModel.username == args.username)
+        ).first()
+        if user_settings is None:
+            print(f"User '{args.username}' not found.")
+            sys.exit(1)
+
+        with open(args.path, encoding="utf-8-sig", newline="") as lines:
+            summary = import_workouts_csv(
+                session,
+                user_settings.user_uuid,
+                user_settings.timezone,
+                lines,
+                WeightUnit(args.weight_unit),
+            )
+        session.commit()
+    print(
+        f"Imported {summary['workouts']} workouts, {summary['entries']} entries and "
+        f"{summary['sets']} sets ({summary['created_exercises']} new exercises, "
+        f"{summary['skipped_workouts']} workouts already present)."
+    )
+
+
+# Ordres disponibles: nom de l'ordre, descripció i funció que l'executa.
+COMMANDS = [
+    ("backfill-stats", "Rebuild the daily workout stats from the workout history", backfill_stats),
+    ("rebuild-records", "Rebuild the personal records from the workout history", rebuild_records),
+    ("rebuild-latest-entries", "Rebuild the latest entry of each exercise from the workout history", rebuild_latest),
+    ("backfill-entry-timestamps", "Copy the workout start time to existing workout entries", backfill_timestamps),
+    ("backfill-set-weights", "Store the weight in kilograms of existing workout sets", backfill_weights),
+    ("backfill-workout-counts", "Store the number of entries and sets of existing workouts", backfill_counts),
+    ("storage-stats", "Show the size of the workout tables and how sets are stored", storage_stats),
+    ("check-orphans", "Check that no rows reference deleted workouts, entries or sets", check_orphans),
+    ("resume-account-deletions", "Finish account deletions that were interrupted", resume_deletions),
+    ("partition-workout-sets", "Convert the workout set table into monthly partitions", partition_sets),
+    ("create-set-partitions", "Create the workout set partitions for the coming months", create_partitions),
+    ("archive-workouts", "Move the entries and sets of old workouts to the archive table", archive_workouts),
+    ("import-csv", "Import a user's workout history from a CSV exported by another app", import_csv),
+]
+
+# Argument comú de les ordres que creen particions.
+MONTHS_AHEAD_ARGUMENT = (
+    "--months-ahead",
+    {
+        "type": int,
+        "default": SET_PARTITION_MONTHS_AHEAD,
+        "help": "Number of future months to create partitions for",
+    },
+)
+
+# Arguments de les ordres que en necessiten: nom de l'ordre i llista de (nom, opcions).
+ARGUMENTS = {
+    "partition-workout-sets": [MONTHS_AHEAD_ARGUMENT],
+    "create-set-partitions": [MONTHS_AHEAD_ARGUMENT],
+    "archive-workouts": [
+        (
+            "--older-than-days",
+            {
+                "type": int,
+                "default": ARCHIVE_AFTER_DAYS,
+                "help": "Minimum age in days of the workouts to archive",
+            },
+        ),
+    ],
+    "resume-account-deletions": [
+        (
+            "--include-running",
+            {
+                "action": "store_true",
+                "help": "Also resume deletions marked as running, e.g. after the server stopped mid-deletion",
+            },
+        ),
+    ],
+    "import-csv": [
+        ("username", {"help": "User that owns the imported workouts"}),
+        ("path", {"help": "CSV file to import"}),
+        (
+            "--weight-unit",
+            {
+                "choices": [unit.value for unit in WeightUnit],
+                "default": WeightUnit.METRIC.value,
+                "help": "Unit of the weights, if the weight column does not say",
+            },
+        ),
+    ],
+}
+
+
+def main():
+    """
+    Punt d'entrada de les tasques de manteniment del servidor.
+    S'executa des del directori del codi font, per exemple:
+    `python manage.py backfill-stats`.
+    """
+    parser = argparse.ArgumentParser(description="Ultra server maintenance tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, description, handler in COMMANDS:
+        subparser = subparsers.add_parser(name, help=description)
+        for argument, options in ARGUMENTS.get(name, []):
+            subparser.add_argument(argument, **options)
+        subparser.set_defaults(handler=handler)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
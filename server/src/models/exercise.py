@@ -3,8 +3,9 @@ from uuid import uuid4
 
 import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlmodel import Column, Enum, Field
+from sqlmodel import Column, Enum, Field, Index
 
+from models.sync import change_version_column
 from schemas.exercise_schema import DefaultExerciseSchema, ExerciseSchema
 from schemas.types.enums import BodyPart, ExerciseType
 
@@ -42,11 +43,16 @@ class ExerciseModel(ExerciseSchema, table=True):
 
     # Clau forana que enllaça amb l'UUID de l'usuari creador (de la taula 'users').
     creator_uuid: UUID_TYPE = Field(foreign_key="users.uuid")
+    # Versió de canvi de l'exercici. S'actualitza cada vegada que es crea, modifica o arxiva.
+    version: int | None = Field(default=None, sa_column=change_version_column())
     # El camp 'is_disabled' i 'default_exercise_uuid' s'hereten de ExerciseSchema
     # i SQLModel els gestionarà adequadament per a la taula si no es redefineixen aquí.
     # `is_disabled` tindrà el seu valor per defecte de `Field(default=False)` de ExerciseSchema.
     # `default_exercise_uuid` serà nullable com es defineix a ExerciseSchema.
 
+    # Índex per obtenir els exercicis d'un usuari modificats després d'una versió.
+    __table_args__ = (Index("ix_exercise_creator_version", "creator_uuid", "version"),)
+
 
 class DefaultExerciseModel(DefaultExerciseSchema, table=True):
     """
@@ -0,0 +1,29 @@
+from uuid import UUID as UUID_TYPE
+
+from sqlmodel import BigInteger, Column, Enum, Field
+
+from schemas.record_schema import PersonalRecordSchema
+from schemas.types.enums import RecordKind
+
+
+class PersonalRecordModel(PersonalRecordSchema, table=True):
+    """
+    Model que representa el millor resultat d'un usuari en un exercici per a cada tipus de rècord.
+    S'actualitza en la mateixa transacció que afegeix l'entrenament, de manera que els rècords
+    es poden consultar sense recórrer tot l'historial de sèries.
+    """
+
+    __tablename__ = "personal_record"  # Nom de la taula a la base de dades # pyright: ignore[]
+
+    # Clau forana que enllaça amb l'UUID de l'usuari. Part de la clau primària.
+    user_uuid: UUID_TYPE = Field(foreign_key="users.uuid", primary_key=True)
+    # Clau forana que enllaça amb l'UUID de l'exercici. Part de la clau primària.
+    exercise_uuid: UUID_TYPE = Field(foreign_key="exercise.uuid", primary_key=True)
+    # Tipus de rècord. Part de la clau primària.
+    record_kind: RecordKind = Field(
+        sa_column=Column(Enum(RecordKind), primary_key=True)
+    )
+
+    # Clau forana que enllaça amb l'entrenament en què es va aconseguir el rècord.
+    workout_uuid: UUID_TYPE = Field(foreign_key="workout_content.uuid")
+    timestamp_start: int = Field(sa_column=Column(BigInteger(), nullable=False))
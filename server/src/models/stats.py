@@ -0,0 +1,29 @@
+from datetime import date
+from uuid import UUID as UUID_TYPE
+
+from sqlmodel import BigInteger, Column, Field, Float, SQLModel
+
+
+class WorkoutDailyStatsModel(SQLModel, table=True):
+    """
+    Model que representa el resum dels entrenaments d'un usuari en un dia.
+    S'actualitza en la mateixa transacció que afegeix l'entrenament, de manera que
+    les estadístiques es poden calcular llegint un registre per dia en lloc de
+    recórrer tot l'historial d'entrenaments.
+    """
+
+    __tablename__ = "workout_daily_stats"  # Nom de la taula a la base de dades # pyright: ignore[]
+
+    # Clau forana que enllaça amb l'UUID de l'usuari. Part de la clau primària.
+    user_uuid: UUID_TYPE = Field(foreign_key="users.uuid", primary_key=True)
+    # Dia (en la zona horària de l'usuari) en què van començar els entrenaments. Part de la clau primària.
+    day: date = Field(primary_key=True)
+
+    workouts: int = 0  # Nombre d'entrenaments realitzats aquell dia.
+    duration: int = Field(
+        default=0, sa_column=Column(BigInteger(), nullable=False)
+    )  # Durada total dels entrenaments (en segons).
+    sets: int = 0  # Nombre total de sèries realitzades.
+    volume: float = Field(
+        default=0, sa_column=Column(Float(), nullable=False)
+    )  # Volum total (repeticions x pes, en quilograms).
@@ -0,0 +1,67 @@
+from uuid import UUID as UUID_TYPE
+
+from sqlmodel import BigInteger, Column, Enum, Field, Index, Sequence, SQLModel
+
+from schemas.types.enums import SyncEntityType
+
+# Seqüència global que genera les versions de canvi.
+# Cada vegada que es crea, modifica o elimina una entitat sincronitzable se li assigna
+# un valor nou d'aquesta seqüència, de manera que les versions sempre són creixents.
+# Es vincula a les metadades de SQLModel perquè `create_all` la creï encara que les taules ja existeixin.
+change_version_seq = Sequence("change_version_seq", metadata=SQLModel.metadata)
+
+
+def change_version_column() -> Column:
+    """
+    Retorna una columna de versió de canvi.
+    Si no es proporciona cap valor, la base de dades assigna el següent valor de la seqüència.
+
+    Returns:
+        Una columna BigInteger no nul·la i amb valor per defecte `nextval('change_version_seq')`.
+    """
+    return Column(
+        BigInteger(),
+        server_default=change_version_seq.next_value(),
+        nullable=False,
+    )
+
+
+class DeletedEntityModel(SQLModel, table=True):
+    """
+    Model que representa una marca d'eliminació (tombstone) d'una entitat sincronitzable.
+    Permet que els clients sàpiguen quines entitats s'han eliminat des de l'última sincronització.
+    """
+
+    __tablename__ = "deleted_entity"  # Nom de la taula a la base de dades # pyright: ignore[]
+
+    # Clau forana que enllaça amb l'UUID de l'usuari propietari. Part de la clau primària.
+    user_uuid: UUID_TYPE = Field(foreign_key="users.uuid", primary_key=True)
+    # UUID de l'entitat eliminada. Part de la clau primària.
+    entity_uuid: UUID_TYPE = Field(primary_key=True)
+
+    # Tipus d'entitat eliminada (entrenament, plantilla o exercici).
+    entity_type: SyncEntityType = Field(
+        sa_column=Column(Enum(SyncEntityType), nullable=False)
+    )
+    # Versió de canvi en què es va produir l'eliminació.
+    version: int | None = Field(default=None, sa_column=change_version_column())
+
+    # Índex per obtenir ràpidament les eliminacions d'un usuari posteriors a una versió.
+    __table_args__ = (Index("ix_deleted_entity_user_version", "user_uuid", "version"),)
+
+
+class UserChangeVersionModel(SQLModel, table=True):
+    """
+    Model que representa l'última versió de canvi de les dades d'un usuari.
+    Cada transacció que modifica les dades sincronitzables d'un usuari actualitza aquesta fila
+    abans d'assignar cap versió (vegeu `next_change_version`). El bloqueig de la fila fa que les
+    transaccions d'un mateix usuari s'executin una darrere l'altra, de manera que l'ordre de les
+    versions coincideix amb l'ordre de confirmació i la sincronització no se'n salta cap.
+    """
+
+    __tablename__ = "user_change_version"  # Nom de la taula a la base de dades # pyright: ignore[]
+
+    # Clau forana que enllaça amb l'UUID de l'usuari. És la clau primària.
+    user_uuid: UUID_TYPE = Field(foreign_key="users.uuid", primary_key=True)
+    # Última versió de canvi assignada a les dades de l'usuari.
+    version: int = Field(sa_column=Column(BigInteger(), nullable=False))
@@ -2,6 +2,7 @@ from uuid import UUID as UUID_TYPE
 
 from sqlmodel import Field, Relationship, SQLModel, UniqueConstraint
 
+from models.sync import change_version_column
 from models.users import TrainerModel, UserModel
 from models.workout import WorkoutContentModel
 
@@ -51,6 +52,10 @@ class TrainerRecommendationModel(SQLModel, table=True):
         }
     )
 
+    # Versió de canvi de la recomanació, assignada quan es crea.
+    # S'utilitza per calcular l'ETag de les recomanacions d'un usuari.
+    version: int | None = Field(default=None, sa_column=change_version_column())
+
     # Defineix una restricció d'unicitat per a la combinació de user_uuid, trainer_uuid i workout_uuid.
     # Encara que és tècnicament redundant, aquesta restricció és necessària per eviar que SQLModel
     # crei conflictes a l'hora de treballar amb una clau primària composta.
@@ -3,9 +3,10 @@ from uuid import UUID as UUID_TYPE
 from uuid import uuid4
 
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlmodel import Column, Enum, Field, Relationship, SQLModel
 
-from schemas.user_schema import UserSchema
+from schemas.types.enums import AccountDeletionStatus
+from schemas.user_schema import AccountDeletionSchema, UserSchema
 
 
 class UserModel(UserSchema, table=True):
@@ -120,3 +121,29 @@ class UserConfig(SQLModel, table=True):
     # Indicador booleà per marcar si el compte de l'usuari està desactivat.
     # Per defecte, un compte nou no està desactivat (False).
     is_disabled: bool = Field(default=False)
+
+    # Zona horària de l'usuari (nom IANA, p. ex. "Europe/Madrid").
+    # Determina a quin dia pertany cada entrenament a les estadístiques.
+    timezone: str = Field(default="UTC", sa_column_kwargs={"server_default": "UTC"})
+
+
+class AccountDeletionModel(AccountDeletionSchema, table=True):
+    """
+    Model que registra l'eliminació d'un compte i el seu progrés (vegeu `account_deletion.py`).
+    Es conserva després d'eliminar el compte perquè el client en pugui consultar l'estat.
+    """
+
+    __tablename__ = "account_deletion"  # Nom de la taula # pyright: ignore[]
+
+    # Identificador de l'eliminació. Es genera automàticament.
+    uuid: UUID_TYPE = Field(default_factory=uuid4, primary_key=True)
+    # UUID de l'usuari eliminat. No és una clau forana perquè l'usuari s'elimina al final del procés.
+    user_uuid: UUID_TYPE = Field(index=True)
+    # Estat de l'eliminació. S'emmagatzema com un tipus Enum a la base de dades.
+    status: AccountDeletionStatus = Field(
+        sa_column=Column(Enum(AccountDeletionStatus), nullable=False),
+        default=AccountDeletionStatus.PENDING,
+    )
+    # Progrés: entrenaments i plantilles del compte i quants se n'han eliminat.
+    total_workouts: int = 0
+    deleted_workouts: int = 0
@@ -1,17 +1,23 @@
 from uuid import UUID as UUID_TYPE
 from uuid import uuid4
 
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlmodel import (
     BigInteger,
     Column,
     Enum,
     Field,
+    Float,
     ForeignKeyConstraint,
+    Index,
+    Integer,
     Relationship,
     SQLModel,
+    String,
 )
 
+from models.sync import change_version_column
 from schemas.types.enums import SetType, WeightUnit
 
 
@@ -44,21 +50,44 @@ class WorkoutContentModel(SQLModel, table=True):
     # Clau forana que enllaça amb l'UUID de l'usuari creador (de la taula 'users').
     creator_uuid: UUID_TYPE = Field(foreign_key="users.uuid")
 
+    # Versió de canvi de l'entrenament. S'actualitza cada vegada que es crea o modifica,
+    # i permet als clients sincronitzar només el que ha canviat (vegeu `/user/sync`).
+    version: int | None = Field(default=None, sa_column=change_version_column())
+
+    # Nombre d'entrades i de sèries, desats en crear o modificar l'entrenament, perquè les
+    # llistes resumides (`view=summary`) no hagin de llegir les entrades ni les sèries.
+    # Els dels entrenaments anteriors a aquestes columnes s'omplen en iniciar el servidor
+    # (vegeu `DATA_UPGRADES` a data/schema_upgrades.py).
+    entry_count: int | None = None
+    set_count: int | None = None
+
     # Relació un-a-un (o un-a-zero) amb WorkoutInstanceModel.
     # `uselist=False` indica que és una relació a un sol objecte.
     # `cascade="all"` significa que les operacions (com eliminar) en WorkoutContentModel
     # es propagaran a la WorkoutInstanceModel associada.
+    # `passive_deletes=True` deixa l'eliminació a la clau forana (ON DELETE CASCADE),
+    # sense carregar la instància abans d'eliminar l'entrenament.
     instance: "WorkoutInstanceModel" = Relationship(
         sa_relationship_kwargs={
             "uselist": False,
             "cascade": "all, delete-orphan",
+            "passive_deletes": True,
         }  # Afegit delete-orphan
     )
 
     # Relació un-a-molts amb WorkoutEntryModel.
     # `cascade="all"` propaga operacions a les entrades associades.
+    # Les entrades i les seves sèries les elimina la base de dades (ON DELETE CASCADE).
     entries: list["WorkoutEntryModel"] = Relationship(
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"}  # Afegit delete-orphan
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+        }  # Afegit delete-orphan
+    )
+
+    # Índex per obtenir els entrenaments d'un usuari modificats després d'una versió.
+    __table_args__ = (
+        Index("ix_workout_content_creator_version", "creator_uuid", "version"),
     )
 
 
@@ -72,8 +101,9 @@ class WorkoutInstanceModel(SQLModel, table=True):
 
     # Clau forana que enllaça amb l'UUID de WorkoutContentModel.
     # També és la clau primària d'aquesta taula, formant una relació un-a-un.
+    # Si s'elimina l'entrenament, la base de dades elimina la seva instància.
     workout_uuid: UUID_TYPE = Field(
-        foreign_key="workout_content.uuid", primary_key=True
+        foreign_key="workout_content.uuid", primary_key=True, ondelete="CASCADE"
     )
     # Marca de temps Unix (en milisegons) de quan va començar l'entrenament.
     # S'emmagatzema com un BigInteger per acomodar valors grans.
@@ -90,8 +120,9 @@ class WorkoutEntryModel(SQLModel, table=True):
     __tablename__ = "workout_entry"  # Nom de la taula # pyright: ignore[]
 
     # Part de la clau primària composta: UUID de l'entrenament al qual pertany.
+    # Si s'elimina l'entrenament, la base de dades elimina les seves entrades (i les seves sèries).
     workout_uuid: UUID_TYPE = Field(
-        foreign_key="workout_content.uuid", primary_key=True
+        foreign_key="workout_content.uuid", primary_key=True, ondelete="CASCADE"
     )
     # Part de la clau primària composta: índex de l'entrada dins de l'entrenament (per mantenir l'ordre).
     index: int = Field(primary_key=True)
@@ -108,6 +139,28 @@ class WorkoutEntryModel(SQLModel, table=True):
     # Clau forana que enllaça amb l'UUID de l'exercici (de la taula 'exercise').
     exercise_uuid: UUID_TYPE = Field(foreign_key="exercise.uuid")
 
+    # Còpia de la marca de temps Unix (en milisegons) de l'inici de l'entrenament.
+    # És None a les plantilles. Permet paginar l'historial d'un exercici amb un índex.
+    timestamp_start: int | None = Field(
+        default=None, sa_column=Column(BigInteger(), nullable=True)
+    )
+
+    # Sèries de l'entrada empaquetades en arrays, una posició per sèrie (vegeu `set_storage.py`).
+    # Només s'omplen quan el servidor desa les sèries en mode empaquetat; altrament són None
+    # i les sèries es troben a la taula 'workout_set'.
+    packed_reps: list[int | None] | None = Field(
+        default=None, sa_column=Column(ARRAY(Integer), nullable=True)
+    )
+    packed_weights: list[float | None] | None = Field(
+        default=None, sa_column=Column(ARRAY(Float), nullable=True)
+    )
+    packed_weights_kg: list[float | None] | None = Field(
+        default=None, sa_column=Column(ARRAY(Float), nullable=True)
+    )
+    packed_set_types: list[str] | None = Field(
+        default=None, sa_column=Column(ARRAY(String), nullable=True)
+    )
+
     # Relació amb el model ExerciseModel.
     # `foreign_keys` especifica explícitament la columna de clau forana a utilitzar per a la relació.
     exercise: "ExerciseModel" = Relationship(
@@ -119,9 +172,21 @@ class WorkoutEntryModel(SQLModel, table=True):
     # Relació un-a-molts amb WorkoutSetModel.
     # `back_populates` estableix la relació bidireccional amb el camp 'entry' de WorkoutSetModel.
     # `cascade="all"` propaga operacions.
+    # Les sèries les elimina la base de dades (ON DELETE CASCADE).
     sets: list["WorkoutSetModel"] = Relationship(
         back_populates="entry",
-        sa_relationship_kwargs={"cascade": "all, delete-orphan"},
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True},
+    )
+
+    # Índex per recórrer l'historial d'un exercici del més recent al més antic (vegeu `history.py`).
+    __table_args__ = (
+        Index(
+            "ix_workout_entry_exercise_timestamp",
+            "exercise_uuid",
+            "timestamp_start",
+            "workout_uuid",
+            "index",
+        ),
     )
 
 
@@ -143,9 +208,17 @@ class WorkoutSetModel(SQLModel, table=True):
         None  # Nombre de repeticions realitzades o a realitzar. Opcional.
     )
     weight: float | None = None  # Pes utilitzat en la sèrie. Opcional.
+    # Pes de la sèrie convertit a quilograms, independentment de la unitat de l'entrada.
+    # Es desa en inserir la sèrie perquè les agregacions (volum, rècords) siguin un SUM/MAX directe.
+    weight_kg: float | None = None
     # Tipus de sèrie (normal, drop set, failture). Per defecte és 'normal'.
     # S'emmagatzema com un tipus Enum a la base de dades.
     set_type: SetType = Field(sa_column=Column(Enum(SetType)), default=SetType.NORMAL)
+    # Còpia de l'inici de l'entrenament (None a les plantilles). És la clau de partició
+    # quan la taula es parteix per mesos (vegeu `partitioning.py`).
+    timestamp_start: int | None = Field(
+        default=None, sa_column=Column(BigInteger(), nullable=True)
+    )
 
     # Relació molts-a-un amb WorkoutEntryModel.
     # `back_populates` estableix la relació bidireccional amb el camp 'sets' de WorkoutEntryModel.
@@ -172,6 +245,86 @@ class WorkoutSetModel(SQLModel, table=True):
     )
 
 
+class LatestWorkoutEntryModel(SQLModel, table=True):
+    """
+    Model que apunta a l'última entrada registrada de cada exercici de cada usuari.
+    Es manté en afegir i eliminar entrenaments, de manera que l'última entrada d'un exercici
+    es troba amb una lectura per clau primària, sense ordenar tot l'historial.
+    """
+
+    __tablename__ = "latest_workout_entry"  # Nom de la taula # pyright: ignore[]
+
+    # Clau forana que enllaça amb l'UUID de l'usuari. Part de la clau primària.
+    user_uuid: UUID_TYPE = Field(foreign_key="users.uuid", primary_key=True)
+    # Clau forana que enllaça amb l'UUID de l'exercici. Part de la clau primària.
+    exercise_uuid: UUID_TYPE = Field(foreign_key="exercise.uuid", primary_key=True)
+
+    # Entrada més recent de l'exercici: entrenament i índex de l'entrada dins de l'entrenament.
+    workout_uuid: UUID_TYPE
+    entry_index: int
+    # Marca de temps Unix (en milisegons) de l'inici d'aquell entrenament.
+    timestamp_start: int = Field(sa_column=Column(BigInteger(), nullable=False))
+
+    # Restricció de clau forana composta amb l'entrada apuntada.
+    # Si s'elimina l'entrada, també s'elimina el punter.
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["workout_uuid", "entry_index"],
+            ["workout_entry.workout_uuid", "workout_entry.index"],
+            ondelete="CASCADE",
+        ),
+    )
+
+
+class ArchivedWorkoutModel(SQLModel, table=True):
+    """
+    Model que representa les entrades i sèries d'un entrenament antic arxivat (vegeu `archive.py`).
+    El contingut i la instància de l'entrenament es mantenen a les seves taules; només les
+    entrades i sèries, que són la major part de les dades, es desen en una sola fila.
+    """
+
+    __tablename__ = "archived_workout"  # Nom de la taula # pyright: ignore[]
+
+    # Clau primària i forana que enllaça amb l'entrenament arxivat.
+    # Si s'elimina l'entrenament, també s'elimina el seu arxiu.
+    workout_uuid: UUID_TYPE = Field(
+        foreign_key="workout_content.uuid", primary_key=True, ondelete="CASCADE"
+    )
+    # Entrades de l'entrenament en ordre, cadascuna amb l'UUID de l'exercici, la unitat de pes,
+    # el descans i les seves sèries (reps, weight, weight_kg i set_type).
+    # PostgreSQL comprimeix el valor en desar-lo (TOAST).
+    entries: list[dict] = Field(sa_column=Column(JSONB(), nullable=False))
+
+    # Índex per trobar els entrenaments arxivats que contenen un exercici (operador @>).
+    __table_args__ = (
+        Index(
+            "ix_archived_workout_entries",
+            "entries",
+            postgresql_using="gin",
+            postgresql_ops={"entries": "jsonb_path_ops"},
+        ),
+    )
+
+
+class ArchivedWorkoutExerciseModel(SQLModel, table=True):
+    """
+    Model que representa un exercici utilitzat per un entrenament arxivat.
+    L'arxiu desa les entrades en JSON, sense claus foranes; aquesta taula manté la referència
+    als exercicis, de manera que un exercici no es pot eliminar mentre un entrenament arxivat
+    l'utilitzi, igual que passa amb les entrades de 'workout_entry'.
+    """
+
+    __tablename__ = "archived_workout_exercise"  # Nom de la taula # pyright: ignore[]
+
+    # Part de la clau primària composta: UUID de l'entrenament arxivat.
+    # Si s'elimina l'arxiu (o l'entrenament), la base de dades elimina les seves referències.
+    workout_uuid: UUID_TYPE = Field(
+        foreign_key="archived_workout.workout_uuid", primary_key=True, ondelete="CASCADE"
+    )
+    # Part de la clau primària composta: UUID de l'exercici, amb clau forana a 'exercise'.
+    exercise_uuid: UUID_TYPE = Field(foreign_key="exercise.uuid", primary_key=True, index=True)
+
+
 # Importació del model ExerciseModel.
 # Aquesta importació és necessària perquè les cadenes de tipus com "ExerciseModel"
 # en les anotacions de Relationship puguin ser resoltes per SQLModel o Pydantic.
@@ -0,0 +1,216 @@
+import msgpack
+import orjson
+from responses import quality_values
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Negociació de MessagePack a les rutes d'entrenaments, plantilles i sincronització.
+# Els clients mòbils poden enviar els cossos amb `Content-Type: application/msgpack` i demanar
+# les respostes amb `Accept: application/msgpack`. El middleware tradueix el format a l'entrada
+# i a la sortida, de manera que les rutes i els esquemes continuen treballant amb JSON:
+# - Les peticions en MessagePack es converteixen a JSON abans d'arribar a la ruta.
+# - Les respostes JSON es converteixen a MessagePack amb la mateixa estructura. Les respostes
+#   en streaming s'acumulen abans de convertir-les, perquè MessagePack indica la mida de les llistes.
+# - L'ETag de les respostes en MessagePack porta un sufix, perquè és una representació diferent,
+#   i totes les respostes d'aquestes rutes indiquen `Vary: Accept` per als caches.
+
+# Tipus de contingut de MessagePack. També s'accepta el nom no registrat que fan servir molts clients.
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+
+# Rutes (i les seves subrutes) que accepten i poden retornar MessagePack.
+MSGPACK_PATHS = ("/user/workouts", "/user/templates", "/user/sync")
+
+# Sufix de l'ETag de les respostes en MessagePack.
+ETAG_SUFFIX = "-msgpack"
+
+
+def _media_type(content_type: str) -> str:
+    """
+    Obté el tipus de contingut sense paràmetres (com `charset`), en minúscules.
+    """
+    return content_type.split(";")[0].strip().lower()
+
+
+def _is_msgpack_path(path: str) -> bool:
+    """
+    Comprova si una ruta admet MessagePack.
+    """
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in MSGPACK_PATHS)
+
+
+def _accepts_msgpack(accept: str) -> bool:
+    """
+    Comprova si el client prefereix MessagePack a JSON segons la capçalera `Accept`.
+    Amb la mateixa preferència (`q`) es tria MessagePack, perquè el client l'ha demanat explícitament.
+
+    Args:
+        accept: El valor de la capçalera `Accept`.
+
+    Returns:
+        True si s'ha de respondre en MessagePack, False altrament.
+    """
+    preferences = quality_values(accept)
+    msgpack_quality = max(preferences.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = next(
+        (
+            preferences[media_type]
+            for media_type in ("application/json", "application/*", "*/*")
+            if media_type in preferences
+        ),
+        0.0,
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def _msgpack_if_none_match(header: str) -> str:
+    """
+    Tradueix les ETags de MessagePack de la capçalera `If-None-Match` a les ETags de la ruta.
+    Les ETags sense el sufix són d'una altra representació (JSON) i es descarten.
+    """
+    candidates = []
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            candidates.append(candidate)
+        elif candidate.endswith(ETAG_SUFFIX + '"'):
+            candidates.append(candidate.removesuffix(ETAG_SUFFIX + '"') + '"')
+    return ", ".join(candidates)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    """
+    Llegeix el cos complet d'una petició.
+    """
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+class MsgpackMiddleware:
+    """
+    Middleware ASGI que permet enviar i rebre MessagePack a les rutes de `MSGPACK_PATHS`.
+    És un middleware ASGI pur (i no `BaseHTTPMiddleware`), de manera que les altres rutes
+    i les respostes JSON en streaming no es modifiquen.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _is_msgpack_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        scope = dict(scope, headers=list(scope["headers"]))
+        request_headers = MutableHeaders(scope=scope)
+        respond_msgpack = _accepts_msgpack(request_headers.get("accept", ""))
+
+        if respond_msgpack and "if-none-match" in request_headers:
+            if_none_match = _msgpack_if_none_match(request_headers["if-none-match"])
+            del request_headers["if-none-match"]
+            if if_none_match:
+                request_headers["if-none-match"] = if_none_match
+
+        if _media_type(request_headers.get("content-type", "")) in MSGPACK_MEDIA_TYPES:
+            try:
+                body = orjson.dumps(msgpack.unpackb(await _read_body(receive)))
+            except (ValueError, TypeError):  # MessagePack invàlid o amb valors que no són JSON
+                await self._invalid_body(send, respond_msgpack)
+                return
+            request_headers["content-type"] = "application/json"
+            request_headers["content-length"] = str(len(body))
+            receive = self._replay(body)
+
+        send = self._msgpack_send(send) if respond_msgpack else self._vary_send(send)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _replay(body: bytes) -> Receive:
+        """
+        Crea un `receive` que retorna el cos JSON convertit en un sol missatge.
+        """
+        sent = False
+
+        async def receive() -> Message:
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return receive
+
+    @staticmethod
+    def _vary_send(send: Send) -> Send:
+        """
+        Crea un `send` que afegeix `Vary: Accept` a les respostes JSON, sense modificar-ne el cos.
+        """
+
+        async def send_json(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+
+        return send_json
+
+    @staticmethod
+    def _msgpack_send(send: Send) -> Send:
+        """
+        Crea un `send` que converteix les respostes JSON a MessagePack i afegeix el sufix a l'ETag.
+        """
+        start: Message = {}
+        body_parts: list[bytes] = []
+
+        async def send_msgpack(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message, headers=list(message["headers"]))
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):  # Espera el cos complet
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = b"".join(body_parts)
+            if body and _media_type(headers.get("content-type", "")) == "application/json":
+                body = msgpack.packb(orjson.loads(body))
+                headers["content-type"] = MSGPACK_MEDIA_TYPE
+                headers["content-length"] = str(len(body))
+            if "etag" in headers:
+                headers["etag"] = headers["etag"].removesuffix('"') + ETAG_SUFFIX + '"'
+            headers.add_vary_header("Accept")
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        return send_msgpack
+
+    @staticmethod
+    async def _invalid_body(send: Send, respond_msgpack: bool) -> None:
+        """
+        Respon amb un error 400 quan el cos de la petició no és MessagePack vàlid.
+        """
+        detail = {"detail": "Invalid MessagePack body"}
+        if respond_msgpack:
+            body, media_type = msgpack.packb(detail), MSGPACK_MEDIA_TYPE
+        else:
+            body, media_type = orjson.dumps(detail), "application/json"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", media_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"vary", b"Accept"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
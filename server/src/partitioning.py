@@ -0,0 +1,209 @@
+from datetime import date, datetime, timezone
+
+from backfills import backfill_set_timestamps
+from sqlalchemy import text
+from sqlmodel import Session
+
+# La taula 'workout_set' (una fila per sèrie) es pot partir per mesos segons l'inici
+# de l'entrenament (`timestamp_start`, en mil·lisegons UTC):
+# - Una partició per mes, 'workout_set_yAAAAmMM'.
+# - Una partició per defecte, 'workout_set_default', amb les sèries de les plantilles
+#   (sense inici) i les dels mesos que encara no tenen partició.
+# Els mesos antics deixen de rebre escriptures, de manera que el VACUUM i el manteniment
+# dels índexs només treballen sobre les particions recents, i les consultes que filtren
+# per `timestamp_start` només llegeixen les particions necessàries.
+# Les altres taules d'entrenaments no es parteixen: PostgreSQL exigeix que la clau de
+# partició formi part de les claus úniques, i les seves claus primàries són referenciades
+# per altres taules.
+
+# Nombre de mesos futurs per als quals es creen particions per endavant.
+SET_PARTITION_MONTHS_AHEAD = 3
+
+
+def _month_start(day: date) -> date:
+    """
+    Retorna el primer dia del mes d'una data.
+    """
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    """
+    Retorna el primer dia del mes següent.
+    """
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _month_timestamp(month: date) -> int:
+    """
+    Retorna la marca de temps Unix (en mil·lisegons) de l'inici d'un mes en UTC.
+    """
+    return int(datetime(month.year, month.month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _partition_name(month: date) -> str:
+    """
+    Retorna el nom de la partició d'un mes.
+    """
+    return f"workout_set_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(session: Session) -> bool:
+    """
+    Indica si la taula 'workout_set' està partida per mesos.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        True si 'workout_set' és una taula partida.
+    """
+    return session.connection().execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'workout_set'::regclass")
+    ).scalar_one()
+
+
+def create_set_partitions(session: Session, months_ahead: int = SET_PARTITION_MONTHS_AHEAD) -> int:
+    """
+    Crea les particions de 'workout_set' que falten: les dels mesos des de l'actual fins a
+    `months_ahead` mesos endavant i les dels mesos que tenen sèries a la partició per
+    defecte (per exemple, després d'importar un historial). Les sèries d'aquests mesos
+    que siguin a la partició per defecte es mouen a la nova partició. S'ha d'executar
+    periòdicament (per exemple, cada mes) perquè els entrenaments nous no vagin a la
+    partició per defecte.
+    No fa res si la taula no està partida.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        months_ahead: El nombre de mesos futurs per als quals es creen particions.
+
+    Returns:
+        El nombre de particions creades.
+    """
+    if not is_partitioned(session):
+        return 0
+
+    # Mesos amb sèries a la partició per defecte, per exemple d'un historial importat
+    months = {
+        month.date()
+        for month in session.connection().execute(
+            text(
+                "SELECT DISTINCT date_trunc('month', to_timestamp(timestamp_start / 1000.0) AT TIME ZONE 'UTC') "
+                "FROM workout_set_default WHERE timestamp_start IS NOT NULL"
+            )
+        ).scalars()
+    }
+    month = _month_start(datetime.now(timezone.utc).date())
+    for _ in range(months_ahead + 1):
+        months.add(month)
+        month = _next_month(month)
+
+    return sum(_create_partition(session, month) for month in sorted(months))
+
+
+def _create_partition(session: Session, month: date) -> int:
+    """
+    Crea la partició d'un mes si no existeix, movent-hi les sèries d'aquell mes que
+    siguin a la partició per defecte.
+
+    Returns:
+        1 si s'ha creat la partició, 0 si ja existia.
+    """
+    name = _partition_name(month)
+    exists = session.connection().execute(
+        text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=name)
+    ).scalar_one()
+    if exists:
+        return 0
+
+    start, end = _month_timestamp(month), _month_timestamp(_next_month(month))
+    session.connection().execute(text(f"CREATE TABLE {name} (LIKE workout_set INCLUDING DEFAULTS)"))
+    session.connection().execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM workout_set_default
+                WHERE timestamp_start >= {start} AND timestamp_start < {end}
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        )
+    )
+    session.connection().execute(
+        text(f"ALTER TABLE workout_set ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})")
+    )
+    return 1
+
+
+def partition_workout_sets(session: Session, months_ahead: int = SET_PARTITION_MONTHS_AHEAD) -> int:
+    """
+    Converteix 'workout_set' en una taula partida per mesos. Crea una partició per a cada
+    mes amb sèries i per als `months_ahead` mesos següents, hi copia totes les sèries i
+    elimina la taula original. Bloqueja la taula mentre dura la conversió.
+    No fa res si la taula ja està partida.
+    Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        months_ahead: El nombre de mesos futurs per als quals es creen particions.
+
+    Returns:
+        El nombre de particions mensuals creades.
+    """
+    if is_partitioned(session):
+        return 0
+
+    # Les sèries anteriors a la columna `timestamp_start` no tindrien mes
+    backfill_set_timestamps(session)
+
+    statements = [
+        "LOCK TABLE workout_set IN ACCESS EXCLUSIVE MODE",
+        "ALTER TABLE workout_set RENAME TO workout_set_unpartitioned",
+        "ALTER TABLE workout_set_unpartitioned RENAME CONSTRAINT workout_set_pkey TO workout_set_unpartitioned_pkey",
+        "ALTER TABLE workout_set_unpartitioned RENAME CONSTRAINT workout_set_workout_uuid_entry_index_fkey "
+        "TO workout_set_unpartitioned_workout_uuid_entry_index_fkey",
+        # La clau primària ha d'incloure la clau de partició. Com que les plantilles no
+        # tenen inici, la unicitat es garanteix amb un índex únic en lloc d'una clau primària.
+        # L'índex considera iguals els inicis nuls (NULLS NOT DISTINCT), de manera que les
+        # sèries de les plantilles també són úniques.
+        "CREATE TABLE workout_set (LIKE workout_set_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (timestamp_start)",
+        "CREATE TABLE workout_set_default PARTITION OF workout_set DEFAULT",
+        "CREATE UNIQUE INDEX workout_set_key ON workout_set (workout_uuid, entry_index, index, timestamp_start) "
+        "NULLS NOT DISTINCT",
+        "ALTER TABLE workout_set ADD CONSTRAINT workout_set_workout_uuid_entry_index_fkey "
+        "FOREIGN KEY (workout_uuid, entry_index) REFERENCES workout_entry (workout_uuid, index) ON DELETE CASCADE",
+    ]
+    for statement in statements:
+        session.connection().execute(text(statement))
+
+    # Particions des del mes de la sèrie més antiga fins a `months_ahead` mesos endavant
+    oldest = session.connection().execute(
+        text("SELECT min(timestamp_start) FROM workout_set_unpartitioned")
+    ).scalar_one()
+    month = _month_start(datetime.now(timezone.utc).date())
+    if oldest is not None:
+        month = min(month, _month_start(datetime.fromtimestamp(oldest / 1000, timezone.utc).date()))
+    last = _month_start(datetime.now(timezone.utc).date())
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    created = 0
+    while month <= last:
+        start, end = _month_timestamp(month), _month_timestamp(_next_month(month))
+        session.connection().execute(
+            text(
+                f"CREATE TABLE {_partition_name(month)} PARTITION OF workout_set "
+                f"FOR VALUES FROM ({start}) TO ({end})"
+            )
+        )
+        created += 1
+        month = _next_month(month)
+
+    session.connection().execute(
+        text("INSERT INTO workout_set SELECT * FROM workout_set_unpartitioned")
+    )
+    session.connection().execute(text("DROP TABLE workout_set_unpartitioned"))
+    return created
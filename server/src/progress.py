@@ -0,0 +1,55 @@
+import numpy as np
+from schemas.exercise_schema import ExerciseProgressSchema
+
+
+def estimated_1rm(weight: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """
+    Calcula l'1RM estimat de cada sèrie amb la fórmula d'Epley: pes x (1 + repeticions / 30).
+    Una sèrie d'una repetició equival al seu pes i una sèrie sense repeticions no compta.
+
+    Args:
+        weight: Els pesos de les sèries.
+        reps: Les repeticions de les sèries.
+
+    Returns:
+        L'1RM estimat de cada sèrie.
+    """
+    return np.where(reps > 1, weight * (1 + reps / 30), np.where(reps > 0, weight, 0.0))
+
+
+def compute_progress(timestamps, reps, weights) -> ExerciseProgressSchema:
+    """
+    Calcula l'evolució d'un exercici per sessió a partir de les seves sèries.
+    Tots els càlculs són vectoritzats: cada columna es converteix en un array de NumPy
+    i s'agrega per sessió amb `reduceat`, sense recórrer les sèries amb Python.
+
+    Args:
+        timestamps: La marca de temps (en milisegons) de l'inici de la sessió de cada sèrie.
+        reps: Les repeticions de cada sèrie.
+        weights: El pes (en kg) de cada sèrie.
+            Les sèries han d'estar ordenades per marca de temps i, dins de cada sessió, per pes
+            i repeticions, de manera que l'última sèrie de cada sessió sigui la més pesada.
+            Si no hi ha cap sèrie, les columnes són None.
+
+    Returns:
+        Un objecte ExerciseProgressSchema amb una posició per sessió.
+    """
+    if not timestamps:
+        return ExerciseProgressSchema()
+
+    timestamp = np.asarray(timestamps, dtype=np.int64)
+    reps = np.asarray(reps, dtype=np.float64)
+    weight = np.asarray(weights, dtype=np.float64)
+
+    # Índex de la primera i de l'última sèrie de cada sessió
+    starts = np.flatnonzero(np.r_[True, timestamp[1:] != timestamp[:-1]])
+    ends = np.r_[starts[1:], len(timestamp)] - 1
+
+    return ExerciseProgressSchema(
+        timestamps=timestamp[starts].tolist(),
+        top_set_weight=weight[ends].tolist(),
+        top_set_reps=reps[ends].astype(np.int64).tolist(),
+        estimated_1rm=np.maximum.reduceat(estimated_1rm(weight, reps), starts).tolist(),
+        volume=np.add.reduceat(reps * weight, starts).tolist(),
+        reps=np.add.reduceat(reps, starts).astype(np.int64).tolist(),
+    )
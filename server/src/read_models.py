@@ -0,0 +1,396 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator
+from uuid import UUID
+
+from archive import restore_archived_workouts
+from db import engine
+from models.chat import MessageModel
+from models.exercise import ExerciseModel
+from models.workout import (
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+    WorkoutSetModel,
+)
+from pydantic import TypeAdapter
+from responses import STREAM_BATCH_SIZE
+from schemas.workout_schema import WorkoutContentSchema
+from sqlmodel import Session, asc, select
+
+# Lectures de les llistes més consultades sense passar per l'ORM.
+# Les consultes seleccionen columnes (no models), de manera que SQLAlchemy retorna tuples
+# sense crear objectes del model ni registrar-los a la sessió (identity map), i els resultats
+# es desen en dataclasses amb `__slots__`, que orjson serialitza directament (vegeu `responses.py`).
+# Les rutes retornen la resposta ja serialitzada, i FastAPI no torna a validar el resultat
+# amb el `response_model`, que es manté per a la documentació OpenAPI.
+# L'ordre dels camps de cada classe és el del JSON que generava el model, perquè la
+# resposta sigui idèntica. L'ORM es continua utilitzant per a les escriptures.
+# Les funcions `stream_*` llegeixen les llistes grans per grups amb un cursor del servidor,
+# per a les respostes en streaming (vegeu `json_stream_response`).
+
+
+@dataclass(slots=True)
+class ExerciseRead:
+    """
+    Exercici personalitzat d'un usuari, amb els camps de `ExerciseModel`.
+    """
+
+    description: str | None
+    name: str
+    is_disabled: bool
+    creator_uuid: UUID
+    uuid: UUID
+    default_exercise_uuid: UUID | None
+    body_part: Enum
+    type: Enum
+    version: int | None
+
+
+@dataclass(slots=True)
+class MessageRead:
+    """
+    Missatge entre un usuari i el seu entrenador, amb els camps de `MessageModel`.
+    """
+
+    user_uuid: UUID
+    content: str
+    timestamp: int
+    trainer_uuid: UUID
+    is_sent_by_trainer: bool
+
+
+@dataclass(slots=True)
+class EntryExerciseRead:
+    """
+    Exercici d'una entrada, amb els camps de `ExerciseInputSchema`.
+    """
+
+    uuid: UUID
+    name: str
+    description: str | None
+    body_part: Enum
+    type: Enum
+    default_exercise_uuid: UUID | None
+
+
+@dataclass(slots=True)
+class SetRead:
+    """
+    Sèrie d'una entrada, amb els camps de `WorkoutSetSchema`.
+    """
+
+    reps: int | None
+    weight: float
+    set_type: Enum | str
+
+
+@dataclass(slots=True)
+class EntryRead:
+    """
+    Entrada d'un entrenament o plantilla, amb els camps de `WorkoutEntrySchema`.
+    """
+
+    rest_countdown_duration: int | None
+    weight_unit: Enum | None
+    exercise: EntryExerciseRead
+    sets: list[SetRead]
+
+
+@dataclass(slots=True)
+class TemplateRead:
+    """
+    Plantilla d'entrenament, amb els camps de `WorkoutContentSchema` (sense instància).
+    """
+
+    uuid: UUID
+    name: str
+    description: str | None
+    instance: None
+    entries: list[EntryRead]
+
+
+@dataclass(slots=True)
+class WorkoutSummaryRead:
+    """
+    Resum d'un entrenament o plantilla per a les llistes (`view=summary`), amb els camps de
+    `WorkoutSummarySchema`. Les plantilles no tenen inici ni durada.
+    """
+
+    uuid: UUID
+    name: str
+    timestamp_start: int | None
+    duration: int | None
+    entry_count: int | None
+    set_count: int | None
+
+
+def read_exercises(session: Session, user_uuid: UUID) -> list[ExerciseRead]:
+    """
+    Obté els exercicis personalitzats i habilitats d'un usuari.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+
+    Returns:
+        Una llista d'ExerciseRead.
+    """
+    query = (
+        select(
+            ExerciseModel.description,
+            ExerciseModel.name,
+            ExerciseModel.is_disabled,
+            ExerciseModel.creator_uuid,
+            ExerciseModel.uuid,
+            ExerciseModel.default_exercise_uuid,
+            ExerciseModel.body_part,
+            ExerciseModel.type,
+            ExerciseModel.version,
+        )
+        .where(ExerciseModel.creator_uuid == user_uuid)
+        .where(ExerciseModel.is_disabled == False)  # Només els exercicis habilitats
+    )
+    return [ExerciseRead(*row) for row in session.exec(query)]
+
+
+def messages_query(user_uuid: UUID, trainer_uuid: UUID):
+    """
+    Construeix la consulta dels missatges entre un usuari i un entrenador, ordenats
+    cronològicament, amb les columnes de `MessageRead`.
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+        trainer_uuid: L'UUID de l'entrenador.
+
+    Returns:
+        La consulta.
+    """
+    return (
+        select(
+            MessageModel.user_uuid,
+            MessageModel.content,
+            MessageModel.timestamp,
+            MessageModel.trainer_uuid,
+            MessageModel.is_sent_by_trainer,
+        )
+        .where(MessageModel.user_uuid == user_uuid)
+        .where(MessageModel.trainer_uuid == trainer_uuid)
+        .order_by(asc(MessageModel.timestamp))
+    )
+
+
+def read_messages(session: Session, user_uuid: UUID, trainer_uuid: UUID) -> list[MessageRead]:
+    """
+    Obté els missatges entre un usuari i un entrenador, ordenats cronològicament.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        trainer_uuid: L'UUID de l'entrenador.
+
+    Returns:
+        Una llista de MessageRead.
+    """
+    return [MessageRead(*row) for row in session.exec(messages_query(user_uuid, trainer_uuid))]
+
+
+def stream_messages(user_uuid: UUID, trainer_uuid: UUID) -> Iterator[list[MessageRead]]:
+    """
+    Llegeix els missatges entre un usuari i un entrenador amb un cursor del servidor,
+    en grups de `STREAM_BATCH_SIZE`. Utilitza una sessió pròpia, perquè s'executa
+    mentre s'envia la resposta (vegeu `json_stream_response`).
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+        trainer_uuid: L'UUID de l'entrenador.
+
+    Returns:
+        Un iterador de llistes de MessageRead, en ordre cronològic.
+    """
+    with Session(engine) as session:
+        query = messages_query(user_uuid, trainer_uuid).execution_options(
+            stream_results=True, yield_per=STREAM_BATCH_SIZE
+        )
+        for rows in session.exec(query).partitions():
+            yield [MessageRead(*row) for row in rows]
+
+
+# Valida i converteix els entrenaments com el `response_model` de /user/workouts
+_workouts_adapter = TypeAdapter(list[WorkoutContentSchema])
+
+
+def stream_workouts(query) -> Iterator[list[dict]]:
+    """
+    Llegeix els entrenaments d'una consulta de `WorkoutContentModel` i `WorkoutInstanceModel`
+    amb un cursor del servidor, en grups de `STREAM_BATCH_SIZE`, i els converteix com el
+    `response_model` (amb les entrades dels entrenaments arxivats recuperades de l'arxiu).
+    Després de cada grup se n'alliberen els objectes de la sessió, de manera que la memòria
+    no depèn del nombre d'entrenaments. Utilitza una sessió pròpia, perquè s'executa mentre s'envia
+    la resposta (vegeu `json_stream_response`).
+
+    Args:
+        query: La consulta dels entrenaments, ja ordenada i paginada.
+
+    Returns:
+        Un iterador de llistes d'entrenaments convertits a tipus de JSON.
+    """
+    with Session(engine) as session:
+        query = query.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+        for rows in session.exec(query).partitions():
+            contents = [workout_content for workout_content, _ in rows]
+            workouts = restore_archived_workouts(session, contents)
+            yield _workouts_adapter.dump_python(
+                _workouts_adapter.validate_python(workouts, from_attributes=True), mode="json"
+            )
+            # Allibera els entrenaments del grup, amb les seves instàncies, entrades i sèries.
+            # No s'utilitza `expunge_all`, que invalidaria els objectes que encara s'han de llegir.
+            for workout_content in contents:
+                session.expunge(workout_content)
+
+
+def read_workout_summaries(session: Session, query) -> list[WorkoutSummaryRead]:
+    """
+    Obté el resum dels entrenaments d'una consulta de `WorkoutContentModel` i
+    `WorkoutInstanceModel`, amb el nombre d'entrades i de sèries desat a cada entrenament.
+    No llegeix les entrades ni les sèries.
+
+    Args:
+        session: La sessió de base de dades.
+        query: La consulta dels entrenaments, ja ordenada i paginada.
+
+    Returns:
+        Una llista de WorkoutSummaryRead.
+    """
+    summaries_query = query.with_only_columns(
+        WorkoutContentModel.uuid,
+        WorkoutContentModel.name,
+        WorkoutInstanceModel.timestamp_start,
+        WorkoutInstanceModel.duration,
+        WorkoutContentModel.entry_count,
+        WorkoutContentModel.set_count,
+    )
+    return [WorkoutSummaryRead(*row) for row in session.exec(summaries_query)]
+
+
+def user_templates_query(user_uuid: UUID, *columns):
+    """
+    Construeix la consulta de l'UUID (i les columnes indicades) de les plantilles d'un
+    usuari, ordenades pel nom.
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+        *columns: Altres columnes de `WorkoutContentModel` que es volen obtenir.
+
+    Returns:
+        La consulta.
+    """
+    return (
+        select(WorkoutContentModel.uuid, *columns)
+        .outerjoin(
+            WorkoutInstanceModel,
+            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
+        )
+        .where(WorkoutInstanceModel.workout_uuid == None)  # Les plantilles no tenen instància
+        .where(WorkoutContentModel.creator_uuid == user_uuid)
+        .order_by(WorkoutContentModel.name)
+    )
+
+
+def read_templates(session: Session, user_uuid: UUID) -> list[TemplateRead]:
+    """
+    Obté les plantilles d'un usuari, ordenades pel nom, amb les seves entrades, exercicis
+    i sèries. Utilitza dues consultes: una per a les plantilles i una per a totes les
+    entrades amb les seves sèries (en files o empaquetades).
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+
+    Returns:
+        Una llista de TemplateRead.
+    """
+    templates_query = user_templates_query(
+        user_uuid, WorkoutContentModel.name, WorkoutContentModel.description
+    )
+    templates = {
+        uuid: TemplateRead(uuid, name, description, None, [])
+        for uuid, name, description in session.exec(templates_query)
+    }
+    if not templates:
+        return []
+
+    # Una fila per sèrie en files, o una sola fila per entrada si les sèries estan empaquetades
+    entries_query = (
+        select(
+            WorkoutEntryModel.workout_uuid,
+            WorkoutEntryModel.index,
+            WorkoutEntryModel.rest_countdown_duration,
+            WorkoutEntryModel.weight_unit,
+            ExerciseModel.uuid,
+            ExerciseModel.name,
+            ExerciseModel.description,
+            ExerciseModel.body_part,
+            ExerciseModel.type,
+            ExerciseModel.default_exercise_uuid,
+            WorkoutEntryModel.packed_reps,
+            WorkoutEntryModel.packed_weights,
+            WorkoutEntryModel.packed_set_types,
+            WorkoutSetModel.reps,
+            WorkoutSetModel.weight,
+            WorkoutSetModel.set_type,
+        )
+        .join(
+            ExerciseModel,
+            WorkoutEntryModel.exercise_uuid == ExerciseModel.uuid,  # pyright: ignore[]
+        )
+        .outerjoin(
+            WorkoutSetModel,
+            (WorkoutSetModel.workout_uuid == WorkoutEntryModel.workout_uuid)  # pyright: ignore[]
+            & (WorkoutSetModel.entry_index == WorkoutEntryModel.index),
+        )
+        .where(WorkoutEntryModel.workout_uuid.in_(list(templates)))  # pyright: ignore[]
+        .order_by(WorkoutEntryModel.workout_uuid, WorkoutEntryModel.index, WorkoutSetModel.index)
+    )
+    entry = None
+    entry_key = None
+    for row in session.exec(entries_query):
+        if (row[0], row[1]) != entry_key:
+            entry_key = (row[0], row[1])
+            entry = EntryRead(row[2], row[3], EntryExerciseRead(*row[4:10]), [])
+            templates[row[0]].entries.append(entry)
+            if row.packed_reps is not None:
+                entry.sets = [
+                    SetRead(reps, weight, set_type)
+                    for reps, weight, set_type in zip(
+                        row.packed_reps, row.packed_weights, row.packed_set_types
+                    )
+                ]
+        if row.set_type is not None:  # Sèrie desada en una fila
+            entry.sets.append(SetRead(row.reps, row.weight, row.set_type))  # pyright: ignore[]
+
+    return list(templates.values())
+
+
+def read_template_summaries(session: Session, user_uuid: UUID) -> list[WorkoutSummaryRead]:
+    """
+    Obté el resum de les plantilles d'un usuari, ordenades pel nom, amb el nombre
+    d'entrades i de sèries desat a cada plantilla. No llegeix les entrades ni les sèries.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+
+    Returns:
+        Una llista de WorkoutSummaryRead.
+    """
+    query = user_templates_query(
+        user_uuid,
+        WorkoutContentModel.name,
+        WorkoutContentModel.entry_count,
+        WorkoutContentModel.set_count,
+    )
+    return [
+        WorkoutSummaryRead(uuid, name, None, None, entry_count, set_count)
+        for uuid, name, entry_count, set_count in session.exec(query)
+    ]
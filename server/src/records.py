@@ -0,0 +1,301 @@
+from uuid import UUID
+
+from models.record import PersonalRecordModel
+from models.workout import WorkoutContentModel, WorkoutInstanceModel
+from progress import estimated_1rm
+from schemas.record_schema import PersonalRecordSchema
+from schemas.types.enums import RecordKind
+from schemas.workout_schema import WorkoutContentSchema
+from set_storage import all_sets
+from sqlalchemy import delete, literal, null
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, case, func, select
+from units import to_kg
+
+
+def _record_key(record: PersonalRecordSchema) -> tuple:
+    """
+    Retorna la clau amb què es comparen dos rècords del mateix tipus.
+    Amb el mateix pes guanya la sèrie amb més repeticions, i viceversa.
+
+    Args:
+        record: El rècord.
+
+    Returns:
+        Una tupla comparable; com més gran, millor és el rècord.
+    """
+    if record.record_kind == RecordKind.MAX_WEIGHT:
+        return (record.value, record.reps or 0)
+    if record.record_kind == RecordKind.MAX_REPS:
+        return (record.value, record.weight or 0)
+    return (record.value,)
+
+
+def workout_records(
+    workout_uuid: UUID, workout: WorkoutContentSchema
+) -> dict[tuple[UUID, RecordKind], PersonalRecordSchema]:
+    """
+    Calcula el millor resultat de cada exercici d'un entrenament per a cada tipus de rècord.
+    Els pesos es converteixen a quilograms i els resultats nuls o de valor 0 no compten.
+
+    Args:
+        workout_uuid: L'UUID de l'entrenament.
+        workout: L'entrenament. Ha de tenir una instància.
+
+    Returns:
+        Un diccionari amb el millor resultat, indexat per (UUID de l'exercici, tipus de rècord).
+    """
+    timestamp_start = workout.instance.timestamp_start  # pyright: ignore[]
+    records: dict[tuple[UUID, RecordKind], PersonalRecordSchema] = {}
+    volumes: dict[UUID, float] = {}
+
+    def offer(record: PersonalRecordSchema):
+        # Es queda amb el primer resultat en cas d'empat, igual que `rebuild_personal_records`
+        key = (record.exercise_uuid, record.record_kind)
+        if record.value > 0 and (
+            key not in records or _record_key(record) > _record_key(records[key])
+        ):
+            records[key] = record
+
+    for entry in workout.entries:
+        exercise_uuid = entry.exercise.uuid
+        if exercise_uuid is None:
+            continue
+
+        for workout_set in entry.sets:
+            weight = to_kg(workout_set.weight, entry.weight_unit)
+            reps = workout_set.reps
+            values = []
+            if weight is not None:
+                values.append((RecordKind.MAX_WEIGHT, weight))
+            if reps is not None:
+                values.append((RecordKind.MAX_REPS, reps))
+            if weight is not None and reps is not None:
+                values.append(
+                    (RecordKind.MAX_ESTIMATED_1RM, float(estimated_1rm(weight, reps)))
+                )
+
+            for record_kind, value in values:
+                offer(
+                    PersonalRecordSchema(
+                        exercise_uuid=exercise_uuid,
+                        record_kind=record_kind,
+                        value=value,
+                        weight=weight,
+                        reps=reps,
+                        workout_uuid=workout_uuid,
+                        timestamp_start=timestamp_start,
+                    )
+                )
+
+            volumes[exercise_uuid] = volumes.get(exercise_uuid, 0) + (reps or 0) * (
+                weight or 0
+            )
+
+    for exercise_uuid, volume in volumes.items():
+        offer(
+            PersonalRecordSchema(
+                exercise_uuid=exercise_uuid,
+                record_kind=RecordKind.MAX_SESSION_VOLUME,
+                value=volume,
+                workout_uuid=workout_uuid,
+                timestamp_start=timestamp_start,
+            )
+        )
+
+    return records
+
+
+def update_personal_records(
+    session: Session, user_uuid: UUID, workout_uuid: UUID, workout: WorkoutContentSchema
+) -> list[PersonalRecordSchema]:
+    """
+    Actualitza els rècords personals de l'usuari amb un entrenament nou.
+    Només es consulten els rècords dels exercicis de l'entrenament, amb una única consulta,
+    i els canvis es confirmen amb el mateix commit que l'entrenament.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+        workout_uuid: L'UUID de l'entrenament afegit.
+        workout: L'entrenament afegit.
+
+    Returns:
+        Els rècords que l'entrenament ha superat. La primera vegada que es fa un exercici
+        els rècords es guarden, però no es retornen com a nous.
+    """
+    if workout.instance is None:  # Les plantilles no compten per als rècords
+        return []
+
+    candidates = workout_records(workout_uuid, workout)
+    if not candidates:
+        return []
+
+    # Rècords actuals dels exercicis de l'entrenament
+    current_records = {
+        (record.exercise_uuid, record.record_kind): record
+        for record in session.exec(
+            select(PersonalRecordModel)
+            .where(PersonalRecordModel.user_uuid == user_uuid)
+            .where(
+                PersonalRecordModel.exercise_uuid.in_(  # pyright: ignore[]
+                    {exercise_uuid for exercise_uuid, _ in candidates}
+                )
+            )
+        ).all()
+    }
+
+    new_records = []
+    for key, candidate in candidates.items():
+        current = current_records.get(key)
+        if current is None:
+            # Primer resultat de l'exercici
+            session.add(PersonalRecordModel(user_uuid=user_uuid, **candidate.model_dump()))
+        elif _record_key(candidate) > _record_key(current):
+            current.sqlmodel_update(candidate.model_dump())
+            session.add(current)
+            new_records.append(candidate)
+
+    return new_records
+
+
+def rebuild_personal_records(session: Session, user_uuid: UUID | None = None):
+    """
+    Torna a calcular els rècords personals a partir de l'historial de sèries.
+    Utilitza els mateixos criteris que `workout_records`: en cas d'empat es queda
+    el resultat més antic. Els canvis s'han de confirmar amb `session.commit()`.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari a recalcular. Si és None, es recalculen tots els usuaris.
+    """
+    # Sèries de tots els entrenaments realitzats, amb el pes en quilograms
+    stored_sets = all_sets()
+    sets_query = (
+        select(
+            WorkoutContentModel.creator_uuid.label("user_uuid"),  # pyright: ignore[]
+            stored_sets.c.exercise_uuid,
+            WorkoutContentModel.uuid.label("workout_uuid"),  # pyright: ignore[]
+            WorkoutInstanceModel.timestamp_start,
+            stored_sets.c.reps,
+            stored_sets.c.weight_kg.label("weight"),
+        )
+        .select_from(stored_sets)
+        .join(
+            WorkoutContentModel,
+            WorkoutContentModel.uuid == stored_sets.c.workout_uuid,  # pyright: ignore[]
+        )
+        .join(
+            WorkoutInstanceModel,
+            WorkoutInstanceModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+    )
+    clear_records = delete(PersonalRecordModel)
+    if user_uuid is not None:
+        sets_query = sets_query.where(WorkoutContentModel.creator_uuid == user_uuid)
+        clear_records = clear_records.where(PersonalRecordModel.user_uuid == user_uuid)  # pyright: ignore[]
+    sets = sets_query.subquery()
+
+    # Volum de cada exercici en cada entrenament
+    volumes = (
+        select(
+            sets.c.user_uuid,
+            sets.c.exercise_uuid,
+            sets.c.workout_uuid,
+            sets.c.timestamp_start,
+            func.sum(
+                func.coalesce(sets.c.reps, 0) * func.coalesce(sets.c.weight, 0)
+            ).label("volume"),
+        )
+        .group_by(
+            sets.c.user_uuid,
+            sets.c.exercise_uuid,
+            sets.c.workout_uuid,
+            sets.c.timestamp_start,
+        )
+        .subquery()
+    )
+
+    # Mateixa fórmula d'Epley que `progress.estimated_1rm`
+    e1rm = case(
+        (sets.c.reps > 1, sets.c.weight * (1 + sets.c.reps / 30.0)),
+        (sets.c.reps > 0, sets.c.weight),
+        else_=0,
+    )
+    record_kind_type = PersonalRecordModel.__table__.c.record_kind.type  # pyright: ignore[]
+
+    def best(source, record_kind, value, weight, reps, *tiebreak):
+        # DISTINCT ON es queda amb la primera fila de cada (usuari, exercici):
+        # la de valor més alt, desempatant per `tiebreak` i després per la més antiga
+        return (
+            select(
+                source.c.user_uuid,
+                source.c.exercise_uuid,
+                literal(record_kind, record_kind_type),
+                value,
+                weight,
+                reps,
+                source.c.workout_uuid,
+                source.c.timestamp_start,
+            )
+            .distinct(source.c.user_uuid, source.c.exercise_uuid)
+            .where(value > 0)
+            .order_by(
+                source.c.user_uuid,
+                source.c.exercise_uuid,
+                value.desc(),
+                *(column.desc() for column in tiebreak),
+                source.c.timestamp_start,
+            )
+        )
+
+    record_queries = [
+        best(
+            sets,
+            RecordKind.MAX_WEIGHT,
+            sets.c.weight,
+            sets.c.weight,
+            sets.c.reps,
+            func.coalesce(sets.c.reps, 0),
+        ),
+        best(
+            sets,
+            RecordKind.MAX_REPS,
+            sets.c.reps,
+            sets.c.weight,
+            sets.c.reps,
+            func.coalesce(sets.c.weight, 0),
+        ),
+        best(
+            sets,
+            RecordKind.MAX_ESTIMATED_1RM,
+            e1rm,
+            sets.c.weight,
+            sets.c.reps,
+        ).where(sets.c.weight.is_not(None)),
+        best(
+            volumes,
+            RecordKind.MAX_SESSION_VOLUME,
+            volumes.c.volume,
+            null(),
+            null(),
+        ),
+    ]
+
+    session.exec(clear_records)  # pyright: ignore[]
+    for query in record_queries:
+        session.exec(
+            insert(PersonalRecordModel).from_select(  # pyright: ignore[]
+                [
+                    "user_uuid",
+                    "exercise_uuid",
+                    "record_kind",
+                    "value",
+                    "weight",
+                    "reps",
+                    "workout_uuid",
+                    "timestamp_start",
+                ],
+                query,
+            )
+        )
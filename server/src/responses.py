@@ -0,0 +1,121 @@
+from typing import Any, Iterable, Iterator
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+# Opcions d'orjson: claus de diccionari no textuals (UUID, enums, enters) i arrays de numpy.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Nombre d'elements que es llegeixen de la base de dades i es serialitzen cada vegada
+# a les respostes en streaming.
+STREAM_BATCH_SIZE = 100
+
+
+def quality_values(header: str) -> dict[str, float]:
+    """
+    Obté la preferència (`q`) de cada valor d'una capçalera de negociació, com `Accept`
+    o `Accept-Encoding`. Els valors sense `q` tenen preferència 1.
+
+    Args:
+        header: El valor de la capçalera.
+
+    Returns:
+        Un diccionari amb cada valor (en minúscules) i la seva preferència.
+    """
+    qualities = {}
+    for item in header.split(","):
+        value, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        if value.strip():
+            qualities[value.strip().lower()] = quality
+    return qualities
+
+
+def _default(value: Any) -> Any:
+    """
+    Converteix els valors que orjson no sap serialitzar directament.
+    orjson ja serialitza els UUID, els enums (pel seu valor), les dates i els dataclasses;
+    els models de Pydantic i SQLModel es converteixen amb `model_dump`.
+
+    Raises:
+        TypeError: Si el valor no es pot convertir a JSON.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON serialitzada amb orjson, que és la resposta per defecte de l'aplicació.
+    Genera directament els bytes del cos, de manera que les respostes grans (llistes
+    d'entrenaments amb entrades, sèries i exercicis) es serialitzen molt més ràpid que
+    amb el mòdul `json` de la biblioteca estàndard. El JSON resultant és equivalent:
+    UTF-8 sense escapar, sense espais i amb els mateixos valors.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_response(content: Any, response: Response | None = None) -> FastJSONResponse:
+    """
+    Crea una resposta JSON a partir del resultat d'una ruta. FastAPI envia les respostes
+    que retorna la ruta tal com són, sense validar-les amb el `response_model`.
+
+    Args:
+        content: El contingut de la resposta (per exemple, dataclasses de `read_models.py`).
+        response: La resposta injectada a la ruta, per conservar-ne les capçaleres (com l'ETag).
+
+    Returns:
+        La resposta serialitzada amb orjson.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, headers=headers)
+
+
+def stream_json_list(batches: Iterable[list[Any]]) -> Iterator[bytes]:
+    """
+    Genera una llista JSON a partir de grups d'elements, serialitzant cada grup amb orjson
+    a mesura que s'obté.
+    """
+    yield b"["
+    separator = b""
+    for batch in batches:
+        if batch:
+            yield separator + b",".join(
+                orjson.dumps(item, default=_default, option=ORJSON_OPTIONS) for item in batch
+            )
+            separator = b","
+    yield b"]"
+
+
+def json_stream_response(
+    batches: Iterable[list[Any]], response: Response | None = None
+) -> StreamingResponse:
+    """
+    Crea una resposta JSON en streaming amb una llista que es llegeix per grups (per
+    exemple, d'un cursor del servidor), de manera que la memòria no depèn de la mida de
+    la llista i el client rep els primers elements abans que s'acabi la consulta.
+    El JSON és idèntic al de `json_response` amb la llista completa.
+
+    Args:
+        batches: Els grups d'elements de la llista, en ordre.
+        response: La resposta injectada a la ruta, per conservar-ne les capçaleres (com l'ETag).
+
+    Returns:
+        La resposta en streaming.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return StreamingResponse(
+        stream_json_list(batches), media_type="application/json", headers=headers
+    )
@@ -1,19 +1,44 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, desc, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import contains_eager
+from sqlmodel import Session, func, select
 
+from data.default_exercises import DEFAULT_EXERCISES
 from db import get_session
+from etag import conditional_response, make_etag
+from history import get_exercise_history
 from models.exercise import DefaultExerciseModel, ExerciseModel
+from models.record import PersonalRecordModel
 from models.users import UserModel
-from models.workout import WorkoutContentModel, WorkoutEntryModel, WorkoutInstanceModel
-from schemas.exercise_schema import ExerciseSchema
-from schemas.workout_schema import WorkoutEntrySchema
+from models.workout import (
+    LatestWorkoutEntryModel,
+    WorkoutContentModel,
+    WorkoutEntryModel,
+    WorkoutInstanceModel,
+    WorkoutSetModel,
+)
+from progress import compute_progress
+from read_models import read_exercises
+from responses import json_response
+from schemas.exercise_schema import ExerciseProgressSchema, ExerciseSchema
+from schemas.record_schema import PersonalRecordSchema
+from schemas.workout_schema import ExerciseHistorySchema, WorkoutEntrySchema
 from security import get_current_active_user
+from set_storage import all_sets
+from versioning import get_user_change_version, next_change_version
 
 # Creació d'un router FastAPI per agrupar les rutes relacionades amb els exercicis
 router = APIRouter()
 
+# ETag de la llista d'exercicis per defecte.
+# Aquests exercicis només canvien amb una nova versió del servidor, per tant l'ETag
+# es calcula un sol cop a partir de la llista predefinida.
+DEFAULT_EXERCISES_ETAG = make_etag(
+    "default-exercises", *(exercise.model_dump_json() for exercise in DEFAULT_EXERCISES)
+)
+
 
 @router.get(
     "/default-exercises",
@@ -27,6 +52,8 @@ router = APIRouter()
     ],  # El tipus de resposta esperat és una llista de DefaultExerciseModel
 )
 async def get_default_exercises(
+    request: Request,  # Petició HTTP, per llegir la capçalera If-None-Match
+    response: Response,  # Resposta HTTP, per afegir la capçalera ETag
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual (per assegurar l'autenticació)
@@ -37,14 +64,21 @@ async def get_default_exercises(
     """
     Obté una llista de tots els exercicis per defecte disponibles en el sistema.
     Aquests són exercicis predefinits que els usuaris poden utilitzar.
+    Si el client envia l'ETag actual a `If-None-Match`, es retorna un 304 sense consultar la BD.
 
     Args:
+        request: La petició HTTP.
+        response: La resposta HTTP.
         current_user: L'usuari actualment autenticat (per protegir l'endpoint).
         session: La sessió de base de dades.
 
     Returns:
         Una llista d'objectes DefaultExerciseModel.
     """
+    not_modified = conditional_response(request, response, DEFAULT_EXERCISES_ETAG)
+    if not_modified:  # El client ja té la llista actual
+        return not_modified  # pyright: ignore[]
+
     query = select(
         DefaultExerciseModel
     )  # Construeix una consulta per seleccionar tots els exercicis per defecte
@@ -105,34 +139,130 @@ async def get_default_exercise(
     response_model=list[ExerciseModel],  # La resposta serà una llista d'ExerciseModel
 )
 async def get_exercises(
+    request: Request,  # Petició HTTP, per llegir la capçalera If-None-Match
+    response: Response,  # Resposta HTTP, per afegir la capçalera ETag
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual
     session: Session = Depends(get_session),  # Injecta una sessió de base de dades
-) -> list[ExerciseModel]:  # El tipus de retorn és una llista d'ExerciseModel
+) -> Response:  # La resposta JSON amb la llista d'exercicis
     """
     Obté una llista de tots els exercicis personalitzats i habilitats
     creats per l'usuari actual.
+    Si el client envia l'ETag actual a `If-None-Match`, es retorna un 304 sense executar la consulta.
+
+    Args:
+        request: La petició HTTP.
+        response: La resposta HTTP.
+        current_user: L'usuari actualment autenticat.
+        session: La sessió de base de dades.
+
+    Returns:
+        Una resposta JSON amb la llista dels exercicis de l'usuari.
+    """
+    # L'ETag depèn de la versió de canvi de les dades de l'usuari
+    etag = make_etag(
+        "user-exercises",
+        current_user.uuid,
+        get_user_change_version(session, current_user.uuid),
+    )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:  # El client ja té la llista actual
+        return not_modified  # pyright: ignore[]
+
+    # Llegeix els exercicis sense l'ORM i retorna la resposta ja serialitzada (vegeu read_models.py)
+    return json_response(read_exercises(session, current_user.uuid), response)
+
+
+# Aquesta ruta s'ha de declarar abans de "/user/exercises/{exercise_uuid}",
+# altrament "last" s'interpretaria com l'UUID d'un exercici.
+@router.get(
+    "/user/exercises/last",
+    name="Get last recorded entries for several exercises",
+    tags=["Exercises"],
+    response_model=dict[UUID, WorkoutEntrySchema],  # La resposta serà un diccionari de WorkoutEntrySchema
+)
+async def get_last_exercises(
+    exercise_uuids: list[UUID] = Query(
+        default=[], max_length=100
+    ),  # UUIDs dels exercicis (es pot repetir el paràmetre)
+    template_uuid: UUID | None = None,  # UUID d'una plantilla per consultar tots els seus exercicis
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> dict[UUID, WorkoutEntryModel]:
+    """
+    Obté l'última entrada registrada de diversos exercicis de l'usuari actual en una sola
+    petició, per exemple tots els exercicis d'una plantilla en començar un entrenament.
+    Les entrades i les seves sèries s'obtenen amb una única consulta, a partir dels punters
+    a l'última entrada de cada exercici (`latest_workout_entry`).
 
     Args:
+        exercise_uuids: Els UUIDs dels exercicis.
+        template_uuid: L'UUID d'una plantilla de l'usuari; s'hi afegeixen tots els seus exercicis.
         current_user: L'usuari actualment autenticat.
         session: La sessió de base de dades.
 
+    Raises:
+        HTTPException: Si no s'indica cap exercici ni plantilla (codi 400)
+            o si la plantilla no es troba (codi 404).
+
     Returns:
-        Una llista d'objectes ExerciseModel que representen els exercicis de l'usuari.
+        Un diccionari amb l'última entrada de cada exercici, indexat per l'UUID de l'exercici.
+        Els exercicis que l'usuari no ha fet mai no hi apareixen.
     """
-    # Construeix la consulta per seleccionar els exercicis de l'usuari
+    if not exercise_uuids and template_uuid is None:
+        raise HTTPException(
+            status_code=400, detail="exercise_uuids or template_uuid is required"
+        )
+
+    # Exercicis sol·licitats: els indicats i els de la plantilla (com a subconsulta)
+    exercise_filter = LatestWorkoutEntryModel.exercise_uuid.in_(exercise_uuids)  # pyright: ignore[]
+    if template_uuid is not None:
+        template_exercises = (
+            select(WorkoutEntryModel.exercise_uuid)
+            .join(
+                WorkoutContentModel,
+                WorkoutEntryModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+            )
+            .where(WorkoutContentModel.uuid == template_uuid)
+            .where(WorkoutContentModel.creator_uuid == current_user.uuid)
+        )
+        exercise_filter = exercise_filter | LatestWorkoutEntryModel.exercise_uuid.in_(  # pyright: ignore[]
+            template_exercises
+        )
+
+    # Segueix el punter a l'última entrada de cada exercici i carrega les entrades
+    # amb les seves sèries i exercicis en la mateixa consulta
     query = (
-        select(ExerciseModel)
-        .where(
-            ExerciseModel.creator_uuid == current_user.uuid
-        )  # Filtra pels exercicis creats per l'usuari actual
+        select(WorkoutEntryModel)
+        .join(
+            LatestWorkoutEntryModel,
+            (WorkoutEntryModel.workout_uuid == LatestWorkoutEntryModel.workout_uuid)  # pyright: ignore[]
+            & (WorkoutEntryModel.index == LatestWorkoutEntryModel.entry_index),
+        )
+        .join(WorkoutEntryModel.exercise)  # pyright: ignore[]
+        .outerjoin(WorkoutEntryModel.sets)  # pyright: ignore[]
+        .options(
+            contains_eager(WorkoutEntryModel.exercise),  # pyright: ignore[]
+            contains_eager(WorkoutEntryModel.sets),  # pyright: ignore[]
+        )
         .where(
-            ExerciseModel.is_disabled == False
-        )  # Filtra només pels exercicis habilitats (no arxivats)
+            LatestWorkoutEntryModel.user_uuid == current_user.uuid
+        )  # Filtra pels punters de l'usuari actual
+        .where(exercise_filter)
+        .order_by(WorkoutSetModel.index)  # Manté l'ordre de les sèries
     )
-    exercises = list(session.exec(query).all())  # Executa la consulta
-    return exercises
+    entries = session.exec(query).unique().all()
+
+    # Si no hi ha cap resultat, comprova que la plantilla existeixi
+    if not entries and template_uuid is not None:
+        template = session.get(WorkoutContentModel, template_uuid)
+        if template is None or template.creator_uuid != current_user.uuid:
+            raise HTTPException(status_code=404, detail="Template not found")
+
+    return {entry.exercise_uuid: entry for entry in entries}
 
 
 @router.get(
@@ -215,6 +345,8 @@ async def create_exercise(
     new_exercise_model = ExerciseModel(
         **new_exercise_dict,
         creator_uuid=current_user.uuid,  # Afegeix el creador
+        # Versió de canvi. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+        version=next_change_version(session, current_user.uuid),
     )
     session.add(new_exercise_model)  # Afegeix el nou exercici a la sessió
     session.commit()  # Guarda a la BD
@@ -273,6 +405,8 @@ async def update_exercise(
         exclude_none=True, exclude={"default_exercise_uuid", "is_disabled", "uuid"}
     )
     exercise.sqlmodel_update(fields_to_edit_dict)  # Aplica les actualitzacions al model
+    # Marca l'exercici com a modificat. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    exercise.version = next_change_version(session, current_user.uuid)
     session.add(exercise)  # Afegeix l'exercici actualitzat a la sessió
     session.commit()  # Guarda els canvis
 
@@ -323,6 +457,8 @@ async def delete_exercise(
         )
 
     exercise.is_disabled = True  # Marca l'exercici com a desactivat
+    # Marca l'exercici com a modificat. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    exercise.version = next_change_version(session, current_user.uuid)
     session.add(exercise)  # Afegeix a la sessió
     session.commit()  # Guarda el canvi
 
@@ -355,27 +491,20 @@ async def get_last_exercise(
     Returns:
         L'objecte WorkoutEntryModel de l'última vegada que es va realitzar l'exercici.
     """
-    # Construeix una consulta per trobar l'última entrada d'un exercici
+    # Segueix el punter a l'última entrada de l'exercici: una lectura per clau primària
     query = (
         select(WorkoutEntryModel)  # Selecciona l'entrada de l'entrenament
         .join(
-            WorkoutContentModel,  # Fa un join amb el contingut de l'entrenament
-            WorkoutEntryModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
-        )
-        .join(
-            WorkoutInstanceModel,  # Fa un join amb la instància de l'entrenament per ordenar per data
-            WorkoutInstanceModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+            LatestWorkoutEntryModel,  # Fa un join amb el punter a l'última entrada
+            (WorkoutEntryModel.workout_uuid == LatestWorkoutEntryModel.workout_uuid)  # pyright: ignore[]
+            & (WorkoutEntryModel.index == LatestWorkoutEntryModel.entry_index),
         )
         .where(
-            WorkoutContentModel.creator_uuid == current_user.uuid
-        )  # Filtra per entrenaments de l'usuari actual
+            LatestWorkoutEntryModel.user_uuid == current_user.uuid
+        )  # Filtra pels punters de l'usuari actual
         .where(
-            WorkoutEntryModel.exercise_uuid == UUID(exercise_uuid)
+            LatestWorkoutEntryModel.exercise_uuid == UUID(exercise_uuid)
         )  # Filtra per l'exercici específic
-        .order_by(
-            desc(WorkoutInstanceModel.timestamp_start)
-        )  # Ordena per la data d'inici de l'entrenament en ordre descendent
-        .limit(1)  # Pren només el resultat més recent
     )
     workout_entry = session.exec(query).first()  # Executa la consulta
 
@@ -387,6 +516,148 @@ async def get_last_exercise(
     return workout_entry
 
 
+@router.get(
+    "/user/exercises/{exercise_uuid}/progress",
+    name="Get progress over time for a specific exercise",
+    tags=["Exercises"],
+    response_model=ExerciseProgressSchema,  # La resposta serà un ExerciseProgressSchema
+)
+async def get_exercise_progress(
+    exercise_uuid: UUID,  # L'UUID de l'exercici del qual obtenir l'evolució
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> ExerciseProgressSchema:
+    """
+    Obté l'evolució d'un exercici al llarg de totes les sessions de l'usuari actual:
+    la sèrie més pesada, l'1RM estimat, el volum i les repeticions totals de cada sessió.
+    Les sèries s'obtenen amb una única consulta que retorna un array per columna,
+    i s'agreguen per sessió amb NumPy (vegeu `progress.compute_progress`).
+
+    Args:
+        exercise_uuid: L'UUID de l'exercici.
+        current_user: L'usuari actualment autenticat.
+        session: La sessió de base de dades.
+
+    Returns:
+        Un objecte ExerciseProgressSchema amb una posició per sessió, de la més antiga a la més recent.
+    """
+    # Sèries de l'exercici. Cada sessió s'identifica per l'inici del seu entrenament.
+    # Els valors NULL es tracten com a 0.
+    stored_sets = all_sets()
+    sets = (
+        select(
+            WorkoutInstanceModel.timestamp_start,
+            func.coalesce(stored_sets.c.reps, 0).label("reps"),
+            func.coalesce(stored_sets.c.weight_kg, 0).label("weight"),
+        )
+        .select_from(stored_sets)
+        .join(
+            WorkoutContentModel,
+            WorkoutContentModel.uuid == stored_sets.c.workout_uuid,  # pyright: ignore[]
+        )
+        .join(
+            WorkoutInstanceModel,
+            WorkoutInstanceModel.workout_uuid == WorkoutContentModel.uuid,  # pyright: ignore[]
+        )
+        .where(
+            WorkoutContentModel.creator_uuid == current_user.uuid
+        )  # Filtra per entrenaments de l'usuari actual
+        .where(
+            stored_sets.c.exercise_uuid == exercise_uuid
+        )  # Filtra per l'exercici específic
+        .subquery()
+    )
+
+    # Una única fila amb un array per columna, en lloc d'una fila per sèrie.
+    # Totes les columnes s'ordenen per sessió, pes i repeticions, de manera que
+    # l'última sèrie de cada sessió és la més pesada.
+    order = (sets.c.timestamp_start, sets.c.weight, sets.c.reps)
+    columns = session.exec(
+        select(  # pyright: ignore[]
+            *(func.array_agg(aggregate_order_by(column, *order)) for column in sets.c)
+        )
+    ).one()
+
+    return compute_progress(*columns)
+
+
+@router.get(
+    "/user/exercises/{exercise_uuid}/history",
+    name="Get history for a specific exercise",
+    tags=["Exercises"],
+    response_model=ExerciseHistorySchema,  # La resposta serà un ExerciseHistorySchema
+)
+async def get_exercise_history_page(
+    exercise_uuid: UUID,  # L'UUID de l'exercici del qual obtenir l'historial
+    before: str | None = None,  # Cursor de la pàgina anterior (`next_cursor`)
+    limit: int = Query(default=25, ge=1, le=100),  # Nombre màxim d'entrades a retornar
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> ExerciseHistorySchema:
+    """
+    Obté l'historial d'un exercici de l'usuari actual, de l'entrada més recent a la més antiga,
+    amb paginació per cursor. Per obtenir la pàgina següent s'envia `next_cursor` com a `before`.
+
+    Args:
+        exercise_uuid: L'UUID de l'exercici.
+        before: El cursor de la pàgina anterior, o None per a la primera pàgina.
+        limit: El nombre màxim d'entrades a retornar.
+        current_user: L'usuari actualment autenticat.
+        session: La sessió de base de dades.
+
+    Raises:
+        HTTPException: Si el cursor no és vàlid (codi 400).
+
+    Returns:
+        Un objecte ExerciseHistorySchema amb les entrades i el cursor de la pàgina següent.
+    """
+    return get_exercise_history(  # pyright: ignore[]
+        session, current_user.uuid, exercise_uuid, before, limit
+    )
+
+
+@router.get(
+    "/user/exercises/{exercise_uuid}/records",
+    name="Get personal records for a specific exercise",
+    tags=["Exercises"],
+    response_model=list[PersonalRecordSchema],  # La resposta serà una llista de PersonalRecordSchema
+)
+async def get_exercise_records(
+    exercise_uuid: UUID,  # L'UUID de l'exercici del qual obtenir els rècords
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> list[PersonalRecordModel]:
+    """
+    Obté els rècords personals de l'usuari actual per a un exercici específic.
+    Els rècords es mantenen en afegir cada entrenament, de manera que la consulta
+    no depèn de la mida de l'historial.
+
+    Args:
+        exercise_uuid: L'UUID de l'exercici.
+        current_user: L'usuari actualment autenticat.
+        session: La sessió de base de dades.
+
+    Returns:
+        Una llista amb un rècord per a cada tipus de rècord aconseguit.
+    """
+    query = (
+        select(PersonalRecordModel)
+        .where(
+            PersonalRecordModel.user_uuid == current_user.uuid
+        )  # Filtra pels rècords de l'usuari actual
+        .where(
+            PersonalRecordModel.exercise_uuid == exercise_uuid
+        )  # Filtra per l'exercici específic
+    )
+    return list(session.exec(query).all())
+
+
 @router.get(
     "/user/archived-exercises",
     name="Get user's archived (disabled) custom exercises",
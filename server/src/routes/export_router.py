@@ -0,0 +1,45 @@
+from export import MEDIA_TYPES, export_user_data
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from models.users import UserModel
+from schemas.types.enums import ExportFormat
+from security import get_current_active_user
+
+# Creació d'un router FastAPI per agrupar les rutes d'exportació de dades
+router = APIRouter()
+
+
+@router.get(
+    "/user/export",
+    response_class=StreamingResponse,  # La resposta s'envia a mesura que es genera
+    name="Export all user data",  # Nom de la ruta per a la documentació OpenAPI
+    tags=["Export"],  # Etiqueta per agrupar rutes a la documentació OpenAPI
+)
+async def export_user(
+    export_format: ExportFormat = Query(
+        default=ExportFormat.NDJSON, alias="format"
+    ),  # Format de l'exportació (ndjson o csv)
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+) -> StreamingResponse:
+    """
+    Exporta totes les dades de l'usuari actual: exercicis personalitzats, entrenaments,
+    plantilles, entrades, sèries i missatges. La resposta es genera i s'envia per parts
+    a partir d'un cursor del servidor, de manera que la memòria utilitzada no depèn
+    de la mida de l'historial.
+
+    Args:
+        export_format: El format de l'exportació (NDJSON o CSV).
+        current_user: L'usuari actualment autenticat.
+
+    Returns:
+        Una resposta en streaming amb l'exportació com a fitxer adjunt.
+    """
+    return StreamingResponse(
+        export_user_data(current_user.uuid, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="ultra-export.{export_format.value}"'
+        },
+    )
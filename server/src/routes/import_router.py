@@ -0,0 +1,68 @@
+import csv
+import io
+
+from csv_import import import_workouts_csv
+from db import get_session
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from models.users import UserConfig, UserModel
+from schemas.types.enums import WeightUnit
+from schemas.workout_schema import WorkoutImportSchema
+from security import get_current_active_user, get_current_user_settings
+from sqlmodel import Session
+
+# Creació d'un router FastAPI per agrupar les rutes d'importació de dades
+router = APIRouter()
+
+
+@router.post(
+    "/user/import",
+    response_model=WorkoutImportSchema,  # El tipus de resposta esperat és un WorkoutImportSchema
+    name="Import workout history from CSV",  # Nom de la ruta per a la documentació OpenAPI
+    tags=["Import"],  # Etiqueta per agrupar rutes a la documentació OpenAPI
+)
+def import_user_workouts(
+    file: UploadFile = File(...),  # Fitxer CSV exportat d'una altra aplicació
+    weight_unit: WeightUnit = Query(
+        default=WeightUnit.METRIC
+    ),  # Unitat dels pesos del fitxer, si la columna no la indica
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    current_user_settings: UserConfig = Depends(
+        get_current_user_settings
+    ),  # Injecta la configuració de l'usuari actual (per a la zona horària)
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> WorkoutImportSchema:
+    """
+    Importa a l'historial de l'usuari actual els entrenaments d'un CSV exportat d'una
+    altra aplicació (vegeu `import_workouts_csv`). El fitxer es llegeix fila a fila.
+    La ruta és síncrona perquè FastAPI l'executi fora del bucle d'esdeveniments.
+
+    Args:
+        file: El fitxer CSV.
+        weight_unit: La unitat dels pesos, si la columna de pes no la indica.
+        current_user: L'usuari actualment autenticat.
+        current_user_settings: La configuració de l'usuari actual.
+        session: La sessió de base de dades.
+
+    Raises:
+        HTTPException: Si el fitxer no és un CSV vàlid (codi 400).
+
+    Returns:
+        Un objecte WorkoutImportSchema amb el nombre d'elements importats.
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        summary = import_workouts_csv(
+            session,
+            current_user.uuid,
+            current_user_settings.timezone,
+            lines,
+            weight_unit,
+        )
+    except (ValueError, csv.Error) as error:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(error))
+
+    session.commit()
+    return WorkoutImportSchema(**summary)
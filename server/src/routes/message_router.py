@@ -2,11 +2,13 @@ from datetime import datetime
 from uuid import UUID
 
 from db import get_session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from models.chat import MessageModel
 from models.users import UserModel
+from read_models import stream_messages
+from responses import json_response, json_stream_response
 from security import get_current_active_user, get_trainer_user
-from sqlmodel import Session, asc, select
+from sqlmodel import Session
 
 # Creació d'un router FastAPI per agrupar les rutes relacionades amb els missatges
 router = APIRouter()
@@ -24,43 +26,25 @@ async def get_messages_user(
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual
-    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
-) -> list[
-    MessageModel
-]:  # El tipus de retorn de la funció és una llista de MessageModel
+) -> Response:  # La resposta JSON amb la llista de missatges
     """
     Obté tots els missatges entre l'usuari actual i el seu entrenador vinculat,
     ordenats cronològicament.
 
     Args:
         current_user: L'usuari actualment autenticat. Ha de tenir un entrenador vinculat.
-        session: La sessió de base de dades.
 
     Returns:
-        Una llista de missatges. Retorna una llista buida si no hi ha entrenador o missatges.
+        Una resposta JSON amb la llista de missatges. La llista és buida si no hi ha
+        entrenador o missatges.
     """
     if not current_user.trainer_uuid:  # Comprova si l'usuari té un entrenador assignat
-        return []  # Si no té entrenador, no pot haver-hi missatges amb ell
-
-    # Construeix la consulta per seleccionar els missatges
-    query = (
-        select(MessageModel)
-        .where(
-            MessageModel.user_uuid == current_user.uuid
-        )  # Filtra pels missatges on l'usuari és el 'user_uuid'
-        .where(
-            MessageModel.trainer_uuid == current_user.trainer_uuid
-        )  # Filtra pels missatges on l'entrenador és el 'trainer_uuid' de l'usuari
-        .order_by(
-            asc(MessageModel.timestamp)
-        )  # Ordena els missatges per la marca de temps en ordre ascendent (més antics primer)
-    )
+        return json_response([])  # Si no té entrenador, no pot haver-hi missatges amb ell
 
-    messages = session.exec(
-        query
-    ).all()  # Executa la consulta i obté tots els resultats
-
-    return messages
+    # Envia els missatges a mesura que es llegeixen amb un cursor del servidor, sense l'ORM (vegeu read_models.py)
+    return json_stream_response(
+        stream_messages(current_user.uuid, current_user.trainer_uuid)
+    )
 
 
 @router.post(
@@ -117,8 +101,7 @@ async def get_messages_trainer(
     trainer_user: UserModel = Depends(
         get_trainer_user
     ),  # Injecta l'usuari entrenador actual
-    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
-) -> list[MessageModel]:  # El tipus de retorn és una llista de MessageModel
+) -> Response:  # La resposta JSON amb la llista de missatges
     """
     Obté tots els missatges entre un usuari específic (vinculat a l'entrenador)
     i l'entrenador actual, ordenats cronològicament.
@@ -126,28 +109,12 @@ async def get_messages_trainer(
     Args:
         user_uuid: L'UUID de l'usuari amb qui l'entrenador vol veure els missatges.
         trainer_user: L'usuari entrenador actualment autenticat.
-        session: La sessió de base de dades.
 
     Returns:
-        Una llista de missatges.
+        Una resposta JSON amb la llista de missatges.
     """
-    # Construeix la consulta per seleccionar els missatges
-    query = (
-        select(MessageModel)
-        .where(
-            MessageModel.user_uuid == UUID(user_uuid)
-        )  # Filtra pels missatges de l'usuari especificat
-        .where(
-            MessageModel.trainer_uuid == trainer_user.uuid
-        )  # Filtra pels missatges on l'entrenador és l'entrenador actual
-        .order_by(
-            asc(MessageModel.timestamp)
-        )  # Ordena els missatges per marca de temps ascendent
-    )
-
-    messages = session.exec(query).all()  # Executa la consulta
-
-    return messages
+    # Envia els missatges a mesura que es llegeixen amb un cursor del servidor, sense l'ORM (vegeu read_models.py)
+    return json_stream_response(stream_messages(UUID(user_uuid), trainer_user.uuid))
 
 
 @router.post(
@@ -0,0 +1,104 @@
+from archive import restore_archived_workouts
+from db import get_session
+from fastapi import APIRouter, Depends, Query
+from models.exercise import ExerciseModel
+from models.sync import DeletedEntityModel
+from models.users import UserModel
+from models.workout import WorkoutContentModel, WorkoutInstanceModel
+from schemas.sync_schema import DeletedEntitySchema, SyncSchema
+from security import get_current_active_user
+from sqlmodel import Session, select
+
+# Creació d'un router FastAPI per agrupar les rutes de sincronització
+router = APIRouter()
+
+
+@router.get(
+    "/user/sync",
+    response_model=SyncSchema,  # El tipus de resposta esperat és un SyncSchema
+    name="Get changes since a version",  # Nom de la ruta per a la documentació OpenAPI
+    tags=["Sync"],  # Etiqueta per agrupar rutes a la documentació OpenAPI
+)
+async def get_user_changes(
+    since: int = Query(
+        default=0, ge=0
+    ),  # Última versió sincronitzada pel client (0 per a una sincronització completa)
+    current_user: UserModel = Depends(
+        get_current_active_user
+    ),  # Injecta l'usuari actiu actual
+    session: Session = Depends(get_session),  # Injecta una sessió de base de dades
+) -> SyncSchema:
+    """
+    Obté els entrenaments, plantilles i exercicis de l'usuari actual que han canviat
+    després de la versió `since`, així com les entitats eliminades des d'aleshores.
+    Les consultes utilitzen els índexs (creator_uuid, version), de manera que el cost
+    és proporcional a la mida del canvi i no a la de l'historial.
+
+    Args:
+        since: L'última versió que el client ja té sincronitzada.
+        current_user: L'usuari actualment autenticat.
+        session: La sessió de base de dades.
+
+    Returns:
+        Un objecte SyncSchema amb els canvis i la nova versió que el client ha de guardar.
+    """
+    # Entrenaments realitzats (amb instància) modificats després de la versió indicada
+    workouts = session.exec(
+        select(WorkoutContentModel)
+        .join(WorkoutInstanceModel)
+        .where(WorkoutContentModel.creator_uuid == current_user.uuid)
+        .where(WorkoutContentModel.version > since)  # pyright: ignore[]
+        .order_by(WorkoutContentModel.version)  # pyright: ignore[]
+    ).all()
+
+    # Plantilles (sense instància) modificades després de la versió indicada
+    templates = session.exec(
+        select(WorkoutContentModel)
+        .outerjoin(
+            WorkoutInstanceModel,
+            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
+        )
+        .where(WorkoutInstanceModel.workout_uuid == None)
+        .where(WorkoutContentModel.creator_uuid == current_user.uuid)
+        .where(WorkoutContentModel.version > since)  # pyright: ignore[]
+        .order_by(WorkoutContentModel.version)  # pyright: ignore[]
+    ).all()
+
+    # Exercicis personalitzats (inclosos els arxivats) modificats després de la versió indicada
+    exercises = session.exec(
+        select(ExerciseModel)
+        .where(ExerciseModel.creator_uuid == current_user.uuid)
+        .where(ExerciseModel.version > since)  # pyright: ignore[]
+        .order_by(ExerciseModel.version)  # pyright: ignore[]
+    ).all()
+
+    # Marques d'eliminació posteriors a la versió indicada
+    deleted = session.exec(
+        select(DeletedEntityModel)
+        .where(DeletedEntityModel.user_uuid == current_user.uuid)
+        .where(DeletedEntityModel.version > since)  # pyright: ignore[]
+        .order_by(DeletedEntityModel.version)  # pyright: ignore[]
+    ).all()
+
+    # La nova versió és la més alta de les entitats retornades (o la mateixa si no hi ha canvis).
+    # Les transaccions que encara no s'han confirmat tindran versions més altes, perquè cada
+    # escriptura bloqueja la fila de l'usuari a `user_change_version` abans d'obtenir-ne cap
+    # (vegeu `next_change_version`), així que el client no se'n salta cap.
+    version = max(
+        [since]
+        + [item.version for item in (*workouts, *templates, *exercises, *deleted)]  # pyright: ignore[]
+    )
+
+    # FastAPI valida el diccionari amb `response_model`, llegint els atributs dels models de la BD
+    return {
+        "version": version,
+        "workouts": restore_archived_workouts(session, list(workouts)),
+        "templates": templates,
+        "exercises": exercises,
+        "deleted": [
+            DeletedEntitySchema(
+                entity_uuid=item.entity_uuid, entity_type=item.entity_type
+            )
+            for item in deleted
+        ],
+    }  # pyright: ignore[]
@@ -1,17 +1,25 @@
 from uuid import uuid4, UUID
 
+from config import DATABASE_JSON
+from database_json import workouts_json_response
 from db import get_session
-from fastapi import APIRouter, Depends, HTTPException
+from etag import conditional_response, make_etag
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from models.users import UserModel
 from models.workout import (
     WorkoutContentModel,
     WorkoutEntryModel,
     WorkoutInstanceModel,
-    WorkoutSetModel,
 )
-from schemas.workout_schema import WorkoutContentSchema, WorkoutTemplateSchema
+from read_models import read_template_summaries, read_templates, user_templates_query
+from responses import json_response
+from schemas.types.enums import SyncEntityType, WorkoutView
+from schemas.workout_schema import WorkoutContentSchema, WorkoutSummarySchema, WorkoutTemplateSchema
 from security import get_current_active_user
+from set_storage import add_entry_sets
+from sqlalchemy import delete, exists
 from sqlmodel import Session, select
+from versioning import get_user_change_version, next_change_version, record_deletion
 
 
 # Creació d'un router FastAPI per agrupar les rutes
@@ -20,39 +28,55 @@ router = APIRouter()
 
 @router.get(
     "/user/templates",
-    response_model=list[WorkoutContentSchema], # El tipus de resposta esperat és una llista de WorkoutContentSchema
+    # El tipus de resposta esperat és una llista de WorkoutContentSchema, o de WorkoutSummarySchema amb `view=summary`
+    response_model=list[WorkoutContentSchema] | list[WorkoutSummarySchema],
     name="Get user workout templates", # Nom de la ruta per a la documentació OpenAPI
     tags=["Templates"], # Etiqueta per agrupar rutes a la documentació OpenAPI
 )
 async def get_user_templates(
+    request: Request, # Petició HTTP, per llegir la capçalera If-None-Match
+    response: Response, # Resposta HTTP, per afegir la capçalera ETag
     current_user: UserModel = Depends(get_current_active_user), # Injecta l'usuari actiu actual
     session: Session = Depends(get_session), # Injecta una sessió de base de dades
-) -> list[WorkoutContentModel]: # El tipus de retorn de la funció és una llista de WorkoutContentModel
+    view: WorkoutView = WorkoutView.FULL, # Paràmetre de consulta: plantilles completes o només el resum
+) -> Response: # La resposta JSON amb la llista de plantilles
     """
     Obté una llista de totes les plantilles d'entrenament creades per l'usuari actual.
     Les plantilles es distingeixen dels entrenaments realitzats perquè no tenen una instància associada.
+    Amb `view=summary` retorna només el resum de cada plantilla (UUID, nom i nombre d'entrades
+    i de sèries), sense llegir les entrades ni les sèries.
+    Si el client envia l'ETag actual a `If-None-Match`, es retorna un 304 sense executar la consulta.
 
     Args:
+        request: La petició HTTP.
+        response: La resposta HTTP.
         current_user: L'usuari actualment autenticat.
         session: La sessió de base de dades.
+        view: `full` per a les plantilles completes o `summary` per al resum.
 
     Returns:
-        Una llista d'objectes WorkoutContentModel que representen les plantilles de l'usuari.
+        Una resposta JSON amb la llista de plantilles de l'usuari (o del seu resum), ordenades pel nom.
     """
-    # Construeix la consulta per seleccionar les plantilles de l'usuari
-    query = (
-        select(WorkoutContentModel) # Selecciona el model de contingut de l'entrenament
-        .outerjoin( # Utilitza un outer join per incloure WorkoutContentModel que no tenen correspondència a WorkoutInstanceModel
-            WorkoutInstanceModel,
-            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # Condició del join # pyright: ignore[]
-        )
-        .where(WorkoutInstanceModel.workout_uuid == None) # Filtra per aquells que NO tenen una instància (són plantilles)
-        .where(WorkoutContentModel.creator_uuid == current_user.uuid) # Filtra per les plantilles creades per l'usuari actual
-        .order_by(WorkoutContentModel.name) # Ordena els resultats pel nom de la plantilla
+    # L'ETag depèn de la versió de canvi de les dades de l'usuari
+    etag = make_etag(
+        "user-templates",
+        current_user.uuid,
+        get_user_change_version(session, current_user.uuid),
+        view.value,
     )
-    # Executa la consulta i obté tots els resultats
-    templates = session.exec(query).all()
-    return templates # pyright: ignore[]
+    not_modified = conditional_response(request, response, etag)
+    if not_modified: # El client ja té la llista actual
+        return not_modified # pyright: ignore[]
+
+    if view == WorkoutView.SUMMARY: # Només les columnes del resum, sense entrades ni sèries (vegeu read_models.py)
+        return json_response(read_template_summaries(session, current_user.uuid), response)
+
+    if DATABASE_JSON: # PostgreSQL genera el JSON de les plantilles (vegeu database_json.py)
+        template_uuids = session.exec(user_templates_query(current_user.uuid)).all()
+        return workouts_json_response(list(template_uuids), response)
+
+    # Llegeix les plantilles amb dues consultes, sense l'ORM, i retorna la resposta ja serialitzada (vegeu read_models.py)
+    return json_response(read_templates(session, current_user.uuid), response)
 
 
 @router.get(
@@ -125,12 +149,17 @@ async def add_user_template( # Nom de la funció corregit per reflectir que es t
     Returns:
         L'objecte WorkoutContentModel de la plantilla creada.
     """
+    # Versió de canvi de la plantilla. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    version = next_change_version(session, current_user.uuid)
+
     # Crea l'objecte principal de la plantilla (WorkoutContentModel)
     workout_content_entry = WorkoutContentModel(
         uuid=uuid4(), # Genera un nou UUID per a la plantilla
         creator_uuid=current_user.uuid, # Assigna l'UUID de l'usuari actual com a creador
+        version=version, # Versió de canvi per a la sincronització
         # Extreu 'name' i 'description' de l'objecte d'entrada, excloent valors None
         **input_workout.model_dump(exclude_none=True, include={"name", "description"}),
+        **input_workout.counts(), # Nombre d'entrades i de sèries, per a les llistes resumides
     )
 
     # Itera sobre cada entrada (exercici) de la plantilla d'entrada
@@ -153,18 +182,8 @@ async def add_user_template( # Nom de la funció corregit per reflectir que es t
             ),
         )
 
-        # Itera sobre cada sèrie (set) de l'entrada de l'exercici actual
-        for j, input_set in enumerate(input_entry.sets):
-            # Crea un objecte WorkoutSetModel per a cada sèrie
-            w_set = WorkoutSetModel(
-                workout_uuid=workout_content_entry.uuid, # Enllaça amb l'UUID de la plantilla principal
-                entry_index=i, # Enllaça amb l'índex de l'entrada de l'exercici
-                index=j, # Assigna un índex a la sèrie dins de l'entrada
-                # Extreu camps rellevants de la sèrie
-                **input_set.model_dump(include={"reps", "weight", "set_type"}),
-            )
-            # Afegeix la sèrie a la sessió de base de dades per ser guardada
-            session.add(w_set)
+        # Desa les sèries de l'entrada segons el mode d'emmagatzematge (vegeu `set_storage.py`)
+        add_entry_sets(session, entry, input_entry.sets)
 
         # Afegeix l'entrada de l'exercici a la sessió de base de dades
         session.add(entry)
@@ -200,25 +219,27 @@ async def delete_user_template(
     Raises:
         HTTPException: Si la plantilla no es troba (codi 404).
     """
-    # Cerca la plantilla per eliminar
-    query = (
-        select(WorkoutContentModel)
-        .outerjoin(
-            WorkoutInstanceModel,
-            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
-        )
-        .where(WorkoutInstanceModel.workout_uuid == None) # Assegura que és una plantilla
-        .where(WorkoutContentModel.creator_uuid == current_user.uuid) # Pertany a l'usuari actual
+    # Versió de canvi de l'eliminació. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    version = next_change_version(session, current_user.uuid)
+
+    # Elimina la plantilla amb una única sentència, si existeix, és de l'usuari actual
+    # i no té instància (és una plantilla). La base de dades elimina en cascada
+    # les seves entrades i sèries (ON DELETE CASCADE).
+    template = session.exec(
+        delete(WorkoutContentModel)  # pyright: ignore[]
         .where(WorkoutContentModel.uuid == UUID(template_uuid)) # Filtra per l'UUID
-    )
-    template = session.exec(query).first()
+        .where(WorkoutContentModel.creator_uuid == current_user.uuid) # Pertany a l'usuari actual
+        .where(
+            ~exists().where(WorkoutInstanceModel.workout_uuid == WorkoutContentModel.uuid)
+        ) # Assegura que és una plantilla
+        .returning(WorkoutContentModel.uuid)
+    ).first()
 
     if not template:
         raise HTTPException(status_code=404, detail="Template not found") # Plantilla no trobada
 
-    # SQLModel gestiona l'eliminació en cascada, ja que les relacions estan configurades amb `cascade_delete=True`.
-    # Si no, caldria eliminar manualment WorkoutEntryModel i WorkoutSetModel associats.
-    session.delete(template) # Elimina la plantilla
+    # Registra l'eliminació perquè els clients la rebin a la següent sincronització
+    record_deletion(session, current_user.uuid, template.uuid, SyncEntityType.TEMPLATE, version)
     session.commit() # Guarda els canvis
 
 
@@ -251,6 +272,9 @@ async def update_user_template(
     Returns:
         L'objecte WorkoutContentModel de la plantilla actualitzada.
     """
+    # Versió de canvi de la plantilla. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    version = next_change_version(session, current_user.uuid)
+
     # Cerca la plantilla per actualitzar
     query = (
         select(WorkoutContentModel)
@@ -267,24 +291,18 @@ async def update_user_template(
     if not template:
         raise HTTPException(status_code=404, detail="Template not found") # Plantilla no trobada
 
-    # Elimina les sèries (sets) existents associades a aquesta plantilla
-    existing_sets = session.exec(
-        select(WorkoutSetModel).where(WorkoutSetModel.workout_uuid == UUID(template_uuid))
-    ).all()
-    for w_set in existing_sets:
-        session.delete(w_set)
-
-    # Elimina les entrades (entries) existents associades a aquesta plantilla
-    existing_entries = session.exec(
-        select(WorkoutEntryModel).where(WorkoutEntryModel.workout_uuid == UUID(template_uuid))
-    ).all()
-    for entry in existing_entries:
-        session.delete(entry)
-
-    # Actualitza els camps principals de la plantilla (nom, descripció)
+    # Elimina les entrades existents de la plantilla amb una única sentència.
+    # La base de dades elimina en cascada les seves sèries (ON DELETE CASCADE).
+    session.exec(
+        delete(WorkoutEntryModel).where(WorkoutEntryModel.workout_uuid == UUID(template_uuid))  # pyright: ignore[]
+    )
+
+    # Actualitza els camps principals de la plantilla (nom, descripció) i el nombre d'entrades i de sèries
     template.sqlmodel_update(
         input_workout.model_dump(exclude_none=True, include={"name", "description"})
+        | input_workout.counts()
     )
+    template.version = version # Marca la plantilla com a modificada
 
     # Afegeix les noves entrades i sèries de la plantilla d'entrada
     for i, input_entry in enumerate(input_workout.entries):
@@ -302,14 +320,7 @@ async def update_user_template(
             ),
         )
 
-        for j, input_set in enumerate(input_entry.sets):
-            w_set = WorkoutSetModel(
-                workout_uuid=UUID(template_uuid), # Enllaça amb l'UUID de la plantilla
-                entry_index=i, # Enllaça amb l'objecte entry
-                index=j,
-                **input_set.model_dump(include={"reps", "weight", "set_type"}),
-            )
-            session.add(w_set) # Afegeix la nova sèrie
+        add_entry_sets(session, entry, input_entry.sets) # Afegeix les noves sèries
 
         session.add(entry) # Afegeix la nova entrada
 
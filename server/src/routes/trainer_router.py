@@ -3,7 +3,9 @@ from typing import List
 from uuid import UUID
 
 from db import get_session
-from fastapi import APIRouter, Depends, HTTPException
+from etag import conditional_response, make_etag
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from history import get_exercise_history
 from models.trainer import (
     TrainerRecommendationModel,
     TrainerRequestModel,
@@ -15,10 +17,11 @@ from models.workout import WorkoutContentModel, WorkoutInstanceModel
 from schemas.trainer_scehma import TrainerRequestSchema, UserInterestSchema
 from schemas.types.enums import TrainerRequestActions
 from schemas.user_schema import UserSchema
-from schemas.workout_schema import WorkoutContentSchema
+from schemas.workout_schema import ExerciseHistorySchema, WorkoutContentSchema
 from security import get_current_active_user, get_trainer_user, get_user_by_uuid
 from sqlalchemy import and_
 from sqlmodel import Session, func, select
+from versioning import get_user_change_version
 
 router = APIRouter() # Creació d'un router FastAPI per agrupar les rutes
 
@@ -344,6 +347,51 @@ async def delete_recommendation(
     session.commit() # Guarda els canvis
 
 
+@router.get(
+    "/trainer/users/{user_uuid}/exercises/{exercise_uuid}/history",
+    response_model=ExerciseHistorySchema, # La resposta és un ExerciseHistorySchema
+    name="Get exercise history of a paired user", # Nom de la ruta
+    tags=["Trainer"],
+)
+async def get_user_exercise_history(
+    user_uuid: UUID, # UUID de l'usuari vinculat
+    exercise_uuid: UUID, # UUID de l'exercici del qual obtenir l'historial
+    before: str | None = None, # Cursor de la pàgina anterior (`next_cursor`)
+    limit: int = Query(default=25, ge=1, le=100), # Nombre màxim d'entrades a retornar
+    trainer_user: UserModel = Depends(get_trainer_user), # Injecta l'usuari entrenador actual
+    session: Session = Depends(get_session), # Injecta una sessió de base de dades
+) -> ExerciseHistorySchema:
+    """
+    Obté l'historial d'un exercici d'un usuari vinculat a l'entrenador actual,
+    de l'entrada més recent a la més antiga, amb paginació per cursor.
+
+    Args:
+        user_uuid: L'UUID de l'usuari.
+        exercise_uuid: L'UUID de l'exercici.
+        before: El cursor de la pàgina anterior, o None per a la primera pàgina.
+        limit: El nombre màxim d'entrades a retornar.
+        trainer_user: L'usuari entrenador actualment autenticat.
+        session: La sessió de base de dades.
+
+    Raises:
+        HTTPException: Si l'usuari no està vinculat a l'entrenador (codi 404)
+            o si el cursor no és vàlid (codi 400).
+
+    Returns:
+        Un objecte ExerciseHistorySchema amb les entrades i el cursor de la pàgina següent.
+    """
+    # Comprova que l'usuari estigui vinculat a l'entrenador actual
+    user = session.exec(
+        select(UserModel)
+        .where(UserModel.uuid == user_uuid)
+        .where(UserModel.trainer_uuid == trainer_user.uuid)
+    ).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return get_exercise_history(session, user_uuid, exercise_uuid, before, limit) # pyright: ignore[]
+
+
 @router.get(
     "/trainer/users/{user_uuid}/templates",
     response_model=list[WorkoutContentSchema], # La resposta és una llista de WorkoutContentSchema
@@ -680,13 +728,18 @@ async def unpair_with_trainer(
     tags=["Trainer/User"],
 )
 async def view_user_recommendations(
+    request: Request, # Petició HTTP, per llegir la capçalera If-None-Match
+    response: Response, # Resposta HTTP, per afegir la capçalera ETag
     current_user: UserModel = Depends(get_current_active_user), # Injecta l'usuari actiu actual
     session: Session = Depends(get_session), # Injecta una sessió de base de dades
 ) -> List[WorkoutContentModel]: # El tipus de retorn és una llista de WorkoutContentModel
     """
     Obté totes les recomanacions d'entrenament que l'usuari actual ha rebut del seu entrenador vinculat.
+    Si el client envia l'ETag actual a `If-None-Match`, es retorna un 304 sense executar la consulta.
 
     Args:
+        request: La petició HTTP.
+        response: La resposta HTTP.
         current_user: L'usuari actualment autenticat.
         session: La sessió de base de dades.
 
@@ -696,6 +749,26 @@ async def view_user_recommendations(
     if not current_user.trainer_uuid: # Si no té entrenador, no pot tenir recomanacions d'un
         return []
 
+    # Nombre de recomanacions i versió de la més recent. Una recomanació nova sempre té una versió
+    # més alta i una d'eliminada redueix el recompte, per tant qualsevol canvi modifica l'ETag.
+    recommendations_count, recommendations_version = session.exec(
+        select(func.count(), func.max(TrainerRecommendationModel.version))
+        .where(TrainerRecommendationModel.user_uuid == current_user.uuid)
+        .where(TrainerRecommendationModel.trainer_uuid == current_user.trainer_uuid)
+    ).one()
+    # Les plantilles recomanades pertanyen a l'entrenador, per tant també depèn de les seves dades
+    etag = make_etag(
+        "user-recommendations",
+        current_user.uuid,
+        current_user.trainer_uuid,
+        recommendations_count,
+        recommendations_version,
+        get_user_change_version(session, current_user.trainer_uuid),
+    )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified: # El client ja té la llista actual
+        return not_modified # pyright: ignore[]
+
     # Construeix la consulta per obtenir les recomanacions
     query = (
         select(WorkoutContentModel) # Selecciona el contingut de l'entrenament
@@ -1,18 +1,42 @@
 from datetime import datetime, timedelta
 from uuid import uuid4
-
+from zoneinfo import ZoneInfo
+
+from archive import restore_archived_workouts
+from config import DATABASE_JSON
+from daily_stats import (
+    add_workout_to_daily_stats,
+    get_period_totals,
+    period_start,
+    period_starts,
+)
+from database_json import workouts_json_response
 from db import get_session
-from fastapi import APIRouter, Depends, HTTPException
-from models.users import UserModel
+from etag import conditional_response, make_etag
+from latest_entries import update_latest_entries
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from models.stats import WorkoutDailyStatsModel
+from models.users import UserConfig, UserModel
 from models.workout import (
     WorkoutContentModel,
     WorkoutEntryModel,
     WorkoutInstanceModel,
-    WorkoutSetModel,
 )
-from schemas.workout_schema import WorkoutContentSchema, WorkoutStatsSchema
-from security import get_current_active_user
+from read_models import read_workout_summaries, stream_workouts
+from records import update_personal_records
+from responses import STREAM_BATCH_SIZE, json_response, json_stream_response
+from schemas.record_schema import WorkoutResultSchema
+from schemas.types.enums import StatsGranularity, WorkoutView
+from schemas.workout_schema import (
+    WorkoutContentSchema,
+    WorkoutStatsPeriodSchema,
+    WorkoutStatsSchema,
+    WorkoutSummarySchema,
+)
+from security import get_current_active_user, get_current_user_settings
+from set_storage import add_entry_sets
 from sqlmodel import Session, desc, func, select
+from versioning import get_user_change_version, next_change_version
 
 # Creació d'un router FastAPI per agrupar les rutes relacionades amb els entrenaments
 router = APIRouter()
@@ -20,33 +44,56 @@ router = APIRouter()
 
 @router.get(
     "/user/workouts",
-    response_model=list[
-        WorkoutContentSchema
-    ],  # El tipus de resposta esperat és una llista d'objectes WorkoutContentSchema
+    # El tipus de resposta esperat és una llista d'objectes WorkoutContentSchema,
+    # o de WorkoutSummarySchema amb `view=summary`
+    response_model=list[WorkoutContentSchema] | list[WorkoutSummarySchema],
     name="Get user workouts",  # Nom de la ruta per a la documentació OpenAPI
     tags=["Workouts"],  # Etiqueta per agrupar rutes a la documentació OpenAPI
 )
 async def get_user_workouts(
+    request: Request,  # Petició HTTP, per llegir la capçalera If-None-Match
+    response: Response,  # Resposta HTTP, per afegir la capçalera ETag
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual
     session: Session = Depends(get_session),  # Injecta una sessió de base de dades
     offset: int = 0,  # Paràmetre de consulta per a la paginació: desplaçament inicial
     limit: int = 25,  # Paràmetre de consulta per a la paginació: nombre màxim d'elements a retornar
-) -> list[WorkoutContentSchema]:
+    view: WorkoutView = WorkoutView.FULL,  # Paràmetre de consulta: entrenaments complets o només el resum
+) -> list[WorkoutContentSchema] | list[WorkoutSummarySchema]:
     """
     Obté una llista dels entrenaments de l'usuari actual,
     ordenats pel més recent primer.
+    Amb `view=summary` retorna només el resum de cada entrenament (UUID, nom, inici, durada
+    i nombre d'entrades i de sèries), sense llegir les entrades ni les sèries.
+    Si el client envia l'ETag actual a `If-None-Match`, es retorna un 304 sense executar la consulta.
 
     Args:
+        request: La petició HTTP.
+        response: La resposta HTTP.
         current_user: L'usuari actualment autenticat.
         session: La sessió de base de dades.
         offset: El nombre d'entrenaments a ometre (per a paginació).
         limit: El nombre màxim d'entrenaments a retornar.
+        view: `full` per als entrenaments complets o `summary` per al resum.
 
     Returns:
-        Una llista d'objectes WorkoutContentSchema que representen els entrenaments de l'usuari.
+        Una llista d'objectes WorkoutContentSchema que representen els entrenaments de l'usuari,
+        o de WorkoutSummarySchema amb `view=summary`.
     """
+    # L'ETag depèn de la versió de canvi de les dades de l'usuari i de la pàgina sol·licitada
+    etag = make_etag(
+        "user-workouts",
+        current_user.uuid,
+        get_user_change_version(session, current_user.uuid),
+        offset,
+        limit,
+        view.value,
+    )
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:  # El client ja té la pàgina actual
+        return not_modified  # pyright: ignore[]
+
     # Construeix la consulta per seleccionar els entrenaments de l'usuari
     query = (
         select(
@@ -64,10 +111,21 @@ async def get_user_workouts(
         .offset(offset)  # Aplica el desplaçament per a la paginació
         .limit(limit)  # Limita el nombre de resultats
     )
+    if view == WorkoutView.SUMMARY:  # Només les columnes del resum, sense entrades ni sèries (vegeu read_models.py)
+        return json_response(read_workout_summaries(session, query), response)  # pyright: ignore[]
+    if DATABASE_JSON:  # PostgreSQL genera el JSON de la pàgina (vegeu database_json.py)
+        workout_uuids = session.scalars(query.with_only_columns(WorkoutContentModel.uuid)).all()
+        return workouts_json_response(list(workout_uuids), response)  # pyright: ignore[]
+    if limit > STREAM_BATCH_SIZE:  # Les pàgines grans s'envien per grups a mesura que es llegeixen
+        return json_stream_response(stream_workouts(query), response)  # pyright: ignore[]
+
     # Executa la consulta i obté tots els resultats
     workouts_with_instances = session.exec(query).all()
-    # Retorna només la part de WorkoutContentModel de cada tupla resultant
-    return [workout_content for workout_content, _ in workouts_with_instances]  # pyright: ignore[]
+    # Retorna només la part de WorkoutContentModel de cada tupla resultant,
+    # amb les entrades dels entrenaments arxivats recuperades de l'arxiu
+    return restore_archived_workouts(  # pyright: ignore[]
+        session, [workout_content for workout_content, _ in workouts_with_instances]
+    )
 
 
 @router.get(
@@ -117,12 +175,14 @@ async def get_user_workout(
             status_code=404, detail="Workout not found"
         )  # Entrenament no trobat
 
-    # Retorna la part de WorkoutContentModel de la tupla resultant
-    return workout_with_instance[0]  # pyright: ignore[]
+    # Retorna la part de WorkoutContentModel de la tupla resultant, amb les entrades
+    # recuperades de l'arxiu si l'entrenament està arxivat
+    return restore_archived_workouts(session, [workout_with_instance[0]])[0]  # pyright: ignore[]
 
 
 @router.post(
     "/user/workouts",
+    response_model=WorkoutResultSchema,  # El tipus de resposta esperat és un WorkoutResultSchema
     name="Add user workout to history", 
     tags=["Workouts"],
 )
@@ -131,23 +191,37 @@ async def add_user_workout(
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual
+    current_user_settings: UserConfig = Depends(
+        get_current_user_settings
+    ),  # Injecta la configuració de l'usuari actual
     session: Session = Depends(get_session),  # Injecta una sessió de base de dades
-):
+) -> WorkoutResultSchema:
     """
     Afegeix un nou entrenament a l'historial de l'usuari actual.
     Això inclou el contingut de l'entrenament, les seves entrades (exercicis) i les sèries.
+    També actualitza el resum diari, l'última entrada de cada exercici i els rècords
+    personals de l'usuari.
 
     Args:
         input_workout: Les dades de l'entrenament a afegir.
         current_user: L'usuari actualment autenticat.
+        current_user_settings: La configuració de l'usuari actual (per a la zona horària).
         session: La sessió de base de dades.
+
+    Returns:
+        Un objecte WorkoutResultSchema amb els rècords personals que ha superat l'entrenament.
     """
+    # Versió de canvi de l'entrenament. Bloqueja els canvis de l'usuari fins al commit (vegeu versioning.py)
+    version = next_change_version(session, current_user.uuid)
+
     # Crea l'objecte principal de l'entrenament (WorkoutContentModel)
     workout_content_entry = WorkoutContentModel(
         uuid=uuid4(),  # Genera un nou UUID per a l'entrenament
         creator_uuid=current_user.uuid,  # Assigna l'UUID de l'usuari actual com a creador
+        version=version,  # Versió de canvi per a la sincronització
         # Extreu 'name' i 'description' de l'objecte d'entrada, excloent valors None
         **input_workout.model_dump(exclude_none=True, include={"name", "description"}),
+        **input_workout.counts(),  # Nombre d'entrades i de sèries, per a les llistes resumides
     )
 
     # Itera sobre cada entrada (exercici) de l'entrenament d'entrada
@@ -161,6 +235,10 @@ async def add_user_workout(
             exercise_uuid=uuid4()
             if input_entry.exercise.uuid is None
             else input_entry.exercise.uuid,
+            # Copia l'inici de l'entrenament per paginar l'historial de l'exercici
+            timestamp_start=input_workout.instance.timestamp_start
+            if input_workout.instance
+            else None,
             # Extreu camps rellevants de l'entrada de l'exercici
             **input_entry.model_dump(
                 include={
@@ -170,18 +248,8 @@ async def add_user_workout(
             ),
         )
 
-        # Itera sobre cada sèrie (set) de l'entrada de l'exercici actual
-        for j, input_set in enumerate(input_entry.sets):
-            # Crea un objecte WorkoutSetModel per a cada sèrie
-            w_set = WorkoutSetModel(
-                workout_uuid=workout_content_entry.uuid,  # Enllaça amb l'UUID de l'entrenament principal
-                entry_index=i,  # Enllaça amb l'índex de l'entrada de l'exercici
-                index=j,  # Assigna un índex a la sèrie dins de l'entrada
-                # Extreu camps rellevants de la sèrie
-                **input_set.model_dump(include={"reps", "weight", "set_type"}),
-            )
-            # Afegeix la sèrie a la sessió de base de dades per ser guardada
-            session.add(w_set)
+        # Desa les sèries de l'entrada segons el mode d'emmagatzematge (vegeu `set_storage.py`)
+        add_entry_sets(session, entry, input_entry.sets)
 
         # Afegeix l'entrada de l'exercici a la sessió de base de dades
         session.add(entry)
@@ -202,9 +270,22 @@ async def add_user_workout(
         # Afegeix la instància de l'entrenament a la sessió
         session.add(workout_instance)
 
+    # Actualitza el resum diari de l'usuari dins la mateixa transacció
+    add_workout_to_daily_stats(session, current_user_settings, input_workout)
+    # Actualitza els punters a l'última entrada de cada exercici
+    update_latest_entries(
+        session, current_user.uuid, workout_content_entry.uuid, input_workout
+    )
+    # Actualitza els rècords personals i obté els que s'han superat
+    new_records = update_personal_records(
+        session, current_user.uuid, workout_content_entry.uuid, input_workout
+    )
+
     # Confirma (commit) tots els canvis a la base de dades
     session.commit()
 
+    return WorkoutResultSchema(personal_records=new_records)
+
 
 @router.get(
     "/user/stats",
@@ -213,117 +294,78 @@ async def add_user_workout(
     tags=["Workouts"],
 )
 async def get_user_stats(
+    weeks: int = Query(
+        default=8, ge=1, le=520
+    ),  # Nombre de setmanes de la finestra (fins a 10 anys)
+    granularity: StatsGranularity = StatsGranularity.WEEK,  # Període en què s'agrupen els totals
     current_user: UserModel = Depends(
         get_current_active_user
     ),  # Injecta l'usuari actiu actual
+    current_user_settings: UserConfig = Depends(
+        get_current_user_settings
+    ),  # Injecta la configuració de l'usuari actual
     session: Session = Depends(get_session),  # Injecta una sessió de base de dades
 ) -> WorkoutStatsSchema:
     """
     Obté estadístiques d'entrenaments per a l'usuari actual, incloent el total
-    d'entrenaments, entrenaments de l'última setmana i un historial setmanal.
+    d'entrenaments, entrenaments de l'última setmana, un historial setmanal i els totals
+    de cada dia, setmana o mes de la finestra sol·licitada.
+    Els dies i setmanes es calculen en la zona horària de l'usuari i les dades es llegeixen
+    del resum diari (`workout_daily_stats`), de manera que el cost no depèn de la mida
+    de l'historial d'entrenaments.
 
     Args:
+        weeks: El nombre de setmanes de la finestra, incloent la setmana actual.
+        granularity: El període (dia, setmana o mes) en què s'agrupen els totals.
         current_user: L'usuari actualment autenticat.
+        current_user_settings: La configuració de l'usuari actual (per a la zona horària).
         session: La sessió de base de dades.
 
-    Raises:
-        HTTPException: Si hi ha un error intern en obtenir les dades (codi 500).
-
     Returns:
         Un objecte WorkoutStatsSchema amb les estadístiques de l'usuari.
     """
-    # Obté la data i hora actuals, ajustades a l'inici del dia (00:00:00)
-    now = datetime.combine(datetime.now().date(), datetime.min.time())
-    # Calcula l'inici de la setmana actual (Dilluns)
-    start_of_week = now - timedelta(days=now.weekday())
+    # Obté el dia actual en la zona horària de l'usuari
+    today = datetime.now(ZoneInfo(current_user_settings.timezone)).date()
+    # Calcula l'inici de la setmana actual (Dilluns) i el primer dia de la finestra
+    start_of_week = period_start(today, StatsGranularity.WEEK)
+    window_start = start_of_week - timedelta(weeks=weeks - 1)
 
-    # Consulta per obtenir el nombre total d'entrenaments de l'usuari
+    # Total d'entrenaments de tot l'historial
     total_workouts_count = session.exec(
-        select(
-            func.count(WorkoutContentModel.uuid)
-        )  # Compta els UUIDs dels entrenaments
-        .select_from(WorkoutContentModel)  # Des de la taula WorkoutContentModel
-        .join(
-            WorkoutInstanceModel,  # Fa un join amb WorkoutInstanceModel
-            WorkoutContentModel.uuid
-            == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
-        )
-        .where(
-            WorkoutContentModel.creator_uuid == current_user.uuid
+        select(func.coalesce(func.sum(WorkoutDailyStatsModel.workouts), 0)).where(  # pyright: ignore[]
+            WorkoutDailyStatsModel.user_uuid == current_user.uuid
         )  # Filtra per l'usuari actual
-    ).first()
+    ).one()
 
-    # Consulta per obtenir el nombre d'entrenaments de l'usuari en l'última setmana (des de l'inici de la setmana actual)
-    workouts_last_week_count = session.exec(
-        select(func.count(WorkoutContentModel.uuid))
-        .select_from(WorkoutContentModel)
-        .join(
-            WorkoutInstanceModel,
-            WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
-        )
-        # Filtra per instàncies d'entrenament que van començar des de l'inici de la setmana actual
-        # Transformar el timestamp de datetime (segons) a milisegons (DB).
-        .where(WorkoutInstanceModel.timestamp_start >= start_of_week.timestamp() * 1000)
-        .where(
-            WorkoutContentModel.creator_uuid == current_user.uuid
-        )  # Filtra per l'usuari actual
-    ).first()
+    # Totals per setmana i, si cal, pel període sol·licitat
+    weekly_totals = get_period_totals(
+        session, current_user.uuid, StatsGranularity.WEEK, window_start
+    )
+    period_totals = (
+        weekly_totals
+        if granularity == StatsGranularity.WEEK
+        else get_period_totals(session, current_user.uuid, granularity, window_start)
+    )
 
-    # Si alguna de les consultes no retorna un resultat 
-    if total_workouts_count is None or workouts_last_week_count is None:
-        raise HTTPException(
-            status_code=500, detail="Internal server error"
-        ) 
-
-    # Inicialitza la llista d'entrenaments per setmana amb el recompte de l'última setmana
-    workouts_per_week_counts = [workouts_last_week_count]
-
-    # Itera sobre les 7 setmanes anteriors per recopilar estadístiques setmanals
-    for i in range(
-        7
-    ):  # Per a les setmanes -1, -2, ..., -7 respecte a la setmana actual
-        # Calcula la data de referència per a la setmana anterior
-        previous_week_ref_date = now - timedelta(weeks=i + 1)
-        # Calcula l'inici d'aquella setmana
-        start_of_period_week = previous_week_ref_date - timedelta(
-            days=previous_week_ref_date.weekday()
+    # Recompte d'entrenaments de cada setmana, la més recent primer (0 si no n'hi ha cap)
+    workouts_per_week_counts = [
+        weekly_totals[start].workouts if start in weekly_totals else 0
+        for start in period_starts(window_start, today, StatsGranularity.WEEK)
+    ]
+    # Totals de cada període, el més recent primer (a zero si no hi ha entrenaments)
+    periods = [
+        period_totals.get(
+            start,
+            WorkoutStatsPeriodSchema(start=start, workouts=0, duration=0, sets=0, volume=0),
         )
-        # Calcula el final d'aquella setmana (inici de la següent)
-        end_of_period_week = start_of_period_week + timedelta(days=7)
-
-        # Consulta per obtenir el nombre d'entrenaments en el període setmanal calculat
-        workouts_in_period_count = session.exec(
-            select(func.count(WorkoutContentModel.uuid))
-            .select_from(WorkoutContentModel)
-            .join(
-                WorkoutInstanceModel,
-                WorkoutContentModel.uuid == WorkoutInstanceModel.workout_uuid,  # pyright: ignore[]
-            )
-            .where(
-                WorkoutContentModel.creator_uuid == current_user.uuid
-            )  # Filtra per l'usuari actual
-            # Filtra per instàncies dins del rang de la setmana
-            .where(
-                WorkoutInstanceModel.timestamp_start
-                >= start_of_period_week.timestamp() * 1000
-            )
-            .where(
-                WorkoutInstanceModel.timestamp_start
-                < end_of_period_week.timestamp()
-                * 1000
-            )
-        ).first()
-
-        # Si s'obté un resultat per al període, l'afegeix a la llista
-        if workouts_in_period_count is not None:
-            workouts_per_week_counts.append(workouts_in_period_count)
-        else:
-            # Si no hi ha entrenaments en aquella setmana, afegeix 0
-            workouts_per_week_counts.append(0)
+        for start in period_starts(window_start, today, granularity)
+    ]
 
     # Retorna l'objecte WorkoutStatsSchema amb totes les dades recopilades
     return WorkoutStatsSchema(
         workouts=total_workouts_count,
-        workouts_last_week=workouts_last_week_count,
+        workouts_last_week=workouts_per_week_counts[0],
         workouts_per_week=workouts_per_week_counts,
+        granularity=granularity,
+        periods=periods,
     )
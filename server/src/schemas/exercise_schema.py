@@ -50,3 +50,18 @@ class ExerciseInputSchema(BaseModel):
     type: ExerciseType  # Tipus d'exercici.
     # UUID opcional de l'exercici per defecte en el qual es basa aquest exercici.
     default_exercise_uuid: UUID_TYPE | None = None
+
+
+class ExerciseProgressSchema(SQLModel):
+    """
+    Esquema que representa l'evolució d'un exercici al llarg de les sessions de l'usuari.
+    Les dades es retornen per columnes: la posició i de cada llista correspon a la sessió i,
+    ordenades de la més antiga a la més recent. Els pesos s'expressen en quilograms.
+    """
+
+    timestamps: list[int] = []  # Marca de temps Unix (en milisegons) de l'inici de cada sessió.
+    top_set_weight: list[float] = []  # Pes de la sèrie més pesada de la sessió.
+    top_set_reps: list[int] = []  # Repeticions de la sèrie més pesada de la sessió.
+    estimated_1rm: list[float] = []  # Millor 1RM estimat (fórmula d'Epley) de la sessió.
+    volume: list[float] = []  # Volum total (repeticions x pes) de la sessió.
+    reps: list[int] = []  # Repeticions totals de la sessió.
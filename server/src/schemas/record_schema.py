@@ -0,0 +1,29 @@
+from uuid import UUID as UUID_TYPE
+
+from sqlmodel import SQLModel
+
+from schemas.types.enums import RecordKind
+
+
+class PersonalRecordSchema(SQLModel):
+    """
+    Esquema que representa un rècord personal d'un usuari en un exercici.
+    Els pesos i el volum s'expressen en quilograms.
+    """
+
+    exercise_uuid: UUID_TYPE  # UUID de l'exercici.
+    record_kind: RecordKind  # Tipus de rècord.
+    value: float  # Valor del rècord (pes, repeticions, 1RM estimat o volum).
+    weight: float | None = None  # Pes de la sèrie del rècord (None per al volum de la sessió).
+    reps: int | None = None  # Repeticions de la sèrie del rècord (None per al volum de la sessió).
+    workout_uuid: UUID_TYPE  # UUID de l'entrenament en què es va aconseguir.
+    timestamp_start: int  # Marca de temps Unix (en milisegons) de l'inici d'aquell entrenament.
+
+
+class WorkoutResultSchema(SQLModel):
+    """
+    Esquema que representa la resposta a l'afegir un entrenament a l'historial.
+    """
+
+    # Rècords personals que l'entrenament ha superat.
+    personal_records: list[PersonalRecordSchema] = []
@@ -0,0 +1,33 @@
+from uuid import UUID as UUID_TYPE
+
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+
+from schemas.exercise_schema import ExerciseSchema
+from schemas.types.enums import SyncEntityType
+from schemas.workout_schema import WorkoutContentSchema
+
+
+class DeletedEntitySchema(SQLModel):
+    """
+    Esquema que representa una entitat eliminada des de l'última sincronització.
+    """
+
+    entity_uuid: UUID_TYPE  # UUID de l'entitat eliminada.
+    entity_type: SyncEntityType  # Tipus d'entitat eliminada.
+
+
+class SyncSchema(BaseModel):
+    """
+    Esquema que representa els canvis de les dades d'un usuari des d'una versió donada.
+    El client ha de guardar `version` i enviar-la com a `since` a la següent sincronització.
+
+    És un model de Pydantic (i no de SQLModel) perquè els entrenaments niats es puguin
+    validar directament a partir dels models de la base de dades.
+    """
+
+    version: int  # Versió de canvi més alta inclosa en aquesta resposta.
+    workouts: list[WorkoutContentSchema]  # Entrenaments creats o modificats.
+    templates: list[WorkoutContentSchema]  # Plantilles creades o modificades.
+    exercises: list[ExerciseSchema]  # Exercicis personalitzats creats, modificats o arxivats.
+    deleted: list[DeletedEntitySchema]  # Entitats eliminades.
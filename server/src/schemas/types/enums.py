@@ -57,4 +57,57 @@ class TrainerRequestActions(Enum):
     Enumeració que defineix les possibles accions que es poden prendre sobre una sol·licitud d'entrenador.
     """
     ACCEPT = "accept" # Acció d'acceptar la sol·licitud.
-    DENY = "deny" # Acció de rebutjar la sol·licitud.
\ No newline at end of file
+    DENY = "deny" # Acció de rebutjar la sol·licitud.
+
+class SyncEntityType(Enum):
+    """
+    Enumeració que defineix els tipus d'entitats que es poden sincronitzar de manera incremental.
+    """
+    WORKOUT = "workout" # Entrenament realitzat (amb instància).
+    TEMPLATE = "template" # Plantilla d'entrenament (sense instància).
+    EXERCISE = "exercise" # Exercici personalitzat de l'usuari.
+
+
+class StatsGranularity(Enum):
+    """
+    Enumeració que defineix els períodes en què es poden agrupar les estadístiques d'entrenaments.
+    """
+    DAY = "day" # Agrupació per dies.
+    WEEK = "week" # Agrupació per setmanes (de dilluns a diumenge).
+    MONTH = "month" # Agrupació per mesos.
+
+
+class RecordKind(Enum):
+    """
+    Enumeració que defineix els tipus de rècords personals que es registren per a cada exercici.
+    """
+    MAX_WEIGHT = "max-weight" # Pes més alt d'una sèrie.
+    MAX_REPS = "max-reps" # Més repeticions en una sèrie (amb el pes amb què es van fer).
+    MAX_ESTIMATED_1RM = "max-estimated-1rm" # 1RM estimat més alt d'una sèrie.
+    MAX_SESSION_VOLUME = "max-session-volume" # Volum més alt de l'exercici en una sessió.
+
+
+class AccountDeletionStatus(Enum):
+    """
+    Enumeració que defineix els estats d'una eliminació de compte.
+    """
+    PENDING = "pending" # El compte s'ha desactivat i l'eliminació encara no ha començat.
+    RUNNING = "running" # S'estan eliminant les dades del compte.
+    COMPLETED = "completed" # Totes les dades del compte s'han eliminat.
+    FAILED = "failed" # L'eliminació s'ha interromput per un error. Es pot reprendre.
+
+
+class ExportFormat(Enum):
+    """
+    Enumeració que defineix els formats de l'exportació de dades d'un usuari.
+    """
+    NDJSON = "ndjson" # Un objecte JSON per línia.
+    CSV = "csv" # Una fila per registre, amb una columna per al tipus de registre.
+
+
+class WorkoutView(Enum):
+    """
+    Enumeració que defineix com es retornen els entrenaments i plantilles a les llistes.
+    """
+    FULL = "full" # L'entrenament complet, amb les entrades, els exercicis i les sèries.
+    SUMMARY = "summary" # Només el resum: nom, inici, durada i nombre d'entrades i de sèries.
@@ -1,6 +1,8 @@
 from uuid import UUID
 from sqlmodel import SQLModel
 
+from schemas.types.enums import AccountDeletionStatus
+
 
 class UserSchema(SQLModel):
     """
@@ -34,3 +36,17 @@ class UserInfoSchema(UserSchema):
     # Indica si l'usuari està registrat com a entrenador.
     # Per defecte, es considera que un usuari no és un entrenador.
     is_trainer: bool = False
+    # Zona horària de l'usuari (nom IANA), utilitzada per a les estadístiques.
+    timezone: str = "UTC"
+
+
+class AccountDeletionSchema(SQLModel):
+    """
+    Esquema que representa l'estat de l'eliminació d'un compte.
+    Els comptes amb molts entrenaments s'eliminen en segon pla, per parts.
+    """
+
+    uuid: UUID  # Identificador de l'eliminació, per consultar-ne l'estat.
+    status: AccountDeletionStatus  # Estat de l'eliminació.
+    total_workouts: int  # Nombre d'entrenaments i plantilles del compte a eliminar.
+    deleted_workouts: int  # Nombre d'entrenaments i plantilles ja eliminats.
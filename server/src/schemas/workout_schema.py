@@ -1,10 +1,13 @@
-from typing import List
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, List
 from uuid import UUID as UUID_TYPE
 
+from pydantic import BaseModel, model_validator
 from sqlmodel import BigInteger, Column, Field, SQLModel
 
 from schemas.exercise_schema import ExerciseInputSchema
-from schemas.types.enums import SetType, WeightUnit
+from schemas.types.enums import SetType, StatsGranularity, WeightUnit
 
 
 class WorkoutSetSchema(SQLModel):
@@ -19,6 +22,32 @@ class WorkoutSetSchema(SQLModel):
     set_type: SetType  # Tipus de sèrie (normal, drop set, fins al fallo).
 
 
+def unpack_sets(data: Any, fields: dict) -> Any:
+    """
+    Prepara una entrada de la base de dades amb les sèries empaquetades en arrays
+    (vegeu `set_storage.py`) perquè es pugui validar igual que una amb les sèries en files.
+
+    Args:
+        data: Les dades a validar. Normalment un WorkoutEntryModel.
+        fields: Els camps de l'esquema que es valida.
+
+    Returns:
+        Les mateixes dades si les sèries no estan empaquetades; altrament, un objecte
+        amb els mateixos atributs i les sèries desempaquetades a `sets`.
+    """
+    if getattr(data, "packed_reps", None) is None:
+        return data
+
+    values = {name: getattr(data, name) for name in fields if name != "sets"}
+    values["sets"] = [
+        WorkoutSetSchema(reps=reps, weight=weight, set_type=SetType(set_type))
+        for reps, weight, set_type in zip(
+            data.packed_reps, data.packed_weights, data.packed_set_types
+        )
+    ]
+    return SimpleNamespace(**values)
+
+
 class WorkoutEntrySchema(SQLModel):
     """
     Esquema que representa un exercici dins d'un entrenament.
@@ -37,6 +66,12 @@ class WorkoutEntrySchema(SQLModel):
         WorkoutSetSchema
     ]  # Llista de sèries (WorkoutSetSchema) realitzades per a aquest exercici.
 
+    @model_validator(mode="before")
+    @classmethod
+    def _unpack_sets(cls, data: Any) -> Any:
+        # Les sèries poden estar desades en arrays a la mateixa entrada
+        return unpack_sets(data, cls.model_fields)
+
 
 class WorkoutInstanceSchema(SQLModel):
     """
@@ -69,6 +104,16 @@ class WorkoutContentSchema(SQLModel):
     # Llista d'entrades d'exercicis (WorkoutEntrySchema) que componen l'entrenament.
     entries: list[WorkoutEntrySchema]
 
+    def counts(self) -> dict[str, int]:
+        """
+        Calcula el nombre d'entrades i de sèries de l'entrenament, amb els noms de les
+        columnes de `WorkoutContentModel`.
+        """
+        return {
+            "entry_count": len(self.entries),
+            "set_count": sum(len(entry.sets) for entry in self.entries),
+        }
+
 
 class WorkoutTemplateSchema(WorkoutContentSchema):
     """
@@ -82,6 +127,63 @@ class WorkoutTemplateSchema(WorkoutContentSchema):
     instance: None = None
 
 
+class WorkoutSummarySchema(SQLModel):
+    """
+    Esquema que representa el resum d'un entrenament o d'una plantilla, sense les entrades
+    ni les sèries. Enviat al client a les llistes amb `view=summary`.
+    """
+
+    uuid: UUID_TYPE  # Identificador únic de l'entrenament.
+    name: str  # Nom de l'entrenament.
+    timestamp_start: int | None  # Marca de temps Unix (en milisegons) de l'inici. None a les plantilles.
+    duration: int | None  # Durada de l'entrenament (en segons). None a les plantilles.
+    entry_count: int | None  # Nombre d'entrades. None fins que el servidor omple els entrenaments antics.
+    set_count: int | None  # Nombre de sèries. None fins que el servidor omple els entrenaments antics.
+
+
+class ExerciseHistoryEntrySchema(SQLModel):
+    """
+    Esquema que representa una entrada de l'historial d'un exercici:
+    les sèries que es van fer en un entrenament concret.
+    """
+
+    workout_uuid: UUID_TYPE  # UUID de l'entrenament de l'entrada.
+    timestamp_start: int  # Marca de temps Unix (en milisegons) de l'inici de l'entrenament.
+    weight_unit: WeightUnit | None = None  # Unitat de pes utilitzada en aquesta entrada.
+    sets: list[WorkoutSetSchema]  # Sèries realitzades.
+
+    @model_validator(mode="before")
+    @classmethod
+    def _unpack_sets(cls, data: Any) -> Any:
+        # Les sèries poden estar desades en arrays a la mateixa entrada
+        return unpack_sets(data, cls.model_fields)
+
+
+class ExerciseHistorySchema(BaseModel):
+    """
+    Esquema que representa una pàgina de l'historial d'un exercici, de la més recent a la més antiga.
+
+    És un model de Pydantic (i no de SQLModel) perquè les entrades niades es puguin
+    validar directament a partir dels models de la base de dades.
+    """
+
+    entries: list[ExerciseHistoryEntrySchema]  # Entrades d'aquesta pàgina.
+    # Cursor per obtenir la pàgina següent (paràmetre `before`), o None si és l'última.
+    next_cursor: str | None = None
+
+
+class WorkoutStatsPeriodSchema(SQLModel):
+    """
+    Esquema que representa els totals d'entrenaments d'un període (dia, setmana o mes).
+    """
+
+    start: date  # Primer dia del període, en la zona horària de l'usuari.
+    workouts: int  # Nombre d'entrenaments realitzats.
+    duration: int  # Durada total dels entrenaments (en segons).
+    sets: int  # Nombre total de sèries realitzades.
+    volume: float  # Volum total (repeticions x pes, en quilograms).
+
+
 class WorkoutStatsSchema(SQLModel):
     """
     Esquema per representar estadístiques relacionades amb els entrenaments d'un usuari.
@@ -90,4 +192,19 @@ class WorkoutStatsSchema(SQLModel):
 
     workouts: int  # Nombre total d'entrenaments realitzats.
     workouts_last_week: int  # Nombre d'entrenaments realitzats en l'última setmana.
-    workouts_per_week: list[int] # Nombre d'entrenaments realitzats en les últiles 8 setmanes.
+    workouts_per_week: list[int] # Nombre d'entrenaments realitzats en les últimes setmanes (la més recent primer).
+    granularity: StatsGranularity = StatsGranularity.WEEK  # Període en què s'agrupa `periods`.
+    # Totals de cada període de la finestra sol·licitada (el més recent primer).
+    periods: list[WorkoutStatsPeriodSchema] = []
+
+
+class WorkoutImportSchema(SQLModel):
+    """
+    Esquema que representa el resultat d'importar un historial d'entrenaments des d'un CSV.
+    """
+
+    workouts: int  # Nombre d'entrenaments importats.
+    entries: int  # Nombre d'entrades importades.
+    sets: int  # Nombre de sèries importades.
+    created_exercises: int  # Nombre d'exercicis personalitzats creats.
+    skipped_workouts: int  # Nombre d'entrenaments omesos perquè ja eren a l'historial.
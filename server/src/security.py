@@ -1,29 +1,30 @@
-from uuid import uuid4
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import jwt
+from account_deletion import (
+    DELETION_CHUNK_SIZE,
+    run_account_deletion,
+    start_account_deletion,
+)
 from config import OAUTH2_SECRET_KEY
+from daily_stats import rebuild_daily_stats
 from db import get_session, session_generator
 from encryption import decrypt_message, export_public_key
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
 from models.chat import MessageModel
-from models.exercise import ExerciseModel
-from models.trainer import (
-    TrainerRecommendationModel,
-    TrainerRequestModel,
-    UserInterestLinkModel,
-)
-from models.users import AdminModel, TrainerModel, UserConfig, UserModel
-from models.workout import (
-    WorkoutContentModel,
-    WorkoutEntryModel,
-    WorkoutInstanceModel,
-    WorkoutSetModel,
-)
+from models.trainer import TrainerRecommendationModel, TrainerRequestModel
+from models.users import AccountDeletionModel, TrainerModel, UserConfig, UserModel
 from passlib.context import CryptContext
 from pydantic import BaseModel
-from schemas.user_schema import UserInfoSchema, UserInputSchema, UserSchema
+from schemas.user_schema import (
+    AccountDeletionSchema,
+    UserInfoSchema,
+    UserInputSchema,
+    UserSchema,
+)
 from sqlmodel import Session, select
 
 ALGORITHM = "HS256"  # Algorisme utilitzat per a la signatura de JWT
@@ -398,6 +399,7 @@ async def create_user(
 )
 async def get_profile(
     current_user: UserModel = Depends(get_current_active_user),
+    current_user_settings: UserConfig = Depends(get_current_user_settings),
     session: Session = Depends(get_session),
 ) -> UserInfoSchema:
     """
@@ -405,6 +407,7 @@ async def get_profile(
 
     Args:
         current_user: L'usuari actualment autenticat i actiu.
+        current_user_settings: La configuració de l'usuari actual.
         session: La sessió de base de dades.
 
     Returns:
@@ -420,7 +423,11 @@ async def get_profile(
         item is not None
     )  # Si es troba un registre d'entrenador, es un entrenador.
     # Crea un objecte UserInfoSchema a partir de les dades de l'usuari i l'indicador is_trainer
-    user = UserInfoSchema(**current_user.model_dump(), is_trainer=is_trainer)
+    user = UserInfoSchema(
+        **current_user.model_dump(),
+        is_trainer=is_trainer,
+        timezone=current_user_settings.timezone,
+    )
 
     return user
 
@@ -470,6 +477,41 @@ async def change_profile(
     return current_user
 
 
+@router.post("/timezone", name="Change timezone", tags=["Authentication"])
+async def change_timezone(
+    timezone: str,
+    current_user_settings: UserConfig = Depends(get_current_user_settings),
+    session: Session = Depends(get_session),
+):
+    """
+    Endpoint per canviar la zona horària de l'usuari actual.
+    Les estadístiques d'entrenaments es tornen a calcular amb la nova zona horària.
+
+    Args:
+        timezone: El nom IANA de la nova zona horària (p. ex. "Europe/Madrid").
+        current_user_settings: La configuració de l'usuari actual.
+        session: La sessió de base de dades.
+
+    Raises:
+        HTTPException: Si la zona horària no existeix.
+    """
+    # Comprova que la zona horària existeixi
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid timezone",
+        )
+
+    current_user_settings.timezone = timezone
+    session.add(current_user_settings)
+
+    # Torna a agrupar els entrenaments de l'usuari per dies de la nova zona horària
+    rebuild_daily_stats(session, current_user_settings.user_uuid)
+    session.commit()  # Guarda els canvis
+
+
 @router.post("/disable", name="Disable a user account", tags=["Authentication"])
 async def disable_user(
     current_user: UserModel = Depends(get_current_active_user),
@@ -506,132 +548,85 @@ async def disable_user(
     session.commit()  # Guarda tots els canvis
 
 
-@router.post("/delete", name="Delete a user account", tags=["Authentication"])
+@router.post(
+    "/delete",
+    response_model=AccountDeletionSchema,
+    name="Delete a user account",
+    tags=["Authentication"],
+)
 async def delete_user(
+    response: Response,
+    background_tasks: BackgroundTasks,
     current_user: UserModel = Depends(get_current_active_user),
     current_user_settings: UserConfig = Depends(get_current_user_settings),
     session: Session = Depends(get_session),
-):
+) -> AccountDeletionModel:
     """
     Endpoint per eliminar permanentment el compte de l'usuari actual i totes les seves dades associades.
+    El compte es desactiva immediatament. Si té pocs entrenaments, les dades s'eliminen
+    abans de respondre; altrament, s'eliminen en segon pla per parts i es respon amb el
+    codi 202. També es respon amb el codi 202 (i l'estat FAILED) si l'eliminació immediata falla.
+    L'estat de l'eliminació es pot consultar a `/auth/delete/{deletion_uuid}`.
 
     Args:
+        response: La resposta HTTP, per indicar el codi 202 quan l'eliminació continua en segon pla.
+        background_tasks: Les tasques a executar després de respondre.
         current_user: L'usuari actualment autenticat i actiu.
         current_user_settings: La configuració de l'usuari actual.
         session: La sessió de base de dades.
-    """
-    # Eliminar usuaris associats (si l'usuari actual és un entrenador)
-    query = select(UserModel).where(UserModel.trainer_uuid == current_user.uuid)
-    associated_users = session.exec(query).all()
-
-    for user_mod in associated_users:
-        user_mod.trainer_uuid = None  # Desvincula l'usuari de l'entrenador
-        session.add(user_mod)
-
-    # Primer, obté tots els entrenaments (WorkoutContentModel) creats per l'usuari
-    workouts = session.exec(
-        select(WorkoutContentModel).where(
-            WorkoutContentModel.creator_uuid == current_user.uuid
-        )
-    ).all()
-
-    for workout in workouts:
-        # Elimina les entrades (WorkoutEntryModel) de cada entrenament
-        entries = session.exec(
-            select(WorkoutEntryModel).where(
-                WorkoutEntryModel.workout_uuid == workout.uuid
-            )
-        ).all()
-
-        for entry in entries:
-            # Elimina els sets (WorkoutSetModel) per a aquesta entrada
-            sets = session.exec(
-                select(WorkoutSetModel).where(
-                    (WorkoutSetModel.workout_uuid == entry.workout_uuid)
-                    & (WorkoutSetModel.entry_index == entry.index)
-                )
-            ).all()
-
-            for set_item in sets:
-                session.delete(set_item)  # Elimina cada set
 
-            session.delete(entry)  # Elimina l'entrada
+    Returns:
+        L'estat de l'eliminació del compte.
+    """
+    deletion = start_account_deletion(session, current_user, current_user_settings)
 
-        # Elimina la instància de l'entrenament (WorkoutInstanceModel) si existeix
-        instance = session.get(WorkoutInstanceModel, workout.uuid)
-        if instance:
-            session.delete(instance)
+    if deletion.total_workouts <= DELETION_CHUNK_SIZE:
+        try:
+            run_account_deletion(deletion.uuid)
+        except Exception:
+            # El compte ja està desactivat i l'eliminació consta com a FAILED: es retorna
+            # amb el codi 202, com les eliminacions en segon pla, perquè el client en pugui
+            # consultar l'estat. Es pot reprendre amb `manage.py resume-account-deletions`.
+            response.status_code = status.HTTP_202_ACCEPTED
+        session.refresh(deletion)
+    else:
+        background_tasks.add_task(run_account_deletion, deletion.uuid)
+        response.status_code = status.HTTP_202_ACCEPTED
 
-        # Elimina el contingut de l'entrenament (WorkoutContentModel)
-        session.delete(workout)
+    return deletion
 
-    # Eliminar ExerciseModel creats per l'usuari
-    exercises = session.exec(
-        select(ExerciseModel).where(ExerciseModel.creator_uuid == current_user.uuid)
-    ).all()
-    for exercise in exercises:
-        session.delete(exercise)
 
-    # Eliminar MessageModel on l'usuari és emissor o receptor
-    messages = session.exec(
-        select(MessageModel).where(
-            (MessageModel.user_uuid == current_user.uuid)
-            | (MessageModel.trainer_uuid == current_user.uuid)
-        )
-    ).all()
-    for message in messages:
-        session.delete(message)
+@router.get(
+    "/delete/{deletion_uuid}",
+    response_model=AccountDeletionSchema,
+    name="Get the status of an account deletion",
+    tags=["Authentication"],
+)
+async def get_account_deletion(
+    deletion_uuid: UUID,
+    session: Session = Depends(get_session),
+) -> AccountDeletionModel:
+    """
+    Endpoint per consultar el progrés de l'eliminació d'un compte.
+    No requereix autenticació, ja que el compte ja està desactivat; l'UUID de
+    l'eliminació només el coneix qui l'ha sol·licitada i la resposta no conté dades personals.
 
-    # Eliminar TrainerRecommendationModel on l'usuari és l'usuari o l'entrenador
-    recommendations = session.exec(
-        select(TrainerRecommendationModel).where(
-            (TrainerRecommendationModel.user_uuid == current_user.uuid)
-            | (TrainerRecommendationModel.trainer_uuid == current_user.uuid)
-        )
-    ).all()
-    for recommendation in recommendations:
-        session.delete(recommendation)
+    Args:
+        deletion_uuid: L'UUID de l'eliminació, retornat per `/auth/delete`.
+        session: La sessió de base de dades.
 
-    # Eliminar TrainerRequestModel on l'usuari és l'usuari o l'entrenador
-    requests = session.exec(
-        select(TrainerRequestModel).where(
-            (TrainerRequestModel.user_uuid == current_user.uuid)
-            | (TrainerRequestModel.trainer_uuid == current_user.uuid)
-        )
-    ).all()
-    for request_item in (
-        requests
-    ):  # Canviat 'request' a 'request_item' per evitar conflicte amb el mòdul 'request'
-        session.delete(request_item)
+    Raises:
+        HTTPException: Si l'eliminació no existeix (codi 404).
 
-    # Eliminar UserInterestLinkModel associats a l'usuari
-    interests = session.exec(
-        select(UserInterestLinkModel).where(
-            UserInterestLinkModel.user_uuid == current_user.uuid
+    Returns:
+        L'estat de l'eliminació del compte.
+    """
+    deletion = session.get(AccountDeletionModel, deletion_uuid)
+    if not deletion:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Account deletion not found"
         )
-    ).all()
-    for interest in interests:
-        session.delete(interest)
-
-    # Eliminar TrainerModel si l'usuari és un entrenador
-    trainer = session.get(
-        TrainerModel, current_user.uuid
-    )  # Intenta obtenir el registre d'entrenador
-    if trainer:
-        session.delete(trainer)  # Elimina el registre d'entrenador
-
-    # Eliminar AdminModel si l'usuari és un administrador
-    admin = session.get(
-        AdminModel, current_user.uuid
-    )  # Intenta obtenir el registre d'administrador
-    if admin:
-        session.delete(admin)  # Elimina el registre d'administrador
-
-    # Finalment, eliminar UserConfig i UserModel
-    session.delete(current_user_settings)  # Elimina la configuració de l'usuari
-    session.delete(current_user)  # Elimina l'usuari
-
-    session.commit()  # Guarda tots els canvis d'eliminació
+    return deletion
 
 
 @router.post("/change-password", name="Change password", tags=["Authentication"])
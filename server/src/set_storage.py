@@ -0,0 +1,154 @@
+from config import PACKED_SETS
+from models.workout import ArchivedWorkoutModel, WorkoutEntryModel, WorkoutSetModel
+from schemas.workout_schema import WorkoutSetSchema
+from sqlalchemy import Float, Integer, cast, column, true, union_all
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlmodel import Session, func, select
+from units import to_kg
+
+# Les sèries d'una entrada es poden desar de dues maneres:
+# - En files (per defecte): una fila de 'workout_set' per sèrie.
+# - Empaquetades (ULTRA_PACKED_SETS=true): arrays a la mateixa fila de 'workout_entry',
+#   una posició per sèrie. Evita una fila i una entrada d'índex per sèrie.
+# Les dues maneres poden conviure a la mateixa base de dades: el mode només decideix
+# com es desen les entrades noves. La lectura és la mateixa en tots dos casos
+# (vegeu `WorkoutEntrySchema`), i les agregacions utilitzen `all_sets`, que també inclou
+# les sèries dels entrenaments arxivats.
+
+
+def add_entry_sets(
+    session: Session, entry: WorkoutEntryModel, sets: list[WorkoutSetSchema]
+):
+    """
+    Desa les sèries d'una entrada nova segons el mode d'emmagatzematge del servidor.
+    L'entrada ha de tenir assignats `workout_uuid`, `index`, `weight_unit` i `timestamp_start`.
+
+    Args:
+        session: La sessió de base de dades.
+        entry: L'entrada a la qual pertanyen les sèries.
+        sets: Les sèries de l'entrada, en ordre.
+    """
+    if PACKED_SETS:
+        entry.packed_reps = [input_set.reps for input_set in sets]
+        entry.packed_weights = [input_set.weight for input_set in sets]
+        entry.packed_weights_kg = [
+            to_kg(input_set.weight, entry.weight_unit) for input_set in sets
+        ]
+        entry.packed_set_types = [input_set.set_type.value for input_set in sets]
+        return
+
+    for j, input_set in enumerate(sets):
+        session.add(
+            WorkoutSetModel(
+                workout_uuid=entry.workout_uuid,  # Enllaça amb l'UUID de l'entrenament
+                entry_index=entry.index,  # Enllaça amb l'índex de l'entrada
+                index=j,  # Assigna un índex a la sèrie dins de l'entrada
+                # Extreu camps rellevants de la sèrie
+                **input_set.model_dump(include={"reps", "weight", "set_type"}),
+                # Pes normalitzat a quilograms per a les agregacions
+                weight_kg=to_kg(input_set.weight, entry.weight_unit),
+                # Inici de l'entrenament, clau de partició de la taula
+                timestamp_start=entry.timestamp_start,
+            )
+        )
+
+
+def all_sets():
+    """
+    Retorna una subconsulta amb totes les sèries, tant les desades en files
+    com les empaquetades i les arxivades, per a les agregacions en SQL.
+    Els filtres sobre `exercise_uuid` o `workout_uuid` s'apliquen a totes les parts.
+
+    Returns:
+        Una subconsulta amb les columnes workout_uuid, entry_index, index,
+        exercise_uuid, reps i weight_kg.
+    """
+    rows = select(
+        WorkoutSetModel.workout_uuid,
+        WorkoutSetModel.entry_index,
+        WorkoutSetModel.index,
+        WorkoutEntryModel.exercise_uuid,
+        WorkoutSetModel.reps,
+        WorkoutSetModel.weight_kg,
+    ).join(
+        WorkoutEntryModel,
+        (WorkoutEntryModel.workout_uuid == WorkoutSetModel.workout_uuid)  # pyright: ignore[]
+        & (WorkoutEntryModel.index == WorkoutSetModel.entry_index),
+    )
+
+    # unnest() desplega els arrays en paral·lel, una fila per sèrie
+    unpacked = func.unnest(
+        WorkoutEntryModel.packed_reps, WorkoutEntryModel.packed_weights_kg
+    ).table_valued("reps", "weight_kg", with_ordinality="ordinality").render_derived()
+    packed = (
+        select(
+            WorkoutEntryModel.workout_uuid,
+            WorkoutEntryModel.index.label("entry_index"),  # pyright: ignore[]
+            (unpacked.c.ordinality - 1).label("index"),  # Les posicions comencen a 1
+            WorkoutEntryModel.exercise_uuid,
+            unpacked.c.reps,
+            unpacked.c.weight_kg,
+        )
+        .select_from(WorkoutEntryModel)
+        .join(unpacked, true())
+        .where(WorkoutEntryModel.packed_reps != None)
+    )
+
+    # Entrenaments arxivats (vegeu `archive.py`): una fila per sèrie de cada entrada de l'arxiu
+    archived_entries = func.jsonb_array_elements(ArchivedWorkoutModel.entries).table_valued(
+        column("value", JSONB), with_ordinality="ordinality"
+    ).render_derived("archived_entry")
+    archived_sets = func.jsonb_array_elements(archived_entries.c.value["sets"]).table_valued(
+        column("value", JSONB), with_ordinality="ordinality"
+    ).render_derived("archived_set")
+    archived = (
+        select(
+            ArchivedWorkoutModel.workout_uuid,
+            (archived_entries.c.ordinality - 1).label("entry_index"),
+            (archived_sets.c.ordinality - 1).label("index"),
+            cast(archived_entries.c.value["exercise_uuid"].astext, PG_UUID(as_uuid=True)).label(
+                "exercise_uuid"
+            ),
+            cast(archived_sets.c.value["reps"].astext, Integer).label("reps"),
+            cast(archived_sets.c.value["weight_kg"].astext, Float).label("weight_kg"),
+        )
+        .select_from(ArchivedWorkoutModel)
+        .join(archived_entries, true())
+        .join(archived_sets, true())
+    )
+
+    return union_all(rows, packed, archived).subquery("all_sets")
+
+
+def get_storage_stats(session: Session) -> dict[str, int]:
+    """
+    Obté la mida de les taules d'entrenaments i el nombre de sèries desades de cada manera.
+    S'utilitza per comparar els dos modes d'emmagatzematge.
+
+    Args:
+        session: La sessió de base de dades.
+
+    Returns:
+        Un diccionari amb la mida total (dades i índexs, en bytes) de 'workout_entry',
+        'workout_set' i 'archived_workout', i el nombre de sèries en files i empaquetades.
+    """
+    return {
+        "workout_entry_bytes": session.exec(
+            select(func.pg_total_relation_size("workout_entry"))
+        ).one(),
+        "workout_set_bytes": session.exec(
+            select(func.pg_total_relation_size("workout_set"))
+        ).one(),
+        "archived_workout_bytes": session.exec(
+            select(func.pg_total_relation_size("archived_workout"))
+        ).one(),
+        "row_sets": session.exec(select(func.count()).select_from(WorkoutSetModel)).one(),
+        "packed_sets": session.exec(
+            select(
+                func.coalesce(
+                    func.sum(func.cardinality(WorkoutEntryModel.packed_reps)), 0
+                )
+            )
+        ).one(),
+    }
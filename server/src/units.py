@@ -0,0 +1,41 @@
+from schemas.types.enums import WeightUnit
+from sqlmodel import case
+
+# Factor de conversió de lliures a quilograms.
+KG_PER_LB = 0.45359237
+
+
+def to_kg(weight: float | None, unit: WeightUnit | None) -> float | None:
+    """
+    Converteix un pes a quilograms segons la unitat de l'entrada.
+    Els pesos sense unitat es consideren en el sistema mètric.
+
+    Args:
+        weight: El pes a convertir.
+        unit: La unitat en què està expressat el pes.
+
+    Returns:
+        El pes en quilograms, o None si no hi ha pes.
+    """
+    if weight is None:
+        return None
+    if unit == WeightUnit.IMPERIAL:
+        return weight * KG_PER_LB
+    return weight
+
+
+def kg_expression(weight_column, unit_column):
+    """
+    Retorna l'expressió SQL equivalent a `to_kg` per a unes columnes de pes i unitat.
+
+    Args:
+        weight_column: La columna amb el pes.
+        unit_column: La columna amb la unitat del pes.
+
+    Returns:
+        Una expressió SQL amb el pes en quilograms.
+    """
+    return case(
+        (unit_column == WeightUnit.IMPERIAL, weight_column * KG_PER_LB),
+        else_=weight_column,
+    )
@@ -0,0 +1,79 @@
+from uuid import UUID
+
+from models.sync import DeletedEntityModel, UserChangeVersionModel, change_version_seq
+from schemas.types.enums import SyncEntityType
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+
+def next_change_version(session: Session, user_uuid: UUID) -> int:
+    """
+    Obté una nova versió de canvi per a les dades d'un usuari i la desa a `user_change_version`.
+    S'ha d'assignar a les entitats que es modifiquen perquè la sincronització incremental les detecti.
+    La fila de l'usuari queda bloquejada fins al final de la transacció: les altres transaccions
+    que modifiquen les dades del mateix usuari esperen, i obtenen versions més altes quan aquesta
+    ja s'ha confirmat. Per això s'ha de cridar abans d'escriure cap dada de l'usuari.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari propietari de les dades.
+
+    Returns:
+        El següent valor de la seqüència `change_version_seq`.
+    """
+    statement = insert(UserChangeVersionModel).values(
+        user_uuid=user_uuid, version=change_version_seq.next_value()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserChangeVersionModel.user_uuid],
+        set_={"version": change_version_seq.next_value()},
+    ).returning(UserChangeVersionModel.version)
+    return session.exec(statement).scalar_one()  # pyright: ignore[]
+
+
+def record_deletion(
+    session: Session,
+    user_uuid: UUID,
+    entity_uuid: UUID,
+    entity_type: SyncEntityType,
+    version: int,
+):
+    """
+    Registra una marca d'eliminació (tombstone) per a una entitat de l'usuari.
+    La marca s'afegeix a la sessió i es persisteix amb el mateix commit que l'eliminació.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari propietari de l'entitat.
+        entity_uuid: L'UUID de l'entitat eliminada.
+        entity_type: El tipus d'entitat eliminada.
+        version: La versió de canvi de la transacció (vegeu `next_change_version`).
+    """
+    session.merge(
+        DeletedEntityModel(
+            user_uuid=user_uuid,
+            entity_uuid=entity_uuid,
+            entity_type=entity_type,
+            version=version,
+        )
+    )
+
+
+def get_user_change_version(session: Session, user_uuid: UUID) -> int:
+    """
+    Obté l'última versió de canvi de les dades d'un usuari
+    (entrenaments, plantilles, exercicis personalitzats i eliminacions) de `user_change_version`.
+    Com que cada escriptura l'actualitza en la mateixa transacció i en ordre de confirmació
+    (vegeu `next_change_version`), canvia cada vegada que es confirma un canvi de l'usuari.
+
+    Args:
+        session: La sessió de base de dades.
+        user_uuid: L'UUID de l'usuari.
+
+    Returns:
+        L'última versió, o 0 si l'usuari encara no ha fet cap canvi.
+    """
+    version = session.exec(
+        select(UserChangeVersionModel.version).where(UserChangeVersionModel.user_uuid == user_uuid)
+    ).first()
+    return version or 0